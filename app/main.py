@@ -12,12 +12,18 @@ from collections.abc import AsyncIterator
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import SQLAlchemyError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.sessions import SessionMiddleware
 
+from app.db import engine
 from app.errors import RepositoryUnavailable
 from app.routers import discover, pages, publish
+from app.services.datasets import ensure_keyword_links, ensure_listing_indexes
 from app.services.drafts import store
+from app.services.facets import ensure_facet_counts
+from app.services.generation import ensure_catalog_generation
+from app.services.search import ensure_search_index
 from app.settings import SECRET_KEY_WAS_GENERATED, settings
 from app.templating import STATIC_DIR, render
 
@@ -39,6 +45,21 @@ async def _sweep_drafts_forever() -> None:
         await asyncio.sleep(settings.draft_sweep_interval_seconds)
 
 
+def _prepare_database() -> None:
+    # Each on its own, so one that fails does not keep the rest from running.
+    for step in (
+        ensure_listing_indexes,
+        ensure_keyword_links,
+        ensure_search_index,
+        ensure_facet_counts,
+        ensure_catalog_generation,
+    ):
+        try:
+            step(engine)
+        except SQLAlchemyError as exc:
+            logger.warning("Could not set up the database (%s): %s", step.__name__, exc)
+
+
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if SECRET_KEY_WAS_GENERATED:
@@ -56,6 +77,13 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if interrupted:
         logger.warning("Marked %d in-flight upload(s) as interrupted after restart", interrupted)
 
+    # Add the indexes, facet counts and generation counter the listing relies on
+    # to a database created before them, and build the search index now rather
+    # than on the first search. The database may be down or not yet initialized;
+    # the search index, facet counts and generation counter are then created on
+    # first use.
+    await asyncio.to_thread(_prepare_database)
+
     sweeper = asyncio.create_task(_sweep_drafts_forever())
     try:
         yield
@@ -45,6 +45,11 @@ def _listing_url_builder(query: str, licenses: list[str], keywords: list[str], s
         page = overrides.get("page", 1)
         if page and int(page) > 1:
             params.append(("page", str(page)))
+        # Cursors only ever come from the pagination controls; any other link
+        # changes the result set, so it starts again from the first page.
+        for cursor in ("after", "before"):
+            if overrides.get(cursor):
+                params.append((cursor, overrides[cursor]))
         suffix = urlencode(params)
         return f"/datasets?{suffix}" if suffix else "/datasets"
 
@@ -58,9 +63,11 @@ def _listing_context(
     keywords: list[str],
     sort: str,
     page: int,
+    after: str = "",
+    before: str = "",
 ) -> dict:
     results = dataset_service.list_datasets(
-        session, query=query, licenses=licenses, keywords=keywords, sort=sort, page=page
+        session, query=query, licenses=licenses, keywords=keywords, sort=sort, page=page, after=after, before=before
     )
     facets = dataset_service.get_facets(session)
     sort = sort if sort in SORT_OPTIONS else "newest"
@@ -119,12 +126,14 @@ def listing(
     keyword: list[str] = Query(default=[]),
     sort: str = "newest",
     page: int = 1,
+    after: str = "",
+    before: str = "",
     session: Session = Depends(get_db),
 ):
     """The results grid. A partial for htmx, a full page otherwise, so that the
     URLs htmx pushes stay shareable and survive a reload."""
     try:
-        context = _listing_context(session, q.strip(), license, keyword, sort, page)
+        context = _listing_context(session, q.strip(), license, keyword, sort, page, after, before)
     except RepositoryUnavailable as exc:
         context = _unavailable_context(exc, q.strip(), sort)
 
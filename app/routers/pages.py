@@ -5,6 +5,8 @@ from fastapi.responses import JSONResponse
 from sqlmodel import Session, text
 
 from app.deps import get_db
+from app.services.datasets import catalog_cache_stats
+from pelican_data_loader.data import s3_pool_stats
 
 router = APIRouter()
 
@@ -27,3 +29,9 @@ def readyz(session: Session = Depends(get_db)) -> JSONResponse:
     except Exception as exc:  # noqa: BLE001
         return JSONResponse({"status": "unavailable", "detail": str(exc)}, status_code=503)
     return JSONResponse({"status": "ok"})
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> JSONResponse:
+    """Process counters, for checking connection reuse and cache behaviour."""
+    return JSONResponse({"s3_pool": s3_pool_stats(), "catalog_cache": catalog_cache_stats()})
@@ -0,0 +1,77 @@
+"""Check that chunked schema inference gives the dtypes of a whole-file read.
+
+`pelican_data_loader.infer_schema` reads an upload in chunks and merges their
+dtypes with `merge_dtype`, on the claim that this matches `pd.read_csv` of the
+whole file. Each case below writes a small CSV built to put a dtype change
+across a chunk boundary, and compares the two at several chunk sizes.
+
+Needs no database and no S3 credentials; the Docker build runs it beside
+app/smoke_test.py.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from pelican_data_loader.croissant import infer_schema
+
+# Chunk sizes small enough to split every case, and one larger than any of them.
+CHUNK_ROWS = (1, 2, 3, 5, 1_000)
+
+# name: (CSV text, whether every chunking must match). The cases are named by
+# what their columns mix; each column of a case is checked.
+CASES: dict[str, tuple[str, bool]] = {
+    "int then float": ("a,b\n1,1\n2,2\n3,3.5\n4,4\n", True),
+    "float then int": ("a\n1.5\n2\n3\n4\n", True),
+    "int then empty": ("a,b\n1,x\n2,y\n,z\n,w\n", True),
+    "empty then int": ("a,b\n,x\n,y\n3,z\n4,w\n", True),
+    "all empty": ("a,b\n,1\n,2\n,3\n", True),
+    "no rows": ("a,b\n", True),
+    "bool then empty": ("a\nTrue\nFalse\n\n\n", True),
+    "bool then string": ("a\nTrue\nFalse\nmaybe\nTrue\n", True),
+    "bool then int": ("a\nTrue\nFalse\n1\n0\n", True),
+    "int then string": ("a\n1\n2\nthree\n4\n", True),
+    "uint64 only": (f"a\n{2**63}\n{2**63 + 1}\n{2**64 - 1}\n", True),
+    # merge_dtype's documented exception: pandas' own answer for these depends
+    # on where its internal chunk boundaries fall, so only the whole file
+    # read in one chunk is held to it.
+    "uint64 then negative int": (f"a\n{2**63}\n{2**63 + 1}\n-1\n-2\n", False),
+}
+
+failures: list[str] = []
+
+
+def fail(message: str) -> None:
+    failures.append(message)
+    print(f"FAIL: {message}", file=sys.stderr)
+
+
+def check_case(name: str, csv_path: Path, exact: bool) -> None:
+    expected = {str(column): str(dtype) for column, dtype in pd.read_csv(csv_path).dtypes.items()}
+    for chunk_rows in CHUNK_ROWS:
+        if not exact and chunk_rows < 1_000:
+            continue
+        inferred = infer_schema(csv_path, chunk_rows=chunk_rows).dtypes
+        if inferred != expected:
+            fail(f"{name}, {chunk_rows} row chunks: inferred {inferred}, pd.read_csv gives {expected}")
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, (name, (text, exact)) in enumerate(CASES.items()):
+            csv_path = Path(tmp) / f"case_{index}.csv"
+            csv_path.write_text(text)
+            check_case(name, csv_path, exact)
+
+    if failures:
+        print(f"\n{len(failures)} check(s) failed", file=sys.stderr)
+        return 1
+
+    print(f"OK: chunked inference matches pd.read_csv in {len(CASES)} cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,13 +14,10 @@ from typing import Generic, TypeVar
 from pydantic import BaseModel, Field
 
 from pelican_data_loader.croissant import CroissantAuthor, CroissantSpec
+from pelican_data_loader.data import MultipartUploadState
 
 T = TypeVar("T")
 
-# Most numbered pagination buttons drawn at once. A module constant rather than
-# a class attribute: a bare int on a BaseModel would become a pydantic field.
-PAGE_WINDOW = 7
-
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -62,47 +59,39 @@ class DatasetDetail(DatasetSummary):
 
 
 class Page(BaseModel, Generic[T]):
+    """One page of results, with cursors to the pages either side.
+
+    `has_prev` and `has_next` come from the query itself, not from the total,
+    which may be an estimate or missing altogether.
+    """
+
     items: list[T]
-    total: int
+    total: int | None = None
+    total_is_estimate: bool = False
     page: int
     page_size: int
+    has_prev: bool = False
+    has_next: bool = False
+    # Pass as `before` / `after` to fetch the previous / next page. None where
+    # there is none, or where the page was reached by offset.
+    prev_cursor: str | None = None
+    next_cursor: str | None = None
 
     @property
-    def pages(self) -> int:
+    def pages(self) -> int | None:
+        if self.total is None:
+            return None
         if self.page_size <= 0:
             return 1
         return max(1, -(-self.total // self.page_size))
 
-    @property
-    def has_prev(self) -> bool:
-        return self.page > 1
-
-    @property
-    def has_next(self) -> bool:
-        return self.page < self.pages
-
     @property
     def first_index(self) -> int:
-        return 0 if not self.total else (self.page - 1) * self.page_size + 1
+        return 0 if not self.items else (self.page - 1) * self.page_size + 1
 
     @property
     def last_index(self) -> int:
-        return min(self.page * self.page_size, self.total)
-
-    @property
-    def page_numbers(self) -> list[int]:
-        """The numbered buttons to draw, as a contiguous window on the current page.
-
-        Capped at PAGE_WINDOW so a repository with hundreds of pages still
-        renders one tidy row; Previous and Next reach everything outside it.
-        Deliberately contiguous with no ellipsis — every number drawn is a real
-        page, so nothing has to explain itself.
-        """
-        if self.pages <= PAGE_WINDOW:
-            return list(range(1, self.pages + 1))
-        half = PAGE_WINDOW // 2
-        start = min(max(1, self.page - half), self.pages - PAGE_WINDOW + 1)
-        return list(range(start, start + PAGE_WINDOW))
+        return 0 if not self.items else self.first_index + len(self.items) - 1
 
 
 class Facet(BaseModel):
@@ -176,6 +165,9 @@ class PublishDraft(BaseModel):
     row_count: int = 0
     column_count: int = 0
     columns: list[ColumnInfo] = Field(default_factory=list)
+    # Taken while data.csv was received, so uploading it never needs a re-read.
+    csv_sha256: str = ""
+    csv_bytes: int = 0
     preview_columns: list[str] = Field(default_factory=list)
     preview_rows: list[list[str]] = Field(default_factory=list)
 
@@ -183,6 +175,9 @@ class PublishDraft(BaseModel):
     upload_pct: int = 0
     upload_error: str = ""
     upload_started_at: datetime | None = None
+    # The open multipart upload, checkpointed per part so a retry after a
+    # restart sends only what is missing. Cleared once the upload completes.
+    s3_multipart: MultipartUploadState | None = None
 
     s3_file_id: str = ""
     s3_file_name: str = ""
@@ -190,6 +185,10 @@ class PublishDraft(BaseModel):
     s3_file_sha256: str = ""
     pelican_uri: str = ""
     pelican_http_url: str = ""
+    # The Parquet copy uploaded beside the CSV; empty if conversion failed.
+    s3_parquet_name: str = ""
+    s3_parquet_url: str = ""
+    s3_parquet_sha256: str = ""
 
     # Step 3
     has_metadata: bool = False
@@ -249,4 +248,7 @@ class PublishDraft(BaseModel):
             file_name=self.s3_file_name,
             file_url=self.s3_file_url,
             file_sha256=self.s3_file_sha256,
+            parquet_file_name=self.s3_parquet_name,
+            parquet_file_url=self.s3_parquet_url,
+            parquet_file_sha256=self.s3_parquet_sha256,
         )
@@ -3,37 +3,51 @@
 Deliberately does not use `DataRepoEngine`: its `search_datasets` raises on zero
 results (fatal for live search) and its `get_dataset` ORs unset arguments into
 `IS NULL`, which can return an unrelated row.
+
+Listing pages, facets and dataset details are cached in-process (see
+`ResultCache`) and filed under the catalog generation they were read at, which
+`app.services.generation` bumps on every publish and delete.
 """
 
+import base64
+import json
 import logging
-from collections import Counter
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, TypeVar
 
+from sqlalchemy import Engine, tuple_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, col, func, or_, select
+from sqlmodel import Session, SQLModel, col, func, select
 
 from app.errors import RepositoryUnavailable
 from app.schemas import CreatorOut, DatasetDetail, DatasetSummary, Facet, Facets, Page
+from app.services.facets import KEYWORD, LICENSE, count_dataset, ensure_facet_counts, facet_counts, facet_size
+from app.services.generation import bump_generation, current_generation, forget_generation
 from app.services.licenses import license_label
+from app.services.search import apply_search, search_terms
 from app.settings import settings
 from pelican_data_loader.data import delete_from_s3, s3_object_name_from_url
-from pelican_data_loader.db import Dataset
+from pelican_data_loader.parquet import PARQUET_SUFFIX
+from pelican_data_loader.utils import CHUNK_HASHES_SUFFIX, split_keywords
+from pelican_data_loader.db import Dataset, Keyword, KeywordDatasetLink, backfill_keywords
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 SORT_OPTIONS = {
     "newest": "Newest first",
     "oldest": "Oldest first",
     "name": "Name A-Z",
+    # Best match first; without a search query, the same as "newest".
+    "relevance": "Best match",
 }
 
 
-def _split_keywords(raw: str | None) -> list[str]:
-    if not raw:
-        return []
-    return [part.strip() for part in raw.split(",") if part.strip()]
-
-
 def _to_summary(dataset: Dataset) -> DatasetSummary:
     return DatasetSummary(
         id=dataset.id or 0,
@@ -41,7 +55,7 @@ def _to_summary(dataset: Dataset) -> DatasetSummary:
         version=dataset.version,
         description=dataset.description,
         license=dataset.license,
-        keywords=_split_keywords(dataset.keywords),
+        keywords=split_keywords(dataset.keywords),
         published_date=dataset.published_date,
         creators=[CreatorOut(first_name=c.first_name, last_name=c.last_name, email=c.email) for c in dataset.creators],
     )
@@ -58,25 +72,128 @@ def _to_detail(dataset: Dataset) -> DatasetDetail:
     )
 
 
-def _filters(query: str, licenses: list[str], keywords: list[str]):
+def _filters(licenses: list[str], keywords: list[str]):
     clauses = []
-    if query:
-        like = f"%{query}%"
-        clauses.append(
-            or_(
-                col(Dataset.name).ilike(like),
-                col(Dataset.description).ilike(like),
-                col(Dataset.keywords).ilike(like),
-            )
-        )
     if licenses:
         clauses.append(col(Dataset.license).in_(licenses))
-    # AND across selected keywords: picking two narrows, it does not widen.
-    for keyword in keywords:
-        clauses.append(col(Dataset.keywords).ilike(f"%{keyword}%"))
+    if keywords:
+        # AND across selected keywords: picking two narrows, it does not widen.
+        # Each keyword's datasets are one range of the link table's keyword
+        # index; a dataset passes if it is in all of them.
+        wanted = list(dict.fromkeys(keywords))
+        tagged = (
+            select(KeywordDatasetLink.dataset_id)
+            .join(Keyword, col(Keyword.id) == KeywordDatasetLink.keyword_id)
+            .where(col(Keyword.name).in_(wanted))
+            .group_by(KeywordDatasetLink.dataset_id)
+            .having(func.count() == len(wanted))
+        )
+        clauses.append(col(Dataset.id).in_(tagged))
     return clauses
 
 
+# The sorts paged by keyset: the column each orders by, and whether ascending.
+# published_date is a zero-padded YYYY-MM-DD string column, so lexicographic
+# ordering is chronological. Every sort ends with the id, which makes each row's
+# key unique and so pagination stable when several datasets share a date or name.
+KEYSET_SORTS = {
+    "newest": (Dataset.published_date, False),
+    "oldest": (Dataset.published_date, True),
+    "name": (Dataset.name, True),
+}
+
+_MISSING = object()
+
+
+class ResultCache:
+    """A bounded, least-recently-used map of query results that expire after a while.
+
+    Results are filed under the catalog generation they were read at, and the
+    first lookup at a newer generation drops everything older, so a publish or
+    delete replaces what it changed rather than waiting for it to expire. The
+    expiry is for writes the app does not count, such as the library's own.
+    Values are shared between requests and must not be modified.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, generation: int, key: tuple) -> Any:
+        """The value stored for `key` at `generation`, or `_MISSING`."""
+        with self._lock:
+            if generation > self.generation:
+                self._entries.clear()
+                self.generation = generation
+            entry = self._entries.get((generation, *key))
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end((generation, *key))
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return _MISSING
+
+    def put(self, generation: int, key: tuple, value: Any) -> None:
+        with self._lock:
+            # A result read before the latest generation may already be out of date.
+            if generation < self.generation or self.max_entries <= 0:
+                return
+            self._entries[(generation, *key)] = (time.monotonic(), value)
+            self._entries.move_to_end((generation, *key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+            }
+
+
+_cache = ResultCache(settings.catalog_cache_entries, settings.catalog_cache_seconds)
+
+
+def catalog_cache_stats() -> dict[str, int]:
+    """Entries, hits and misses of the listing, facet and detail cache, and the generation it holds."""
+    return _cache.stats()
+
+
+def catalog_changed() -> None:
+    """Drop this process's cached results; called once a publish or delete is committed.
+
+    The generation the writer bumped does the same for every other worker.
+    """
+    forget_generation()
+    _cache.clear()
+
+
+def _cached(session: Session, key: tuple, load: Callable[[], T]) -> T:
+    """`load()`, or what it returned last time for `key` in the current catalog generation."""
+    generation = current_generation(session, settings.catalog_generation_poll_seconds)
+    value = _cache.get(generation, key)
+    if value is _MISSING:
+        value = load()
+        _cache.put(generation, key, value)
+    return value
+
+
+def _normalized_query(query: str) -> str:
+    """`query` with runs of whitespace collapsed, which neither kind of search tells apart."""
+    return " ".join(query.split())
+
+
 def list_datasets(
     session: Session,
     query: str = "",
@@ -85,92 +202,240 @@ def list_datasets(
     sort: str = "newest",
     page: int = 1,
     page_size: int | None = None,
+    after: str = "",
+    before: str = "",
+    with_total: bool = True,
 ) -> Page[DatasetSummary]:
-    """One page of datasets matching the filters, newest first by default."""
-    page_size = page_size or settings.page_size
-    page = max(1, page)
-    clauses = _filters(query, licenses or [], keywords or [])
+    """One page of datasets matching the filters, newest first by default.
 
-    # published_date is a zero-padded YYYY-MM-DD string column, so lexicographic
-    # ordering is chronological. The id tiebreaker keeps pagination stable when
-    # several datasets share a publication date.
-    ordering = {
-        "name": (col(Dataset.name).asc(), col(Dataset.id).asc()),
-        "oldest": (col(Dataset.published_date).asc(), col(Dataset.id).asc()),
-    }.get(sort, (col(Dataset.published_date).desc(), col(Dataset.id).desc()))
+    `query` is a full-text search (see `app.services.search`); sorting by
+    "relevance" ranks its matches, and breaks ties newest first.
 
+    Pages are reached by keyset: `after` (or `before`) is the `next_cursor`
+    (or `prev_cursor`) of the page beside the wanted one, and the query seeks to
+    it through an index, so the thousandth page costs what the first does.
+    `page` only numbers the page for display. Ranked search results, and links
+    with a page number but no cursor, are paged by offset instead.
+
+    The total is optional. On Postgres, a result set the planner puts above
+    APP_EXACT_COUNT_LIMIT rows is not counted but estimated. Pages and totals
+    are cached by their normalized filters until the catalog changes (see
+    `ResultCache`).
+    """
+    page_size = page_size or settings.page_size
+    page = max(1, page)
+    query = _normalized_query(query)
+    licenses, keywords = sorted(set(licenses or [])), sorted(set(keywords or []))
+    ranked = sort == "relevance" and bool(search_terms(query))
+    keyed_sort = sort if sort in KEYSET_SORTS else "newest"
+
+    key = (
+        "list",
+        query.lower(),
+        tuple(licenses),
+        tuple(keywords),
+        "relevance" if ranked else keyed_sort,
+        page,
+        page_size,
+        after,
+        before,
+        with_total,
+    )
     try:
-        total = session.exec(select(func.count()).select_from(Dataset).where(*clauses)).one()
-        rows = session.exec(
-            select(Dataset)
-            # Eager-load creators: the cards show author names, and without this
-            # a grid of N datasets costs N+1 queries.
-            .options(selectinload(Dataset.creators))  # type: ignore[arg-type]
-            .where(*clauses)
-            .order_by(*ordering)
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        ).all()
+        return _cached(
+            session,
+            key,
+            lambda: _list_datasets(
+                session, query, licenses, keywords, ranked, keyed_sort, page, page_size, after, before, with_total
+            ),
+        )
     except SQLAlchemyError as exc:
         logger.warning("Dataset listing failed: %s", exc)
         raise RepositoryUnavailable(str(exc)) from exc
 
+
+def _list_datasets(
+    session: Session,
+    query: str,
+    licenses: list[str],
+    keywords: list[str],
+    ranked: bool,
+    keyed_sort: str,
+    page: int,
+    page_size: int,
+    after: str,
+    before: str,
+    with_total: bool,
+) -> Page[DatasetSummary]:
+    clauses = _filters(licenses, keywords)
+    column, ascending = KEYSET_SORTS[keyed_sort]
+    cursor = None if ranked else _decode_cursor(before or after, keyed_sort)
+    backward = cursor is not None and bool(before)
+    # The direction the query walks the sort in: reversed to fetch the page before a cursor.
+    walk_ascending = ascending != backward
+    if walk_ascending:
+        ordering = (col(column).asc(), col(Dataset.id).asc())
+    else:
+        ordering = (col(column).desc(), col(Dataset.id).desc())
+
+    statement = apply_search(
+        select(Dataset)
+        # Eager-load creators: the cards show author names, and without this
+        # a grid of N datasets costs N+1 queries.
+        .options(selectinload(Dataset.creators))  # type: ignore[arg-type]
+        .where(*clauses),
+        session,
+        query,
+        rank=ranked,
+    )
+    if cursor is not None:
+        key = tuple_(col(column), col(Dataset.id))
+        statement = statement.where(key > tuple_(*cursor) if walk_ascending else key < tuple_(*cursor))
+    elif page > 1:
+        statement = statement.offset((page - 1) * page_size)
+
+    # One row more than a page says whether there is another beyond it, without counting.
+    rows = list(session.exec(statement.order_by(*ordering).limit(page_size + 1)).all())
+    total, estimated = _total(session, query, licenses, keywords, clauses) if with_total else (None, False)
+
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+        has_prev, has_next = more, True
+        if not more:
+            # Reached the start, whatever page number the link carried.
+            page = 1
+    else:
+        has_prev, has_next = cursor is not None or page > 1, more
+
     return Page[DatasetSummary](
         items=[_to_summary(row) for row in rows],
-        total=int(total),
+        total=total,
+        total_is_estimate=estimated,
         page=page,
         page_size=page_size,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_cursor=_encode_cursor(keyed_sort, rows[0]) if has_prev and rows and not ranked else None,
+        next_cursor=_encode_cursor(keyed_sort, rows[-1]) if has_next and rows and not ranked else None,
     )
 
 
+def _total(session: Session, query: str, licenses: list[str], keywords: list[str], clauses) -> tuple[int, bool]:
+    """The number of datasets matching the filters, and whether it is an estimate.
+
+    Cached on its own as well as with each page, since every page of a result
+    set shows the same total.
+    """
+    key = ("total", query.lower(), tuple(licenses), tuple(keywords))
+    return _cached(session, key, lambda: _count(session, query, clauses))
+
+
+def _count(session: Session, query: str, clauses) -> tuple[int, bool]:
+    total, estimated = None, False
+    if session.get_bind().dialect.name == "postgresql":
+        estimate = _planner_estimate(session, apply_search(select(Dataset.id).where(*clauses), session, query))
+        if estimate > settings.exact_count_limit:
+            total, estimated = estimate, True
+    if total is None:
+        counted = apply_search(select(func.count()).select_from(Dataset).where(*clauses), session, query)
+        total = int(session.exec(counted).one())
+    return total, estimated
+
+
+def _planner_estimate(session: Session, statement) -> int:
+    """The rows Postgres's planner expects `statement` to return, from its statistics, without running it."""
+    compiled = statement.compile(dialect=session.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _encode_cursor(sort: str, dataset: Dataset) -> str:
+    """An opaque token for `dataset`'s place in `sort`."""
+    column, _ = KEYSET_SORTS[sort]
+    raw = json.dumps([sort, getattr(dataset, column.key), dataset.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple[str, int] | None:
+    """The (sort key, id) in `cursor`, or None if there is none or it was made for another sort.
+
+    A cursor arrives in a URL anyone can edit; one that does not parse is
+    treated as no cursor, which shows the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        made_for, key, dataset_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if made_for != sort or not isinstance(key, str) or not isinstance(dataset_id, int):
+        return None
+    return key, dataset_id
+
+
+def ensure_listing_indexes(engine: Engine) -> None:
+    """Create the listing's sort indexes on a database made before they were declared.
+
+    `create_all` only creates the indexes of tables it creates.
+    """
+    with engine.begin() as conn:
+        for index in Dataset.__table__.indexes:  # type: ignore[attr-defined]
+            index.create(conn, checkfirst=True)
+
+
+def ensure_keyword_links(engine: Engine) -> None:
+    """Create the Keyword tables on a database made before them, and link the datasets not yet linked."""
+    tables = [Keyword.__table__, KeywordDatasetLink.__table__]  # type: ignore[attr-defined]
+    SQLModel.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        backfill_keywords(session)
+
+
 def get_facets(session: Session) -> Facets:
     """License and keyword counts over the whole table.
 
     Unfiltered on purpose, so a user can always widen a selection rather than
-    watching the options they might want disappear. Counted in Python because the
-    row count is tiny and it stays portable to SQLite for local development; past
-    ~10k rows this becomes
-    `SELECT trim(kw), count(*) FROM dataset, unnest(string_to_array(keywords, ',')) kw GROUP BY 1`.
+    watching the options they might want disappear. Read from the counts
+    `app.services.facets` keeps, so this costs the number of licenses and
+    keywords shown, however many datasets there are.
     """
     try:
-        rows = session.exec(select(Dataset.license, Dataset.keywords)).all()
+        ensure_facet_counts(session.get_bind())
+        return _cached(session, ("facets",), lambda: _facets(session))
     except SQLAlchemyError as exc:
         logger.warning("Facet query failed: %s", exc)
         raise RepositoryUnavailable(str(exc)) from exc
 
-    license_counts: Counter[str] = Counter()
-    keyword_counts: Counter[str] = Counter()
-    for license_url, keywords in rows:
-        if license_url:
-            license_counts[license_url] += 1
-        for keyword in _split_keywords(keywords):
-            keyword_counts[keyword] += 1
-
-    licenses = [
-        Facet(value=value, count=count, label=license_label(value))
-        for value, count in sorted(license_counts.items(), key=lambda kv: (-kv[1], kv[0]))
-    ]
-    ranked_keywords = sorted(keyword_counts.items(), key=lambda kv: (-kv[1], kv[0]))
-    top_keywords = ranked_keywords[: settings.max_facet_keywords]
 
+def _facets(session: Session) -> Facets:
+    license_counts = facet_counts(session, LICENSE)
+    top_keywords = facet_counts(session, KEYWORD, limit=settings.max_facet_keywords)
+    keyword_total = facet_size(session, KEYWORD)
     return Facets(
-        licenses=licenses,
+        licenses=[Facet(value=value, count=count, label=license_label(value)) for value, count in license_counts],
         keywords=[Facet(value=value, count=count) for value, count in top_keywords],
-        keywords_truncated=max(0, len(ranked_keywords) - len(top_keywords)),
+        keywords_truncated=max(0, keyword_total - len(top_keywords)),
     )
 
 
 def get_dataset_detail(session: Session, dataset_id: int) -> DatasetDetail | None:
     try:
-        dataset = session.exec(
-            select(Dataset)
-            .options(selectinload(Dataset.creators))  # type: ignore[arg-type]
-            .where(Dataset.id == dataset_id)
-        ).first()
+        return _cached(session, ("detail", dataset_id), lambda: _dataset_detail(session, dataset_id))
     except SQLAlchemyError as exc:
         logger.warning("Dataset lookup failed: %s", exc)
         raise RepositoryUnavailable(str(exc)) from exc
 
+
+def _dataset_detail(session: Session, dataset_id: int) -> DatasetDetail | None:
+    dataset = session.exec(
+        select(Dataset)
+        .options(selectinload(Dataset.creators))  # type: ignore[arg-type]
+        .where(Dataset.id == dataset_id)
+    ).first()
     return _to_detail(dataset) if dataset else None
 
 
@@ -191,10 +456,18 @@ def delete_dataset(session: Session, dataset_id: int) -> tuple[str, list[str]]:
     name = dataset.name
     warnings: list[str] = []
 
-    for label, url in (
-        ("data file", dataset.primary_source_url),
-        ("metadata file", dataset.croissant_jsonld_url or ""),
-    ):
+    targets = [("data file", dataset.primary_source_url), ("metadata file", dataset.croissant_jsonld_url or "")]
+    if dataset.primary_source_url.endswith(".csv"):
+        # The Parquet copy publishing makes sits beside the CSV. Datasets published
+        # before it existed have none, and removing a missing object is a no-op.
+        targets.insert(1, ("Parquet copy", dataset.primary_source_url.removesuffix(".csv") + PARQUET_SUFFIX))
+    # Chunk hashes sit beside each file if it was published with APP_PUBLISH_CHUNK_HASHES.
+    targets += [
+        (f"chunk hashes of the {label}", url + CHUNK_HASHES_SUFFIX)
+        for label, url in targets
+        if label != "metadata file" and s3_object_name_from_url(url)
+    ]
+    for label, url in targets:
         object_name = s3_object_name_from_url(url)
         if object_name is None:
             warnings.append(f"Skipped the {label}: {url or 'no URL recorded'} is not in the configured S3 bucket.")
@@ -209,11 +482,14 @@ def delete_dataset(session: Session, dataset_id: int) -> tuple[str, list[str]]:
             warnings.append(f"Could not delete the {label} ({object_name}) from S3: {exc}")
 
     try:
+        count_dataset(session, dataset, -1)
+        bump_generation(session)
         session.delete(dataset)
         session.commit()
     except SQLAlchemyError as exc:
         session.rollback()
         logger.warning("Dataset delete failed: %s", exc)
         raise RepositoryUnavailable(str(exc)) from exc
+    catalog_changed()
 
     return name, warnings
@@ -5,12 +5,14 @@ DataFrame, so the draft lives on the server: the browser holds only an opaque id
 in a signed cookie, and everything else is a directory on disk.
 
     {draft_dir}/{draft_id}/draft.json      the PublishDraft model
-                          /data.csv        the sanitized CSV
+                          /data.csv        the uploaded CSV, header sanitized
+                          /schema.json     its column dtypes, inferred on upload
                           /metadata.json   the generated Croissant document
 
 data.csv is the durable artifact rather than a temp file because it is
 simultaneously what gets uploaded to S3, what gets hashed, and what the metadata
-generator reads — keeping one copy means those three can never disagree.
+generator reads — keeping one copy means those three can never disagree. It is
+hashed as it is received and never modified afterwards, so that checksum holds.
 """
 
 import logging
@@ -24,6 +26,7 @@ from pathlib import Path
 
 from app.schemas import PublishDraft, UploadState
 from app.settings import settings
+from pelican_data_loader.data import abort_multipart_upload
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +70,12 @@ class DraftStore:
     def csv_path(self, draft_id: str) -> Path:
         return self._dir(draft_id) / "data.csv"
 
+    def schema_path(self, draft_id: str) -> Path:
+        return self._dir(draft_id) / "schema.json"
+
+    def parquet_path(self, draft_id: str) -> Path:
+        return self._dir(draft_id) / "data.parquet"
+
     def metadata_path(self, draft_id: str) -> Path:
         return self._dir(draft_id) / "metadata.json"
 
@@ -130,11 +139,28 @@ class DraftStore:
             return draft
 
     def discard(self, draft_id: str) -> None:
+        draft = self.load_optional(draft_id)
+        if draft is not None:
+            self.abort_pending_upload(draft)
         try:
             shutil.rmtree(self._dir(draft_id), ignore_errors=True)
         except DraftNotFound:
             return
 
+    def abort_pending_upload(self, draft: PublishDraft) -> None:
+        """Abort the draft's unfinished multipart upload, if it has one.
+
+        S3 keeps the parts of an upload that is never completed or aborted, so a
+        draft that is replaced, discarded, or swept must not just forget it.
+        """
+        state = draft.s3_multipart
+        if state is None:
+            return
+        draft.s3_multipart = None
+        if settings.fake_s3:
+            return
+        abort_multipart_upload(state)
+
     # -- maintenance ------------------------------------------------------- #
 
     def _mark_stale_upload(self, draft: PublishDraft) -> PublishDraft:
@@ -169,7 +195,7 @@ class DraftStore:
         return count
 
     def sweep(self) -> tuple[int, int]:
-        """Delete drafts untouched for longer than the TTL.
+        """Delete drafts untouched for longer than the TTL, aborting their open uploads.
 
         Returns (drafts removed, bytes remaining) so the caller can log growth.
         """
@@ -180,6 +206,10 @@ class DraftStore:
         for path in self._iter_draft_json():
             mtime = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
             if mtime < cutoff:
+                try:
+                    self.abort_pending_upload(PublishDraft.model_validate_json(path.read_text()))
+                except Exception:  # noqa: BLE001 - never let one draft stop the sweep
+                    logger.exception("Could not abort the pending upload of %s", path.parent.name)
                 shutil.rmtree(path.parent, ignore_errors=True)
                 removed += 1
             else:
@@ -0,0 +1,142 @@
+"""License and keyword counts for the Discover facets, kept in a summary table.
+
+Counting them meant reading the license and keywords of every dataset on every
+listing request. Instead `facet_count` holds one row per license and keyword
+with the number of datasets that have it, adjusted by `publish_draft` and
+`delete_dataset` in the same transaction as the row they insert or delete, so
+reading the facets costs the number of distinct values, not of datasets.
+
+Datasets written some other way, through the library or by hand, are not
+counted until `rebuild_facet_counts` recounts the whole table; run
+`scripts/rebuild_facets.py` after doing that. The app also counts them when it
+first reads a database whose table is missing or empty (see
+`ensure_facet_counts`), so an existing catalog starts out counted, including
+one that was down or not yet created when the app started.
+"""
+
+import logging
+import threading
+
+from sqlalchemy import Engine, text
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Session, SQLModel, col, delete, func, select
+
+from pelican_data_loader.db import Dataset, Keyword, KeywordDatasetLink
+from pelican_data_loader.utils import split_keywords
+
+logger = logging.getLogger(__name__)
+
+LICENSE = "license"
+KEYWORD = "keyword"
+
+# The databases (by URL) whose counts have been checked this process.
+_counted: set[str] = set()
+_counted_lock = threading.Lock()
+
+
+class FacetCount(SQLModel, table=True):
+    """How many datasets have a license or keyword."""
+
+    __tablename__ = "facet_count"  # type: ignore[assignment]
+
+    facet: str = Field(primary_key=True)  # LICENSE or KEYWORD
+    value: str = Field(primary_key=True)
+    count: int = 0
+
+
+def facet_values(license_url: str | None, keywords: str | None) -> list[tuple[str, str]]:
+    """The (facet, value) pairs a dataset with this license and these keywords counts towards."""
+    pairs = [(LICENSE, license_url)] if license_url else []
+    return pairs + [(KEYWORD, keyword) for keyword in split_keywords(keywords)]
+
+
+def count_dataset(session: Session, dataset: Dataset, delta: int) -> None:
+    """Add `delta` (1 on publish, -1 on delete) to the counts of `dataset`'s license and keywords.
+
+    Uncommitted, so the caller commits it with the dataset itself. An upsert,
+    so two datasets published at once with a new keyword both count.
+    """
+    pairs = facet_values(dataset.license, dataset.keywords)
+    if not pairs:
+        return
+    insert = postgres_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(FacetCount).values([{"facet": facet, "value": value, "count": delta} for facet, value in pairs])
+    statement = statement.on_conflict_do_update(
+        index_elements=["facet", "value"], set_={"count": FacetCount.count + statement.excluded.count}
+    )
+    session.exec(statement)  # type: ignore[call-overload]
+    if delta < 0:
+        session.exec(delete(FacetCount).where(col(FacetCount.count) <= 0))  # type: ignore[call-overload]
+
+
+def facet_counts(session: Session, facet: str, limit: int | None = None) -> list[tuple[str, int]]:
+    """(value, count) for `facet`, most datasets first, then alphabetical."""
+    statement = (
+        select(FacetCount.value, FacetCount.count)
+        .where(FacetCount.facet == facet)
+        .order_by(col(FacetCount.count).desc(), col(FacetCount.value).asc())
+        .limit(limit)
+    )
+    return [(value, count) for value, count in session.exec(statement).all()]
+
+
+def facet_size(session: Session, facet: str) -> int:
+    """How many distinct values `facet` has."""
+    return session.exec(select(func.count()).select_from(FacetCount).where(FacetCount.facet == facet)).one()
+
+
+def rebuild_facet_counts(session: Session) -> int:
+    """Recount every facet from the dataset table, replacing what is stored; returns the datasets counted.
+
+    Keywords are counted from their link table, so datasets not yet linked
+    (see `pelican_data_loader.db.backfill_keywords`) are not among them.
+    Commits. On Postgres, publishes and
+    deletes wait for it: one that commits before the lock is counted by the
+    recount, and one that commits after adds to the new counts.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.exec(text("LOCK TABLE facet_count IN SHARE ROW EXCLUSIVE MODE"))  # type: ignore[call-overload]
+    datasets = session.exec(select(func.count()).select_from(Dataset)).one()
+    licenses = session.exec(
+        select(Dataset.license, func.count()).where(Dataset.license != "").group_by(Dataset.license)
+    ).all()
+    keywords = session.exec(
+        select(Keyword.name, func.count())
+        .join(KeywordDatasetLink, col(KeywordDatasetLink.keyword_id) == Keyword.id)
+        .group_by(Keyword.name)
+    ).all()
+    session.exec(delete(FacetCount))  # type: ignore[call-overload]
+    session.add_all(FacetCount(facet=LICENSE, value=value, count=count) for value, count in licenses)
+    session.add_all(FacetCount(facet=KEYWORD, value=value, count=count) for value, count in keywords)
+    session.commit()
+    logger.info("Recounted facets over %d datasets: %d values", datasets, len(licenses) + len(keywords))
+    return datasets
+
+
+def ensure_facet_counts(engine: Engine) -> None:
+    """Create `facet_count` if it is missing, and fill it if it is empty but there are datasets to count.
+
+    Checked once per process and database; an error propagates and the next
+    call tries again. Not only when the table is missing: SQLite commits the
+    `CREATE TABLE` on its own, so a recount that failed after it leaves an
+    empty table behind. A catalog with no license or keyword anywhere is
+    recounted once per process, which finds nothing.
+    """
+    key = engine.url.render_as_string(hide_password=True)
+    if key in _counted:
+        return
+    with _counted_lock:
+        if key not in _counted:
+            _count_if_empty(engine)
+            _counted.add(key)
+
+
+def _count_if_empty(engine: Engine) -> None:
+    with Session(engine) as session:
+        FacetCount.__table__.create(session.connection(), checkfirst=True)  # type: ignore[attr-defined]
+        if session.exec(select(FacetCount.facet).limit(1)).first() is not None:
+            return
+        if session.exec(select(Dataset.id).limit(1)).first() is None:
+            return
+        rebuild_facet_counts(session)
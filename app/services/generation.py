@@ -0,0 +1,112 @@
+"""A counter in the database that goes up whenever the app changes the catalog.
+
+The Discover listing, facets and detail pages are cached per process (see
+`app.services.datasets`), and a cache in one worker cannot see a publish made
+by another. So `publish_draft` and `delete_dataset` bump the one row of
+`catalog_generation` in the same transaction as the dataset they write, and
+every cached result is filed under the generation it was read at: once a
+worker reads a newer generation, nothing cached before it is used again.
+
+Reading the generation is a primary-key lookup, and a worker reuses what it
+read for APP_CATALOG_GENERATION_POLL_SECONDS, so a change made by another
+worker can take that long to show. The worker that made it rereads at once.
+
+The table is created the first time it is needed, so a database that was down
+or empty when the app started gets it once it is back. Until the first bump a
+missing row reads as generation 0.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Session, SQLModel, select
+
+logger = logging.getLogger(__name__)
+
+# The id of the table's only row.
+_ROW_ID = 1
+
+
+class CatalogGeneration(SQLModel, table=True):
+    """How many times the app has published or deleted a dataset."""
+
+    __tablename__ = "catalog_generation"  # type: ignore[assignment]
+
+    id: int = Field(default=_ROW_ID, primary_key=True)
+    generation: int = 0
+
+
+# The generation this process last read: (read at, generation).
+_last_read: tuple[float, int] | None = None
+_last_read_lock = threading.Lock()
+
+# The databases (by URL) known to have the table.
+_table_ready: set[str] = set()
+_table_lock = threading.Lock()
+
+
+def current_generation(session: Session, max_age: float) -> int:
+    """The catalog generation, as read from the database at most `max_age` seconds ago."""
+    global _last_read
+    with _last_read_lock:
+        last_read = _last_read
+    if last_read is not None and time.monotonic() - last_read[0] < max_age:
+        return last_read[1]
+
+    ensure_catalog_generation(session.get_bind())
+    generation = session.exec(select(CatalogGeneration.generation).where(CatalogGeneration.id == _ROW_ID)).first()
+    # A database without the row has had no writes the app counted.
+    last_read = (time.monotonic(), generation or 0)
+    with _last_read_lock:
+        _last_read = last_read
+    return last_read[1]
+
+
+def bump_generation(session: Session) -> None:
+    """Count a change to the catalog. Uncommitted, so the caller commits it with the change itself.
+
+    Call `forget_generation` once it is committed. An upsert, so it counts on
+    a database whose row is missing too.
+    """
+    connection = session.connection()
+    if connection.engine.url.render_as_string(hide_password=True) not in _table_ready:
+        # In the caller's transaction: a second connection would wait on the
+        # write lock this one may already hold on SQLite.
+        _create_table(connection)
+    insert = postgres_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(CatalogGeneration).values(id=_ROW_ID, generation=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=["id"], set_={"generation": CatalogGeneration.generation + 1}
+    )
+    session.exec(statement)  # type: ignore[call-overload]
+
+
+def forget_generation() -> None:
+    """Make the next `current_generation` read the database, to see this process's own bump."""
+    global _last_read
+    with _last_read_lock:
+        _last_read = None
+
+
+def ensure_catalog_generation(engine: Engine) -> None:
+    """Create `catalog_generation` if it is missing.
+
+    Checked once per process and database; an error propagates and the next
+    call tries again.
+    """
+    key = engine.url.render_as_string(hide_password=True)
+    if key in _table_ready:
+        return
+    with _table_lock:
+        if key not in _table_ready:
+            with engine.begin() as connection:
+                _create_table(connection)
+            _table_ready.add(key)
+
+
+def _create_table(connection: Connection) -> None:
+    CatalogGeneration.__table__.create(connection, checkfirst=True)  # type: ignore[attr-defined]
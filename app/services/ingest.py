@@ -8,27 +8,44 @@ import, and paying that at startup means the first user request is not the one
 that waits, and the build-time smoke test exercises it.
 """
 
+import csv
+import hashlib
+import io
 import json
 import logging
 import time
 from pathlib import Path
+from typing import BinaryIO
 
 import pandas as pd
 from sqlmodel import Session
 
 from app.schemas import ColumnInfo, PublishDraft, UploadState
+from app.services.datasets import catalog_changed
 from app.services.drafts import DraftStore
+from app.services.facets import count_dataset
+from app.services.generation import bump_generation
 from app.settings import settings
 from pelican_data_loader.config import SYSTEM_CONFIG
-from pelican_data_loader.croissant import build_croissant_metadata, validate_croissant
+from pelican_data_loader.croissant import (
+    SCHEMA_CHUNK_ROWS,
+    TabularSchema,
+    build_croissant_metadata,
+    infer_schema,
+    validate_croissant,
+)
 from pelican_data_loader.data import upload_to_s3
 from pelican_data_loader.db import Dataset
-from pelican_data_loader.utils import get_sha256, sanitize_name
+from pelican_data_loader.parquet import PARQUET_SUFFIX, write_parquet
+from pelican_data_loader.utils import CHUNK_HASHES_SUFFIX, get_sha256, hash_file, sanitize_name
 
 logger = logging.getLogger(__name__)
 
 PREVIEW_ROWS = 10
 CHUNK_SIZE = 1024 * 1024
+# The longest header record accepted. It is held in memory until it ends, so an
+# upload whose header opens a quote and never closes it must not be read whole.
+MAX_HEADER_BYTES = 4 * 1024 * 1024
 
 
 class UploadTooLarge(Exception):
@@ -44,53 +61,195 @@ class CsvError(Exception):
 # --------------------------------------------------------------------------- #
 
 
+class _IngestReader:
+    """File-like view of the request body that pandas parses as it arrives.
+
+    Every byte handed to the parser is also hashed, counted, and written to disk,
+    so receiving, checksumming, and profiling the upload is a single pass. The
+    header record is held back until it is complete: if `sanitize_name` changes
+    any column name, only that line is rewritten and the rest is copied verbatim.
+    """
+
+    def __init__(self, stream, out: BinaryIO, limit: int):
+        self.stream = stream
+        self.out = out
+        self.limit = limit
+        self.received = 0
+        self.written = 0
+        self.sha256 = hashlib.sha256()
+        self.header_done = False
+        self.header_rewritten = False
+        self.pending = b""
+        self.eof = False
+        # How far into `pending` the search for the header's end has got, and
+        # whether it stopped inside quotes, so each byte is scanned once.
+        self.header_scanned = 0
+        self.header_in_quotes = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or len(self.pending) < size or not self.header_done):
+            chunk = self.stream.read(CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                break
+            self.received += len(chunk)
+            if self.received > self.limit:
+                raise UploadTooLarge(f"The file is larger than {settings.max_upload_mb} MB.")
+            self._accept(chunk)
+        if not self.header_done and self.eof:
+            self._emit_header(len(self.pending))
+
+        if size < 0 or size >= len(self.pending):
+            data, self.pending = self.pending, b""
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def _accept(self, chunk: bytes) -> None:
+        if self.header_done:
+            self._emit(chunk)
+            return
+        self.pending += chunk
+        end, self.header_in_quotes = _header_end(self.pending, self.header_scanned, self.header_in_quotes)
+        self.header_scanned = len(self.pending)
+        if (end or len(self.pending)) > MAX_HEADER_BYTES:
+            limit_mb = MAX_HEADER_BYTES // (1024 * 1024)
+            raise CsvError(f"The header row is longer than {limit_mb} MB; is a quote left unclosed?")
+        if end is not None:
+            self._emit_header(end)
+
+    def _emit_header(self, end: int) -> None:
+        """Write the header record (sanitized if needed) and everything after it."""
+        raw, rest = self.pending[:end], self.pending[end:]
+        self.pending = b""
+        self.header_done = True
+
+        body = raw.rstrip(b"\r\n")
+        terminator = raw[len(body) :]
+        try:
+            names = next(csv.reader([body.decode("utf-8-sig")]), [])
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise CsvError(f"Could not read the header row: {exc}") from exc
+
+        sanitized = sanitize_header(names)
+        if sanitized != names:
+            line = io.StringIO()
+            csv.writer(line, lineterminator="").writerow(sanitized)
+            raw = line.getvalue().encode() + terminator
+            self.header_rewritten = True
+
+        self._emit(raw)
+        self._emit(rest)
+
+    def _emit(self, data: bytes) -> None:
+        if not data:
+            return
+        self.out.write(data)
+        self.sha256.update(data)
+        self.written += len(data)
+        self.pending += data
+
+
+def _header_end(buffer: bytes, start: int = 0, in_quotes: bool = False) -> tuple[int | None, bool]:
+    """Offset just past the first record terminator outside quotes, if any, and whether the scan ended in quotes.
+
+    Scans from `start`, which the previous scan of the same buffer reached with
+    `in_quotes`. An escaped "" toggles twice, which is a no-op, and the LF
+    looked for also ends a CRLF pair.
+    """
+    index = start
+    newline = -1
+    while True:
+        if in_quotes:
+            close = buffer.find(b'"', index)
+            if close < 0:
+                return None, True
+            in_quotes, index = False, close + 1
+            continue
+        if newline < index:
+            newline = buffer.find(b"\n", index)
+        quote = buffer.find(b'"', index, newline if newline >= 0 else len(buffer))
+        if quote < 0:
+            return (newline + 1, False) if newline >= 0 else (None, False)
+        in_quotes, index = True, quote + 1
+
+
+def sanitize_header(names: list[str]) -> list[str]:
+    """The column names data.csv is stored with.
+
+    Mirrors what a pandas read followed by `sanitize_name` produced: blank names
+    become `Unnamed: <i>` and duplicates get a `.1`, `.2` suffix before sanitizing,
+    so Croissant field ids stay unique.
+    """
+    seen: set[str] = set()
+    result = []
+    for index, name in enumerate(names):
+        name = name or f"Unnamed: {index}"
+        candidate, suffix = name, 0
+        while candidate in seen:
+            suffix += 1
+            candidate = f"{name}.{suffix}"
+        seen.add(candidate)
+        result.append(sanitize_name(candidate))
+    return result
+
+
 def save_uploaded_csv(store: DraftStore, draft: PublishDraft, file_name: str, stream) -> PublishDraft:
-    """Stream an upload to disk, parse it, and record shape/preview/column info.
+    """Stream an upload to disk, profiling and hashing it on the way through.
 
-    The file is streamed in chunks and never held in memory: a multi-hundred-MB
-    CSV read whole would take the container down.
+    One pass over the request body: pandas parses the bytes in row chunks as they
+    arrive, while the same bytes are written to data.csv and fed to SHA-256. The
+    file is never held in memory, and never re-read or rewritten afterwards.
     """
     temp_path = store.upload_temp_path(draft.id)
     temp_path.parent.mkdir(parents=True, exist_ok=True)
 
-    written = 0
     try:
         with temp_path.open("wb") as out:
-            while chunk := stream.read(CHUNK_SIZE):
-                written += len(chunk)
-                if written > settings.max_upload_bytes:
-                    raise UploadTooLarge(f"The file is larger than {settings.max_upload_mb} MB.")
-                out.write(chunk)
-
-        try:
-            frame = pd.read_csv(temp_path)
-        except Exception as exc:  # noqa: BLE001 - pandas raises a wide variety here
-            raise CsvError(str(exc)) from exc
-
-        if frame.empty and not len(frame.columns):
+            reader = _IngestReader(stream, out, settings.max_upload_bytes)
+            try:
+                profile = _profile_csv(reader)
+            except UploadTooLarge:
+                raise
+            except pd.errors.EmptyDataError as exc:
+                raise CsvError("The file contains no columns.") from exc
+            except Exception as exc:  # noqa: BLE001 - pandas raises a wide variety here
+                raise CsvError(str(exc)) from exc
+            # The parser stops at the last record; anything after it still counts.
+            while reader.read(CHUNK_SIZE):
+                pass
+
+        if not profile.columns:
             raise CsvError("The file contains no columns.")
 
-        # Column names become Croissant field ids, which must be valid identifiers.
-        frame.columns = [sanitize_name(str(col)) for col in frame.columns]
+        # Written under temp names and moved into place only once it parsed, so a
+        # failed re-upload cannot clobber the CSV the draft already had. The old
+        # schema goes before the new CSV arrives: should anything fail in between,
+        # `load_schema` infers it again from the CSV rather than returning a stale one.
+        schema_tmp = _stage_schema(store, draft.id, profile.schema)
+        store.schema_path(draft.id).unlink(missing_ok=True)
+        temp_path.replace(store.csv_path(draft.id))
+        schema_tmp.replace(store.schema_path(draft.id))
+        store.abort_pending_upload(draft)
+        if reader.header_rewritten:
+            logger.info("Sanitized column names for draft %s", draft.id)
 
-        csv_path = store.csv_path(draft.id)
-        frame.to_csv(csv_path, index=False)
-
-        preview = frame.head(PREVIEW_ROWS)
         draft.source_file_name = Path(file_name).name
-        draft.row_count = int(frame.shape[0])
-        draft.column_count = int(frame.shape[1])
+        draft.row_count = profile.rows
+        draft.column_count = len(profile.columns)
         draft.columns = [
             ColumnInfo(
-                name=str(name),
-                dtype=str(frame[name].dtype),
-                non_null=int(frame[name].count()),
-                null_count=int(frame[name].isnull().sum()),
+                name=column.name,
+                dtype=column.dtype,
+                non_null=profile.rows - profile.null_counts[column.name],
+                null_count=profile.null_counts[column.name],
             )
-            for name in frame.columns
+            for column in profile.schema.columns
         ]
-        draft.preview_columns = [str(c) for c in preview.columns]
-        draft.preview_rows = [["" if pd.isna(v) else str(v) for v in row] for row in preview.itertuples(index=False)]
+        draft.csv_sha256 = reader.sha256.hexdigest()
+        draft.csv_bytes = reader.written
+        draft.preview_columns = profile.columns
+        draft.preview_rows = profile.preview
 
         # Replacing the data invalidates everything downstream of it.
         draft.upload_state = UploadState.IDLE
@@ -100,6 +259,10 @@ def save_uploaded_csv(store: DraftStore, draft: PublishDraft, file_name: str, st
         draft.s3_file_name = ""
         draft.s3_file_url = ""
         draft.s3_file_sha256 = ""
+        draft.s3_parquet_name = ""
+        draft.s3_parquet_url = ""
+        draft.s3_parquet_sha256 = ""
+        store.parquet_path(draft.id).unlink(missing_ok=True)
         draft.pelican_uri = ""
         draft.pelican_http_url = ""
         draft.has_metadata = False
@@ -108,12 +271,43 @@ def save_uploaded_csv(store: DraftStore, draft: PublishDraft, file_name: str, st
         draft.validation_warnings = []
         draft.generate_error = ""
 
-        del frame
         return store.save(draft)
     finally:
         temp_path.unlink(missing_ok=True)
 
 
+class _CsvProfile:
+    """Shape, null counts, dtypes, and preview, accumulated one chunk at a time."""
+
+    def __init__(self) -> None:
+        self.columns: list[str] = []
+        self.rows = 0
+        self.null_counts: dict[str, int] = {}
+        self.schema = TabularSchema()
+        self.preview: list[list[str]] = []
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        if not self.columns:
+            self.columns = [str(c) for c in chunk.columns]
+            self.null_counts = dict.fromkeys(self.columns, 0)
+        self.rows += len(chunk)
+        for name, nulls in chunk.isnull().sum().items():
+            self.null_counts[str(name)] += int(nulls)
+        self.schema.update(chunk)
+        if len(self.preview) < PREVIEW_ROWS:
+            head = chunk.head(PREVIEW_ROWS - len(self.preview))
+            self.preview += [["" if pd.isna(v) else str(v) for v in row] for row in head.itertuples(index=False)]
+
+
+def _profile_csv(reader: _IngestReader) -> _CsvProfile:
+    profile = _CsvProfile()
+    with pd.read_csv(reader, chunksize=SCHEMA_CHUNK_ROWS) as chunks:  # type: ignore[call-overload]
+        for chunk in chunks:
+            profile.add(chunk)
+    profile.schema.finalize()
+    return profile
+
+
 # --------------------------------------------------------------------------- #
 # Step 2: push it to S3
 # --------------------------------------------------------------------------- #
@@ -122,8 +316,9 @@ def save_uploaded_csv(store: DraftStore, draft: PublishDraft, file_name: str, st
 class DraftProgress:
     """minio progress sink that records percentage onto the draft.
 
-    Throttled: minio calls update() once per part, and rewriting draft.json on
-    every call would cost more than the upload.
+    Throttled: update() is called once per part, and rewriting draft.json on
+    every call would cost more than the upload. Parallel part uploads report
+    through `upload_to_s3`, which serializes the calls.
     """
 
     MIN_INTERVAL_SECONDS = 0.5
@@ -179,23 +374,33 @@ def run_data_upload(store: DraftStore, draft_id: str) -> None:
                 bucket_name=SYSTEM_CONFIG.s3_bucket_name,
                 object_name=object_name,
                 progress=DraftProgress(store, draft_id),
+                part_size=settings.s3_part_size_mb * 1024 * 1024,
+                workers=settings.s3_upload_workers,
+                resume_state=draft.s3_multipart,
+                checkpoint=lambda state: store.update(draft_id, s3_multipart=state),
             )
 
-        # Hash the file that was actually uploaded, so the recorded checksum
-        # always describes the bytes in the bucket.
-        sha256 = get_sha256(csv_path)
+        # data.csv is immutable once written, so the checksum taken while it was
+        # received describes the bytes in the bucket. Drafts from before that was
+        # recorded fall back to hashing the file.
+        sha256 = draft.csv_sha256 or get_sha256(csv_path)
+        if settings.publish_chunk_hashes:
+            upload_chunk_hashes(csv_path, object_name, sha256)
+        parquet = upload_parquet_copy(store, draft_id, object_name)
 
         store.update(
             draft_id,
             upload_state=UploadState.DONE,
             upload_pct=100,
             upload_error="",
+            s3_multipart=None,
             s3_file_id=Path(object_name).stem,
             s3_file_name=object_name,
             s3_file_url=f"{SYSTEM_CONFIG.s3_url}/{object_name}",
             s3_file_sha256=sha256,
             pelican_uri=f"{SYSTEM_CONFIG.pelican_uri_prefix}/{object_name}",
             pelican_http_url=f"{SYSTEM_CONFIG.pelican_http_url_prefix}/{object_name}",
+            **parquet,
         )
     except Exception as exc:  # noqa: BLE001 - reported through the draft, not raised
         logger.exception("S3 upload failed for draft %s", draft_id)
@@ -205,6 +410,63 @@ def run_data_upload(store: DraftStore, draft_id: str) -> None:
             logger.exception("Could not record the upload failure for draft %s", draft_id)
 
 
+def upload_parquet_copy(store: DraftStore, draft_id: str, csv_object_name: str) -> dict[str, str]:
+    """Convert data.csv to Parquet and upload it beside the CSV; returns the draft fields for it.
+
+    Written with the schema inferred on receipt, so its column types are the
+    ones the Croissant fields will declare. The copy is an optimisation for
+    consumers, not part of what is published: if it fails, the failure is
+    logged and the fields come back empty, and the dataset is published with
+    its CSV alone.
+    """
+    object_name = f"{Path(csv_object_name).stem}{PARQUET_SUFFIX}"
+    try:
+        path = write_parquet(store.csv_path(draft_id), load_schema(store, draft_id), store.parquet_path(draft_id))
+        if not settings.fake_s3:
+            upload_to_s3(
+                file_path=path,
+                bucket_name=SYSTEM_CONFIG.s3_bucket_name,
+                object_name=object_name,
+                part_size=settings.s3_part_size_mb * 1024 * 1024,
+                workers=settings.s3_upload_workers,
+            )
+        sha256 = get_sha256(path)
+        if settings.publish_chunk_hashes:
+            upload_chunk_hashes(path, object_name, sha256)
+    except Exception as exc:  # noqa: BLE001 - pyarrow and minio raise all sorts; the CSV is enough
+        logger.warning("Could not publish a Parquet copy for draft %s: %s", draft_id, exc)
+        return {"s3_parquet_name": "", "s3_parquet_url": "", "s3_parquet_sha256": ""}
+    return {
+        "s3_parquet_name": object_name,
+        "s3_parquet_url": f"{SYSTEM_CONFIG.s3_url}/{object_name}",
+        "s3_parquet_sha256": sha256,
+    }
+
+
+def upload_chunk_hashes(path: Path, object_name: str, sha256: str) -> None:
+    """Upload the sha256 of each chunk of `path` beside its S3 object (APP_PUBLISH_CHUNK_HASHES).
+
+    Chunks are the size downloads cut files into, so a ranged download can
+    check each one as it lands (see `sources.load_chunk_hashes`). Optional like
+    the Parquet copy: a failure is logged, and downloads then verify the
+    whole file only.
+    """
+    try:
+        hashes = hash_file(path, SYSTEM_CONFIG.http_chunk_size_mb * 1024 * 1024)
+        if hashes.sha256 != sha256:
+            raise ValueError(f"{path.name} hashes to {hashes.sha256}, not the {sha256} being published")
+        hashes_path = path.with_name(path.name + CHUNK_HASHES_SUFFIX)
+        hashes_path.write_text(hashes.model_dump_json())
+        if not settings.fake_s3:
+            upload_to_s3(
+                file_path=hashes_path,
+                bucket_name=SYSTEM_CONFIG.s3_bucket_name,
+                object_name=object_name + CHUNK_HASHES_SUFFIX,
+            )
+    except Exception as exc:  # noqa: BLE001 - minio raises all sorts; the file's sha256 is enough
+        logger.warning("Could not publish chunk hashes for %s: %s", object_name, exc)
+
+
 # --------------------------------------------------------------------------- #
 # Step 3: Croissant metadata
 # --------------------------------------------------------------------------- #
@@ -219,11 +481,8 @@ def generate_metadata(store: DraftStore, draft: PublishDraft) -> PublishDraft:
         return store.save(draft)
 
     try:
-        # Read the whole file, not a sample: dtype inference decides the Croissant
-        # field types, and inferring from the first N rows would emit different types.
-        frame = pd.read_csv(csv_path)
-        jsonld = build_croissant_metadata(frame, draft.to_croissant_spec())
-        del frame
+        schema = load_schema(store, draft.id)
+        jsonld = build_croissant_metadata(schema, draft.to_croissant_spec())
     except Exception as exc:  # noqa: BLE001
         logger.exception("Croissant generation failed for draft %s", draft.id)
         draft.generate_error = str(exc)
@@ -248,6 +507,34 @@ def generate_metadata(store: DraftStore, draft: PublishDraft) -> PublishDraft:
     return store.save(draft)
 
 
+def save_schema(store: DraftStore, draft_id: str, schema: TabularSchema) -> None:
+    _stage_schema(store, draft_id, schema).replace(store.schema_path(draft_id))
+
+
+def _stage_schema(store: DraftStore, draft_id: str, schema: TabularSchema) -> Path:
+    """`schema` written beside schema.json, ready to be moved into place."""
+    tmp = store.schema_path(draft_id).with_suffix(".json.tmp")
+    tmp.write_text(schema.model_dump_json())
+    return tmp
+
+
+def load_schema(store: DraftStore, draft_id: str) -> TabularSchema:
+    """The schema inferred when data.csv was received.
+
+    Regenerating metadata after a step 1 edit then costs a small JSON read rather
+    than another pass over the CSV. Drafts uploaded before the schema was stored
+    are inferred once here, reading every row rather than a sample (a sample would
+    emit different field types), and cached for next time.
+    """
+    path = store.schema_path(draft_id)
+    try:
+        return TabularSchema.model_validate_json(path.read_text())
+    except (FileNotFoundError, ValueError):
+        schema = infer_schema(store.csv_path(draft_id))
+        save_schema(store, draft_id, schema)
+        return schema
+
+
 def load_metadata(store: DraftStore, draft: PublishDraft) -> dict:
     path = store.metadata_path(draft.id)
     if not path.exists():
@@ -304,7 +591,10 @@ def publish_draft(session: Session, store: DraftStore, draft: PublishDraft) -> i
     """Insert the dataset and return its new id."""
     dataset = build_pending_dataset(session, store, draft)
     session.add(dataset)
+    count_dataset(session, dataset, 1)
+    bump_generation(session)
     session.commit()
+    catalog_changed()
 
     dataset_id = dataset.id
     if dataset_id is None:  # pragma: no cover - the insert would have raised
@@ -0,0 +1,177 @@
+"""Full-text search over published datasets' names, keywords and descriptions.
+
+`ILIKE '%q%'` cannot use an index, so every keystroke of the live search scanned
+the whole table, and it had no notion of which match is better. Instead:
+
+- On Postgres, `dataset.search_vector` is a generated `tsvector` column with a
+  GIN index. Postgres keeps it current on every insert and update itself.
+- On SQLite, `dataset_fts` is an FTS5 table over the same three columns, kept in
+  sync with `dataset` by triggers, so a publish or delete updates it in the
+  same transaction whichever code path wrote the row.
+
+Both weight a match in the name above one in the keywords above one in the
+description, for the "relevance" sort. Words are matched by stem and the last
+typed word as a prefix, so "clim" finds "Climate" while it is still being typed.
+
+The index is created the first time it is needed (see `ensure_search_index`),
+which is idempotent and backfills the rows already there. A database that can
+do neither, such as a SQLite built without FTS5, falls back to `ILIKE`.
+"""
+
+import logging
+import re
+import threading
+
+from sqlalchemy import ColumnElement, Engine, Select, column, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, col, func, or_
+
+from pelican_data_loader.db import Dataset
+
+logger = logging.getLogger(__name__)
+
+# Postgres text search configuration: English stemming and stop words.
+TS_CONFIG = "english"
+
+_POSTGRES_DDL = [
+    f"""
+    ALTER TABLE dataset ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('{TS_CONFIG}', coalesce(keywords, '')), 'B')
+        || setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_dataset_search_vector ON dataset USING GIN (search_vector)",
+]
+
+# An external-content FTS5 table: it indexes `dataset`'s text without storing a
+# second copy of it. The triggers are what keep the two in step.
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS dataset_fts USING fts5(
+        name, keywords, description,
+        content='dataset', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dataset_fts_delete AFTER DELETE ON dataset BEGIN
+        INSERT INTO dataset_fts(dataset_fts, rowid, name, keywords, description)
+        VALUES ('delete', old.id, old.name, old.keywords, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dataset_fts_update AFTER UPDATE ON dataset BEGIN
+        INSERT INTO dataset_fts(dataset_fts, rowid, name, keywords, description)
+        VALUES ('delete', old.id, old.name, old.keywords, old.description);
+        INSERT INTO dataset_fts(rowid, name, keywords, description)
+        VALUES (new.id, new.name, new.keywords, new.description);
+    END
+    """,
+    # bm25 column weights, in the order the columns are declared above. The
+    # built-in `rank` column then orders by them.
+    "INSERT INTO dataset_fts(dataset_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    # Last, so that its absence means the setup never finished and the table
+    # still needs filling; SQLite commits each of these on its own.
+    """
+    CREATE TRIGGER IF NOT EXISTS dataset_fts_insert AFTER INSERT ON dataset BEGIN
+        INSERT INTO dataset_fts(rowid, name, keywords, description)
+        VALUES (new.id, new.name, new.keywords, new.description);
+    END
+    """,
+]
+
+_search_vector = literal_column("dataset.search_vector")
+_fts = table("dataset_fts", column("rowid"), column("rank"))
+
+# A last word shorter than this is matched whole rather than as a prefix: "c"
+# would otherwise expand to a good part of the vocabulary and match nearly
+# every row, which is slow to count and rank and useless to look at.
+MIN_PREFIX_CHARS = 3
+
+# Whether each database (by URL) has its index; absent until first checked.
+_index_ready: dict[str, bool] = {}
+_index_lock = threading.Lock()
+
+
+def search_terms(query: str) -> list[str]:
+    """The words of `query`, lowercased, without punctuation or search-syntax characters.
+
+    Apostrophes are dropped rather than split on, so "Wisconsin's" stays one word.
+    """
+    return re.findall(r"\w+", query.lower().replace("'", ""))
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Create the full-text index on `engine`'s database if it is missing; False if it cannot have one.
+
+    Checked once per process and database. Connection errors propagate and are
+    retried next time; only a database that lacks the feature is remembered.
+    """
+    key = engine.url.render_as_string(hide_password=True)
+    if key in _index_ready:
+        return _index_ready[key]
+    with _index_lock:
+        if key not in _index_ready:
+            _index_ready[key] = _create_index(engine)
+    return _index_ready[key]
+
+
+def apply_search(statement: Select, session: Session, query: str, rank: bool = False) -> Select:
+    """`statement` over `Dataset`, narrowed to rows matching `query` and, with `rank`, best match first."""
+    terms = search_terms(query)
+    if not terms:
+        return statement
+    dialect = session.get_bind().dialect.name
+    if not ensure_search_index(session.get_bind()):
+        return statement.where(_ilike(query))
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), _prefix_query(terms, " & ", ":*"))
+        statement = statement.where(_search_vector.op("@@")(tsquery))
+        return statement.order_by(func.ts_rank(_search_vector, tsquery).desc()) if rank else statement
+
+    statement = statement.join(_fts, _fts.c.rowid == Dataset.id).where(
+        literal_column("dataset_fts").op("MATCH")(_prefix_query(terms, " ", "*", quote='"'))
+    )
+    return statement.order_by(_fts.c.rank) if rank else statement
+
+
+def _prefix_query(terms: list[str], joiner: str, prefix: str, quote: str = "") -> str:
+    """All of `terms`, the last as a prefix if long enough. Each is quoted, so none is read as an operator."""
+    quoted = [f"{quote}{term}{quote}" for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_CHARS:
+        quoted[-1] += prefix
+    return joiner.join(quoted)
+
+
+def _ilike(query: str) -> ColumnElement[bool]:
+    like = f"%{query}%"
+    return or_(col(Dataset.name).ilike(like), col(Dataset.description).ilike(like), col(Dataset.keywords).ilike(like))
+
+
+def _create_index(engine: Engine) -> bool:
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        with engine.begin() as conn:
+            for statement in _POSTGRES_DDL:
+                conn.execute(text(statement))
+        return True
+    if dialect != "sqlite":
+        logger.warning("No full-text index for %s databases; search falls back to ILIKE", dialect)
+        return False
+
+    with engine.begin() as conn:
+        existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'dataset_fts_insert'")).first()
+        try:
+            for statement in _SQLITE_DDL:
+                conn.execute(text(statement))
+        except OperationalError as exc:
+            if "fts5" not in str(exc):
+                raise
+            logger.warning("This SQLite has no FTS5; search falls back to ILIKE")
+            return False
+        if existed is None:
+            # Index the rows published before the index existed.
+            conn.execute(text("INSERT INTO dataset_fts(dataset_fts) VALUES ('rebuild')"))
+            logger.info("Created the dataset_fts search index")
+    return True
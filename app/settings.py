@@ -12,6 +12,8 @@ from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from pelican_data_loader.config import SYSTEM_CONFIG
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 
 
@@ -30,8 +32,32 @@ class AppSettings(BaseSettings):
 
     page_size: int = 12
     max_facet_keywords: int = 30
+
+    # Listing pages, totals, facets and dataset details are cached per worker, at
+    # most this many of them for at most this long. Publishing or deleting through
+    # the app replaces them at once; the expiry bounds how long other writes to
+    # the dataset table go unseen.
+    catalog_cache_entries: int = 2048
+    catalog_cache_seconds: int = 300
+    # How often a worker checks the database for publishes and deletes made by
+    # another worker. 0 checks on every request.
+    catalog_generation_poll_seconds: float = 1.0
+    # On Postgres, result sets the planner expects to be larger than this are
+    # shown with its estimate ("about N") instead of being counted.
+    exact_count_limit: int = 10_000
     max_upload_mb: int = 512
 
+    # Parallel multipart upload of data.csv to S3. Peak memory during an upload is
+    # about part size x workers. Unset, these follow the library's own
+    # S3_PART_SIZE_MB and S3_UPLOAD_WORKERS.
+    s3_part_size_mb: int = SYSTEM_CONFIG.s3_part_size_mb
+    s3_upload_workers: int = SYSTEM_CONFIG.s3_upload_workers
+
+    # Also publish the sha256 of every chunk of each file (see
+    # `pelican_data_loader.utils.ChunkHashes`), so ranged downloads can check
+    # each chunk as it lands. Costs one more parallel pass over the file.
+    publish_chunk_hashes: bool = False
+
     # Set behind a TLS-terminating proxy so the session cookie gets Secure.
     https_only: bool = False
 
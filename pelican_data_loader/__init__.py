@@ -1,44 +1,108 @@
-"""Pelican Platform backed data loader for the UW-Madison Data Repository."""
-
-from pelican_data_loader.config import SYSTEM_CONFIG, SystemConfig
-from pelican_data_loader.croissant import (
-    CroissantAuthor,
-    CroissantSpec,
-    build_croissant_metadata,
-    validate_croissant,
-)
-from pelican_data_loader.data import (
-    delete_from_s3,
-    get_default_s3_client,
-    s3_object_name_from_url,
-    upload_to_s3,
-)
-from pelican_data_loader.db import (
-    DataRepoEngine,
-    Dataset,
-    Person,
-    get_session,
-    initialize_database,
-)
-from pelican_data_loader.utils import get_sha256, get_sha256_from_bytes, sanitize_name
-
-__all__ = [
-    "SYSTEM_CONFIG",
-    "SystemConfig",
-    "CroissantAuthor",
-    "CroissantSpec",
-    "build_croissant_metadata",
-    "validate_croissant",
-    "DataRepoEngine",
-    "Dataset",
-    "Person",
-    "get_session",
-    "initialize_database",
-    "delete_from_s3",
-    "get_default_s3_client",
-    "s3_object_name_from_url",
-    "upload_to_s3",
-    "get_sha256",
-    "get_sha256_from_bytes",
-    "sanitize_name",
-]
+"""Pelican Platform backed data loader for the UW-Madison Data Repository.
+
+Attributes load on first use (PEP 562): importing the package costs almost
+nothing, and `from pelican_data_loader import upload_to_s3` imports only what
+`upload_to_s3` needs, not pandas, mlcroissant, datasets and sqlmodel as well.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pelican_data_loader.cache import ChecksumMismatch, DownloadCache, get_download_cache
+    from pelican_data_loader.config import SYSTEM_CONFIG, SystemConfig
+    from pelican_data_loader.croissant import (
+        ColumnSchema,
+        CroissantAuthor,
+        CroissantSpec,
+        TabularSchema,
+        build_croissant_metadata,
+        declared_features,
+        infer_schema,
+        validate_croissant,
+    )
+    from pelican_data_loader.data import (
+        MultipartUploadState,
+        RangeDownloadState,
+        abort_multipart_upload,
+        delete_from_s3,
+        download_http,
+        get_default_s3_client,
+        new_s3_client,
+        s3_object_name_from_url,
+        s3_pool_stats,
+        upload_to_s3,
+    )
+    from pelican_data_loader.fetch import FetchError, FetchReport, FetchResult, fetch_files, iter_fetch
+    from pelican_data_loader.parquet import read_parquet, write_parquet
+    from pelican_data_loader.prefetch import Prefetcher, PrefetchStats
+    from pelican_data_loader.sources import SourceDownload, SourceProbe, download_from_sources, probe_sources
+    from pelican_data_loader.db import (
+        DataRepoEngine,
+        Dataset,
+        Keyword,
+        Person,
+        backfill_keywords,
+        get_session,
+        initialize_database,
+    )
+    from pelican_data_loader.utils import ChunkHashes, get_sha256, get_sha256_from_bytes, hash_file, sanitize_name
+
+# The submodule that defines each public name.
+_EXPORTS = {
+    "pelican_data_loader.cache": ["ChecksumMismatch", "DownloadCache", "get_download_cache"],
+    "pelican_data_loader.config": ["SYSTEM_CONFIG", "SystemConfig"],
+    "pelican_data_loader.croissant": [
+        "ColumnSchema",
+        "CroissantAuthor",
+        "CroissantSpec",
+        "TabularSchema",
+        "build_croissant_metadata",
+        "declared_features",
+        "infer_schema",
+        "validate_croissant",
+    ],
+    "pelican_data_loader.data": [
+        "MultipartUploadState",
+        "RangeDownloadState",
+        "abort_multipart_upload",
+        "delete_from_s3",
+        "download_http",
+        "get_default_s3_client",
+        "new_s3_client",
+        "s3_object_name_from_url",
+        "s3_pool_stats",
+        "upload_to_s3",
+    ],
+    "pelican_data_loader.fetch": ["FetchError", "FetchReport", "FetchResult", "fetch_files", "iter_fetch"],
+    "pelican_data_loader.parquet": ["read_parquet", "write_parquet"],
+    "pelican_data_loader.prefetch": ["Prefetcher", "PrefetchStats"],
+    "pelican_data_loader.sources": ["SourceDownload", "SourceProbe", "download_from_sources", "probe_sources"],
+    "pelican_data_loader.db": [
+        "DataRepoEngine",
+        "Dataset",
+        "Keyword",
+        "Person",
+        "backfill_keywords",
+        "get_session",
+        "initialize_database",
+    ],
+    "pelican_data_loader.utils": ["ChunkHashes", "get_sha256", "get_sha256_from_bytes", "hash_file", "sanitize_name"],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = [name for names in _EXPORTS.values() for name in names]
+
+
+def __getattr__(name: str) -> Any:
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    # Cache it, so later lookups do not come back here.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,393 @@
+"""Local content-addressed cache for downloaded dataset files.
+
+Entries are keyed by the sha256 the catalog already records for each file, so a
+hit is the published bytes by construction and is served without any network
+I/O, however many URLs point at the same content. A file the catalog has no
+checksum for is keyed by a hash of its URL instead (see `fetch.cache_key`).
+
+    {cache_dir}/objects/ab/ab12...ef.csv   verified entries
+               /verified/ab12...ef.csv    when an entry was last hashed, deleted with it
+               /locks/ab12...ef.lock      one fill lock per entry, deleted with it
+               /tmp/                      fills in progress, and partial
+                                          downloads that can resume
+
+Several processes may share one cache directory (HPC jobs on a node's scratch
+disk): a fill holds a file lock for its entry, so the second process to ask for
+a file waits for the first download and then reuses it instead of repeating it.
+
+An entry's record under verified/ holds the sha256 it was checked against and
+the inode, size and mtime it had then, so `verify` in a later process trusts an
+entry nothing has replaced or written to since rather than hashing it again.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+from filelock import FileLock, Timeout
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+from pelican_data_loader.config import SYSTEM_CONFIG
+from pelican_data_loader.utils import get_sha256
+
+logger = logging.getLogger(__name__)
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded bytes did not hash to the sha256 the catalog recorded.
+
+    `sources` lists the URLs that supplied the bytes, when the downloader knows,
+    so a retry can go elsewhere.
+    """
+
+    def __init__(self, message: str, sources: list[str] | None = None):
+        super().__init__(message)
+        self.sources = sources or []
+
+
+class _HashingWriter:
+    """Hashes and counts bytes on their way into a file, so a fill is verified in one pass."""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.sha256 = hashlib.sha256()
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.written += len(data)
+        return self.out.write(data)
+
+
+class DownloadCache:
+    """A size-bounded, least-recently-used cache of verified files on local disk."""
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int | None = None):
+        self.root = Path(root or SYSTEM_CONFIG.download_cache_dir).expanduser()
+        if max_bytes is None:
+            max_bytes = int(SYSTEM_CONFIG.download_cache_max_gb * 1024**3)
+        self.max_bytes = max_bytes
+        # Entries this process has hashed, as (path, inode, size): a refill is a
+        # new inode, so anything replaced or truncated since is hashed again.
+        self._verified: set[tuple[Path, int, int]] = set()
+        self._verified_lock = threading.Lock()
+
+    def path(self, key: str, suffix: str = "") -> Path:
+        """Where the entry for `key` lives, whether or not it has been filled."""
+        if not key or "/" in key or key.startswith("."):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return self.root / "objects" / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = "") -> Path | None:
+        """The cached file for `key`, or None. A hit counts as a use for eviction."""
+        path = self.path(key, suffix)
+        try:
+            before = path.stat()
+            # mtime rather than atime, which noatime mounts never update.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        # The touch changes the mtime a verification record holds; carry a
+        # current record over to the new one.
+        sha256 = self._read_record(path, before)
+        if sha256:
+            self._write_record(path, sha256)
+        return path
+
+    def verify(self, key: str, sha256: str, suffix: str = "") -> Path | None:
+        """The entry for `key` if its bytes still hash to `sha256`, else None.
+
+        An entry that does not, corrupted on disk or truncated by something
+        other than this cache, is discarded, so the next fetch fills it afresh.
+        An entry is hashed again only when it has changed since it was last
+        verified, by this process or (see the module docstring) an earlier one.
+        """
+        path = self.path(key, suffix)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        with self._verified_lock:
+            verified = (path, stat.st_ino, stat.st_size) in self._verified
+        if not verified and self._read_record(path, stat) != sha256.lower():
+            digest = get_sha256(path)
+            if digest != sha256.lower():
+                logger.warning("Cached %s hashes to %s, not %s; discarding it", path.name, digest, sha256)
+                self.discard(key, suffix)
+                return None
+            self._mark_verified(path, digest)
+        return self.get(key, suffix)
+
+    def fetch(
+        self,
+        key: str,
+        write: Callable[[BinaryIO], None],
+        suffix: str = "",
+        sha256: str | None = None,
+    ) -> Path:
+        """Return the entry for `key`, filling it with `write` on a miss.
+
+        `write` receives a binary file to write the content into. With `sha256`,
+        the bytes are hashed as they are written and a mismatch raises
+        `ChecksumMismatch` without creating the entry. The entry only appears, by
+        an atomic rename, once it is complete and verified.
+        """
+
+        def fill(path: Path) -> None:
+            tmp_dir = self.root / "tmp"
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, prefix=f"{key}.")
+            tmp_path = Path(tmp_name)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    writer = _HashingWriter(out)
+                    write(writer)  # type: ignore[arg-type]
+                digest = writer.sha256.hexdigest()
+                if sha256 and digest != sha256.lower():
+                    raise ChecksumMismatch(f"Expected sha256 {sha256}, got {digest} ({writer.written} bytes)")
+                tmp_path.replace(path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            if sha256:
+                self._mark_verified(path, digest)
+
+        return self._fill(key, suffix, fill)
+
+    def fetch_file(
+        self,
+        key: str,
+        download: Callable[[Path], str | None],
+        suffix: str = "",
+        sha256: str | None = None,
+    ) -> Path:
+        """Like `fetch`, for downloaders that write a file of their own rather than a stream.
+
+        `download` is given a path under `tmp/` to create. The path is the same
+        on every attempt, so a downloader that resumes from its own partial
+        files picks up where an interrupted fill stopped. The finished file is
+        verified against `sha256`, if given, before it becomes the entry.
+        `download` may return the sha256 of what it wrote, if it hashed the
+        bytes on their way in; otherwise the file is hashed once it is complete.
+        """
+
+        def fill(path: Path) -> None:
+            tmp_path = self.root / "tmp" / f"{key}{suffix}"
+            tmp_path.parent.mkdir(parents=True, exist_ok=True)
+            digest = download(tmp_path)
+            try:
+                if sha256:
+                    digest = digest or get_sha256(tmp_path)
+                    if digest != sha256.lower():
+                        raise ChecksumMismatch(f"Expected sha256 {sha256}, got {digest}")
+                tmp_path.replace(path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            if sha256:
+                self._mark_verified(path, sha256.lower())
+
+        return self._fill(key, suffix, fill)
+
+    def _fill(self, key: str, suffix: str, fill: Callable[[Path], None]) -> Path:
+        hit = self.get(key, suffix)
+        if hit is not None:
+            return hit
+
+        with self._entry_lock(key):
+            # Another process may have filled it while this one waited for the lock.
+            hit = self.get(key, suffix)
+            if hit is not None:
+                return hit
+
+            path = self.path(key, suffix)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fill(path)
+
+        logger.info("Cached %s (%.1f MB)", path.name, path.stat().st_size / 1e6)
+        self.evict(keep=path)
+        return path
+
+    def _mark_verified(self, path: Path, sha256: str) -> None:
+        stat = path.stat()
+        with self._verified_lock:
+            self._verified.add((path, stat.st_ino, stat.st_size))
+        self._write_record(path, sha256)
+
+    def _record_path(self, path: Path) -> Path:
+        return self.root / "verified" / path.name
+
+    def _read_record(self, path: Path, stat: os.stat_result) -> str | None:
+        """The sha256 `path` was verified against, if its record matches `stat`."""
+        try:
+            fields = self._record_path(path).read_text().split()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+        if len(fields) != 4 or fields[:3] != [str(stat.st_ino), str(stat.st_size), str(stat.st_mtime_ns)]:
+            return None
+        return fields[3]
+
+    def _write_record(self, path: Path, sha256: str) -> None:
+        """Record that `path`, as it is now, hashes to `sha256`."""
+        record_path = self._record_path(path)
+        try:
+            stat = path.stat()
+            record_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=record_path.parent, prefix=f".{path.name}.")
+            try:
+                with os.fdopen(fd, "w") as out:
+                    out.write(f"{stat.st_ino} {stat.st_size} {stat.st_mtime_ns} {sha256}\n")
+                os.replace(tmp_name, record_path)
+            finally:
+                Path(tmp_name).unlink(missing_ok=True)
+        except OSError as exc:
+            # Without a record the entry is only hashed again, so this is not fatal.
+            logger.debug("Could not record verification of %s: %s", path.name, exc)
+
+    def _lock_path(self, key: str) -> Path:
+        return self.root / "locks" / f"{key}.lock"
+
+    @contextlib.contextmanager
+    def _entry_lock(self, key: str) -> Iterator[None]:
+        """Hold the fill lock of `key`'s entries.
+
+        `evict` and `discard` delete lock files, so the file this process waited
+        on may have been unlinked meanwhile, with another process since locking
+        a new one at the same path. Acquired again until the file locked is the
+        one at the path. Telling which file that is takes the locked descriptor,
+        so this takes the lock with flock itself rather than through filelock.
+        """
+        lock_path = self._lock_path(key)
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            # Windows does not delete a file another process has open (see
+            # `_unlink_lock`), so the file locked is always the one at the path.
+            with FileLock(lock_path):
+                yield
+            return
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    current = lock_path.stat().st_ino
+                except FileNotFoundError:
+                    current = None
+            except BaseException:
+                os.close(fd)
+                raise
+            if current == os.fstat(fd).st_ino:
+                break
+            os.close(fd)
+        try:
+            yield
+        finally:
+            # Closing the descriptor releases the lock.
+            os.close(fd)
+
+    def _unlink_lock(self, key: str) -> None:
+        """Delete `key`'s lock file unless a fill holds it. Call with the evict lock held."""
+        lock_path = self._lock_path(key)
+        if fcntl is not None:
+            try:
+                fd = os.open(lock_path, os.O_RDWR)
+            except FileNotFoundError:
+                return
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return
+            try:
+                lock_path.unlink(missing_ok=True)
+            finally:
+                os.close(fd)
+            return
+        if not lock_path.exists():
+            return
+        lock = FileLock(lock_path, timeout=0)
+        try:
+            lock.acquire()
+        except Timeout:
+            return
+        try:
+            lock_path.unlink(missing_ok=True)
+        except OSError:
+            # Windows does not delete a file another process has open; the next eviction tries again.
+            pass
+        finally:
+            lock.release()
+
+    def discard(self, key: str, suffix: str = "") -> None:
+        """Remove an entry, e.g. one found to be corrupt, and its lock file."""
+        with FileLock(self._evict_lock_path()):
+            path = self.path(key, suffix)
+            path.unlink(missing_ok=True)
+            self._record_path(path).unlink(missing_ok=True)
+            self._unlink_lock(key)
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self._entries())
+
+    def evict(self, keep: Path | None = None) -> int:
+        """Delete least-recently-used entries until the cache fits in `max_bytes`.
+
+        Returns the number of bytes freed. `keep` is never evicted, so a file
+        larger than the whole budget still survives long enough to be loaded.
+        """
+        freed = 0
+        with FileLock(self._evict_lock_path()):
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                self._record_path(path).unlink(missing_ok=True)
+                # Keys are hex digests, so the entry's key is its name up to the suffix.
+                self._unlink_lock(path.name.partition(".")[0])
+                total -= size
+                freed += size
+        if freed:
+            logger.info("Evicted %.1f MB from the download cache", freed / 1e6)
+        return freed
+
+    def _evict_lock_path(self) -> Path:
+        lock_path = self.root / "locks" / "evict.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        return lock_path
+
+    def _entries(self):
+        objects = self.root / "objects"
+        if not objects.exists():
+            return
+        yield from (path for path in objects.glob("*/*") if path.is_file())
+
+
+_default_cache: DownloadCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_download_cache() -> DownloadCache:
+    """The cache at `SYSTEM_CONFIG.download_cache_dir`, created on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DownloadCache()
+        return _default_cache
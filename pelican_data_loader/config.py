@@ -1,3 +1,5 @@
+import threading
+from pathlib import Path
 from typing import Any
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,6 +16,49 @@ class SystemConfig(BaseSettings):
     wisc_client_secret: str = ""
     pelican_uri_prefix: str = ""
     pelican_http_url_prefix: str = ""
+    # Multipart uploads: each part is one request, and this many are in flight at
+    # once. Parts are read from disk by the worker sending them, so peak memory is
+    # roughly part size x workers.
+    s3_part_size_mb: int = 16
+    s3_upload_workers: int = 8
+    # The shared client's connection pool. Connections are kept alive between
+    # calls, and failed requests are retried with exponential backoff.
+    s3_max_connections: int = 16
+    s3_retries: int = 3
+    s3_retry_backoff_seconds: float = 0.5
+    # Reading a response may wait on a slow server; opening a connection should
+    # not, so an unreachable endpoint fails (and is retried) quickly.
+    s3_timeout_seconds: int = 300
+    s3_connect_timeout_seconds: int = 10
+    # Verified copies of pulled files, keyed by sha256. Put it on node-local
+    # scratch to share it between jobs; it is safe for concurrent processes.
+    download_cache_dir: Path = Path.home() / ".cache" / "pelican_data_loader"
+    download_cache_max_gb: float = 50.0
+    # Check downloads against the sha256 the catalog records, hashing the bytes
+    # as they arrive, and cached copies the first time each process uses them.
+    verify_sha256: bool = True
+    # Fetching many files at once (`fetch_files`): how many download concurrently,
+    # and how often each is retried, with jittered exponential backoff, before
+    # the fetch reports it as failed.
+    fetch_concurrency: int = 8
+    fetch_retries: int = 5
+    fetch_backoff_seconds: float = 1.0
+    # Ranged HTTP downloads (`download_http`): the file is split into chunks of
+    # this size, fetched this many at a time over one pooled connection set.
+    http_download_connections: int = 8
+    http_chunk_size_mb: int = 16
+    http_timeout_seconds: int = 300
+    # Source selection: how long a probe of S3, a Pelican cache or Pelican HTTPS
+    # is trusted before the source is timed again, and how long a probe may take.
+    source_probe_ttl_seconds: int = 900
+    source_probe_timeout_seconds: float = 10.0
+    # Prefetching (`Dataset.prefetch`): how many shards download ahead of the one
+    # being consumed, and the most bytes they may take up between them.
+    prefetch_depth: int = 4
+    prefetch_max_gb: float = 8.0
+    # Keep each whole table `Dataset.pull` loads as an Arrow file in the download
+    # cache, so later pulls memory-map it instead of parsing the files again.
+    pull_materialize_arrow: bool = True
     postgres_host: str = "postgres"
     postgres_port: int = 5432
     postgres_user: str = ""
@@ -38,4 +83,33 @@ class SystemConfig(BaseSettings):
         }
 
 
-SYSTEM_CONFIG = SystemConfig()
+class _ConfigOnFirstUse:
+    """The process's one SystemConfig, created when a setting is first read or set.
+
+    Creating it reads `.env` and the environment, which importing the package
+    should not pay for. Every module holds this same object, so a setting
+    changed at runtime is seen everywhere.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_config", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> SystemConfig:
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    object.__setattr__(self, "_config", SystemConfig())
+        return self._config
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._get())
+
+
+SYSTEM_CONFIG: SystemConfig = _ConfigOnFirstUse()  # type: ignore[assignment]
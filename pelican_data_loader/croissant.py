@@ -7,13 +7,46 @@ mlcroissant rather than about any one application.
 """
 
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
 import mlcroissant as mlc
 import pandas as pd
+from datasets import Features, Value
 from pydantic import BaseModel, Field
 
-from pelican_data_loader.utils import parse_col
+from pelican_data_loader.utils import parse_dtype
+
+# Rows per chunk when inferring a schema from a file. Peak memory is one chunk,
+# whatever the file size.
+SCHEMA_CHUNK_ROWS = 100_000
+
+# Marks a column that has been entirely empty so far. Kept apart from float64,
+# which is what pandas gives such a chunk, because the two merge differently.
+NULL_DTYPE = "null"
+
+# `datasets` value type for each Croissant field dataType, keyed by the type's
+# local name so compact ("cr:Int64") and expanded IRIs both match. Dates stay
+# strings: the CSV builder cannot parse them, and inference gives strings too.
+CROISSANT_TO_HF_DTYPE = {
+    "Boolean": "bool",
+    "Integer": "int64",
+    "Int8": "int8",
+    "Int16": "int16",
+    "Int32": "int32",
+    "Int64": "int64",
+    "UInt8": "uint8",
+    "UInt16": "uint16",
+    "UInt32": "uint32",
+    "UInt64": "uint64",
+    "Float": "float64",
+    "Float16": "float16",
+    "Float32": "float32",
+    "Float64": "float64",
+    "Text": "string",
+    "URL": "string",
+    "Date": "string",
+}
 
 
 class CroissantAuthor(BaseModel):
@@ -31,6 +64,8 @@ class CroissantSpec(BaseModel):
 
     The `file_*` fields describe the already-uploaded data file: Croissant records
     where the data lives, so the file has to exist before metadata can point at it.
+    The `parquet_*` fields, if set, describe a Parquet copy of it, listed as a
+    second FileObject that is `sameAs` the first.
     """
 
     name: str = ""
@@ -47,6 +82,10 @@ class CroissantSpec(BaseModel):
     file_url: str = ""
     file_sha256: str = ""
 
+    parquet_file_name: str = ""
+    parquet_file_url: str = ""
+    parquet_file_sha256: str = ""
+
     def to_mlc_file_object(self) -> mlc.FileObject:
         return mlc.FileObject(
             id=self.file_id,
@@ -56,22 +95,130 @@ class CroissantSpec(BaseModel):
             encoding_formats=self.encoding_formats,
         )
 
+    def to_mlc_parquet_file_object(self) -> mlc.FileObject | None:
+        if not self.parquet_file_url:
+            return None
+        return mlc.FileObject(
+            id=f"{self.file_id}_parquet",
+            name=self.parquet_file_name,
+            description=f"{self.file_name} as Parquet",
+            sha256=self.parquet_file_sha256,
+            content_url=self.parquet_file_url,
+            encoding_formats=[mlc.EncodingFormat.PARQUET],
+            same_as=[self.file_id],
+        )
+
+
+class ColumnSchema(BaseModel):
+    """One column's name and the pandas dtype a full `pd.read_csv` would give it."""
+
+    name: str
+    dtype: str
+
+
+class TabularSchema(BaseModel):
+    """Column names and dtypes of a CSV, built up one chunk at a time.
+
+    A full `pd.read_csv` already parses in internal chunks (`low_memory`) and
+    joins them by widening each column to a common dtype. `merge_dtype` applies
+    that same join, and the join is associative, so merging our own chunks yields
+    exactly the dtypes a single whole-file read would — with only one chunk in
+    memory at a time.
+    """
+
+    columns: list[ColumnSchema] = Field(default_factory=list)
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame) -> "TabularSchema":
+        return cls(columns=[ColumnSchema(name=str(col), dtype=str(dataframe[col].dtype)) for col in dataframe.columns])
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Fold one chunk of the same CSV into the schema."""
+        if not self.columns:
+            # An empty dtype means no rows seen yet, as opposed to only empty values.
+            self.columns = [ColumnSchema(name=str(col), dtype="") for col in chunk.columns]
+        if chunk.empty:
+            return
+        for column, name in zip(self.columns, chunk.columns, strict=True):
+            series = chunk[name]
+            chunk_dtype = NULL_DTYPE if series.isna().all() else str(series.dtype)
+            column.dtype = merge_dtype(column.dtype, chunk_dtype) if column.dtype else chunk_dtype
+
+    def finalize(self) -> "TabularSchema":
+        """Resolve columns that never held a value to the dtype pandas gives them."""
+        for column in self.columns:
+            if not column.dtype:
+                column.dtype = "object"
+            elif column.dtype == NULL_DTYPE:
+                column.dtype = "float64"
+        return self
+
+    @property
+    def dtypes(self) -> dict[str, str]:
+        return {column.name: column.dtype for column in self.columns}
+
+
+def merge_dtype(current: str, new: str) -> str:
+    """The dtype pandas gives a column whose chunks were read as `current` and `new`.
 
-def build_croissant_metadata(dataframe: pd.DataFrame, spec: CroissantSpec) -> dict[str, Any]:
-    """Generate Croissant JSON-LD describing `dataframe` as published per `spec`.
+    Integers meeting floats widen to float64; bools and datetimes stay themselves
+    only among their own kind. An all-empty chunk turns integers into float64
+    (NaN needs a float) and bools into object (pandas has no nullable bool in
+    `read_csv`), and leaves everything else as is.
 
-    One record set with one field per column; column types come from the pandas
-    dtypes via `parse_col`, so the frame must be the same one that was uploaded.
+    The one case this cannot match is integers past 2**63 (uint64) mixed with
+    other values: there pandas' own answer depends on where its internal chunk
+    boundaries fall, so no two chunkings are guaranteed to agree.
     """
+    if current == new:
+        return current
+    if current == NULL_DTYPE:
+        current, new = new, current
+    if new == NULL_DTYPE:
+        if current.startswith(("int", "uint")):
+            return "float64"
+        if current == "bool":
+            return "object"
+        return current
+
+    numeric = ("int", "uint", "float")
+    if current.startswith(numeric) and new.startswith(numeric):
+        return "float64"
+    return "object"
+
+
+def infer_schema(csv_path: str | Path, chunk_rows: int = SCHEMA_CHUNK_ROWS) -> TabularSchema:
+    """Infer the dtypes `pd.read_csv(csv_path)` would produce, reading in bounded chunks."""
+    schema = TabularSchema()
+    with pd.read_csv(csv_path, chunksize=chunk_rows) as chunks:
+        for chunk in chunks:
+            schema.update(chunk)
+    return schema.finalize()
+
+
+def build_croissant_metadata(schema: TabularSchema | pd.DataFrame, spec: CroissantSpec) -> dict[str, Any]:
+    """Generate Croissant JSON-LD describing a table as published per `spec`.
+
+    One record set with one field per column; field types come from the schema's
+    pandas dtypes via `parse_dtype`, so the schema must describe the file that was
+    uploaded. A DataFrame is still accepted and reduced to its schema.
+    """
+    if isinstance(schema, pd.DataFrame):
+        schema = TabularSchema.from_dataframe(schema)
 
     distribution = [spec.to_mlc_file_object()]
 
     record_set = mlc.RecordSet(
         id=f"{spec.file_id}_record_set",
         name=spec.name,
-        fields=[parse_col(dataframe[col], parent_id=distribution[0].id) for col in dataframe.columns],
+        fields=[parse_dtype(col.name, col.dtype, parent_id=distribution[0].id) for col in schema.columns],
     )
 
+    # The record set reads the CSV; the Parquet copy is only an alternative encoding.
+    parquet = spec.to_mlc_parquet_file_object()
+    if parquet is not None:
+        distribution.append(parquet)
+
     metadata = mlc.Metadata(
         name=spec.name,
         description=spec.description,
@@ -95,6 +242,110 @@ def build_croissant_metadata(dataframe: pd.DataFrame, spec: CroissantSpec) -> di
     return jsonld
 
 
+def declared_features(jsonld: dict[str, Any], content_url: str | None = None) -> Features | None:
+    """The column types a Croissant document declares, as `datasets.Features`.
+
+    Covers the fields of the record sets that read `content_url` (see
+    `data_files`), in document order and named by the column they are extracted
+    from. Returns None when any of them has a type with no `datasets`
+    equivalent, so the caller can fall back to inference.
+    """
+    features = {}
+    for record_set in _record_sets_reading(jsonld, content_url):
+        for field in record_set.get("field", []):
+            data_type = field.get("dataType")
+            if isinstance(data_type, list):
+                data_type = data_type[0] if len(data_type) == 1 else None
+            hf_dtype = CROISSANT_TO_HF_DTYPE.get(str(data_type).rsplit("/", 1)[-1].rsplit(":", 1)[-1])
+            if hf_dtype is None or field.get("subField"):
+                return None
+            column = field.get("source", {}).get("extract", {}).get("column") or field.get("name")
+            features[column] = Value(hf_dtype)
+
+    return Features(features) if features else None
+
+
+def data_files(jsonld: dict[str, Any], content_url: str) -> dict[str, str]:
+    """The files holding the table whose primary file is `content_url`, with sha256s.
+
+    A table split across many files is a FileSet: the files matching its
+    `includes` globs inside a containing FileObject, typically a directory.
+    Returns the file itself mapped to its sha256 if fields read it directly, and
+    FileSet glob patterns mapped to "" (`fetch.expand_urls` expands them). Other
+    FileObjects a record set reads are joined, not concatenated, so they are
+    left out. For a single-file dataset this is just that file.
+    """
+    distributions = {distribution.get("@id"): distribution for distribution in jsonld.get("distribution", [])}
+    files = {}
+    for id in dict.fromkeys(id for record_set in _record_sets_reading(jsonld, content_url) for id in _source_ids(record_set)):
+        dist = distributions.get(id, {})
+        if str(dist.get("@type", "")).endswith("FileSet"):
+            includes = dist.get("includes", [])
+            for container_id in _ref_ids(dist.get("containedIn")):
+                base = distributions.get(container_id, {}).get("contentUrl", "").rstrip("/")
+                for pattern in [includes] if isinstance(includes, str) else includes:
+                    if base:
+                        files[f"{base}/{pattern.lstrip('/')}"] = ""
+        elif dist.get("contentUrl") == content_url:
+            files[content_url] = dist.get("sha256", "")
+    return files
+
+
+def parquet_copy(jsonld: dict[str, Any], content_url: str) -> dict[str, str]:
+    """The Parquet copy of the file at `content_url`, mapped to its sha256, if the document lists one.
+
+    That is a FileObject encoded as Parquet that is `sameAs` the file's own
+    FileObject, as `build_croissant_metadata` writes for a `CroissantSpec` with
+    `parquet_*` fields. Empty when there is none.
+    """
+    distributions = jsonld.get("distribution", [])
+    primary_id = next((dist.get("@id") for dist in distributions if dist.get("contentUrl") == content_url), None)
+    if primary_id is None:
+        return {}
+    for dist in distributions:
+        same_as = dist.get("sameAs")
+        same_as_ids = same_as if isinstance(same_as, list) else [same_as]
+        formats = dist.get("encodingFormat")
+        formats = formats if isinstance(formats, list) else [formats]
+        if primary_id in same_as_ids and mlc.EncodingFormat.PARQUET in formats and dist.get("contentUrl"):
+            return {dist["contentUrl"]: dist.get("sha256", "")}
+    return {}
+
+
+def _record_sets_reading(jsonld: dict[str, Any], content_url: str | None) -> list[dict[str, Any]]:
+    """The record sets with fields read from `content_url`, or from a file set inside it.
+
+    All of them when no distribution has that URL, which is how a document
+    describing a single file has always been read.
+    """
+    distributions = {distribution.get("@id"): distribution for distribution in jsonld.get("distribution", [])}
+    primary_id = next((id for id, dist in distributions.items() if content_url and dist.get("contentUrl") == content_url), None)
+    record_sets = jsonld.get("recordSet", [])
+    if primary_id is None:
+        return record_sets
+
+    def reads_primary(id: str) -> bool:
+        return id == primary_id or primary_id in _ref_ids(distributions.get(id, {}).get("containedIn"))
+
+    return [record_set for record_set in record_sets if any(reads_primary(id) for id in _source_ids(record_set))]
+
+
+def _source_ids(record_set: dict[str, Any]) -> list[str]:
+    """The @ids of the file objects and file sets a record set's fields read."""
+    return [
+        id
+        for field in record_set.get("field", [])
+        for key in ("fileObject", "fileSet")
+        for id in _ref_ids(field.get("source", {}).get(key))
+    ]
+
+
+def _ref_ids(ref: Any) -> list[str]:
+    """The @ids in a JSON-LD reference, which may be one object or a list of them."""
+    refs = ref if isinstance(ref, list) else [ref] if ref else []
+    return [item["@id"] for item in refs if isinstance(item, dict) and "@id" in item]
+
+
 def validate_croissant(jsonld: dict[str, Any]) -> mlc.Issues:
     """Validate a Croissant document, returning its `.errors` and `.warnings`."""
     return mlc.Dataset(jsonld=jsonld).metadata.issues
@@ -1,33 +1,199 @@
+import contextlib
+import functools
+import hashlib
+import inspect
+import logging
+import math
+import os
+import socket
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 
+import certifi
+import httpx
 import minio
-from minio.helpers import ProgressType
+import urllib3
+from minio.datatypes import Part
+from minio.error import S3Error
+from minio.helpers import MIN_PART_SIZE, ProgressType
+from pydantic import BaseModel, Field
+from urllib3.connection import HTTPConnection
 
+from .cache import ChecksumMismatch
 from .config import SYSTEM_CONFIG
+from .utils import ChunkHashes
 
+logger = logging.getLogger(__name__)
+
+# S3 caps a multipart upload at 10,000 parts.
+MAX_PARTS = 10_000
+
+# Bytes per read from an HTTP response body.
+HTTP_BLOCK_SIZE = 1024 * 1024
+
+# The private minio.Minio methods the parallel multipart upload is built on,
+# with the parameters it passes them. minio does not promise to keep these, so
+# pyproject pins minio below 8 and `check_minio_multipart_api` checks them.
+_MINIO_MULTIPART_METHODS: dict[str, tuple[str, ...]] = {
+    "_create_multipart_upload": ("bucket_name", "object_name", "headers"),
+    "_upload_part": ("bucket_name", "object_name", "data", "headers", "upload_id", "part_number"),
+    "_list_parts": ("bucket_name", "object_name", "upload_id", "part_number_marker"),
+    "_complete_multipart_upload": ("bucket_name", "object_name", "upload_id", "parts"),
+    "_abort_multipart_upload": ("bucket_name", "object_name", "upload_id"),
+}
+
+_default_client: minio.Minio | None = None
+# The pool of `_default_client`, kept for `s3_pool_stats`.
+_default_http_client: urllib3.PoolManager | None = None
+_default_client_lock = threading.Lock()
+
+
+def build_s3_http_client(max_connections: int | None = None) -> urllib3.PoolManager:
+    """A urllib3 pool tuned for S3 from `SYSTEM_CONFIG`.
+
+    Sized for the parallel multipart upload, with TCP keep-alive so idle pooled
+    connections survive between calls, and retries with exponential backoff on
+    connection errors and 5xx responses.
+    """
+    max_connections = max_connections or max(SYSTEM_CONFIG.s3_max_connections, SYSTEM_CONFIG.s3_upload_workers)
+    return urllib3.PoolManager(
+        maxsize=max_connections,
+        timeout=urllib3.Timeout(
+            connect=SYSTEM_CONFIG.s3_connect_timeout_seconds, read=SYSTEM_CONFIG.s3_timeout_seconds
+        ),
+        retries=urllib3.Retry(
+            total=SYSTEM_CONFIG.s3_retries,
+            backoff_factor=SYSTEM_CONFIG.s3_retry_backoff_seconds,
+            status_forcelist=(500, 502, 503, 504),
+        ),
+        socket_options=[*HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+    )
 
-def get_default_s3_client() -> minio.Minio:
-    """Get a MinIO client instance from environment variables."""
+
+def new_s3_client(http_client: urllib3.PoolManager | None = None) -> minio.Minio:
+    """Build a MinIO client from environment variables, with its own connection pool."""
 
     endpoint = SYSTEM_CONFIG.s3_endpoint_url.split("://")[-1]
     return minio.Minio(
         endpoint=endpoint,
         access_key=SYSTEM_CONFIG.s3_access_key_id,
         secret_key=SYSTEM_CONFIG.s3_secret_access_key,
+        secure=not SYSTEM_CONFIG.s3_endpoint_url.startswith("http://"),
+        http_client=http_client or build_s3_http_client(),
     )
 
 
+def get_default_s3_client() -> minio.Minio:
+    """The process-wide MinIO client, created on first use.
+
+    Building a client per call meant a new connection pool, and so a new TCP and
+    TLS handshake, for every upload and delete. minio clients are thread-safe, so
+    one is shared by every caller that does not pass its own.
+    """
+    global _default_client, _default_http_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_http_client = build_s3_http_client()
+                _default_client = new_s3_client(_default_http_client)
+    return _default_client
+
+
+def s3_pool_stats(http_client: urllib3.PoolManager | None = None) -> dict[str, int]:
+    """Requests sent and connections opened through a `build_s3_http_client` pool.
+
+    By default the shared client's. `requests - connections` is how many
+    requests reused a kept-alive connection.
+    """
+    http_client = http_client or _default_http_client
+    stats = {"requests": 0, "connections": 0}
+    if http_client is None:
+        return stats
+    pools = http_client.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is not None:
+            stats["requests"] += pool.num_requests
+            stats["connections"] += pool.num_connections
+    return stats
+
+
+@functools.cache
+def check_minio_multipart_api() -> None:
+    """Fail clearly if the installed minio lacks the private methods multipart uploads call.
+
+    Raises RuntimeError naming the minio version and what changed, rather than
+    a TypeError from the middle of an upload. Checked once per process.
+    """
+    problems = []
+    for name, params in _MINIO_MULTIPART_METHODS.items():
+        method = getattr(minio.Minio, name, None)
+        if method is None:
+            problems.append(f"{name} is missing")
+            continue
+        have = inspect.signature(method).parameters
+        missing = [param for param in params if param not in have]
+        if missing:
+            problems.append(f"{name} has no parameter {', '.join(missing)}")
+    if problems:
+        raise RuntimeError(
+            f"minio {minio.__version__} does not have the multipart upload methods pelican_data_loader uses: "
+            f"{'; '.join(problems)}. Install minio>=7.2.15,<8."
+        )
+
+
+class UploadedPart(BaseModel):
+    """One part S3 has acknowledged, with the hash of the local bytes it was read from."""
+
+    part_number: int
+    etag: str
+    sha256: str
+
+
+class MultipartUploadState(BaseModel):
+    """Enough about an in-progress multipart upload to resume it in another process.
+
+    Persist it from the `checkpoint` callback of `upload_to_s3` and pass it back
+    as `resume_state`; only the parts missing from `parts` are sent again.
+    """
+
+    bucket_name: str
+    object_name: str
+    upload_id: str
+    size: int
+    part_size: int
+    parts: list[UploadedPart] = Field(default_factory=list)
+
+
 def upload_to_s3(
     file_path: str | Path,
     bucket_name: str | None = None,
     object_name: str | None = None,
     client: minio.Minio | None = None,
     progress: ProgressType | None = None,
+    part_size: int | None = None,
+    workers: int | None = None,
+    resume_state: MultipartUploadState | None = None,
+    checkpoint: Callable[[MultipartUploadState], None] | None = None,
 ) -> None:
     """Upload a file to an S3 bucket.
 
     Uploading a large file takes minutes, so `progress` accepts anything with
     `set_meta(object_name, total_length)` and `update(length)` to report bytes sent.
+
+    Files larger than one part go up as a multipart upload with `workers` parts
+    in flight at once, which is what a high-latency link needs to fill its
+    bandwidth. Both default to `SYSTEM_CONFIG.s3_part_size_mb` and
+    `SYSTEM_CONFIG.s3_upload_workers`.
+
+    With `checkpoint`, the upload is resumable: it is called with the upload's
+    state whenever a part lands, and a failed upload is left open rather than
+    aborted, so passing the last state back as `resume_state` sends only the
+    parts still missing. Abort abandoned ones with `abort_multipart_upload`.
     """
     if client is None:
         client = get_default_s3_client()
@@ -38,7 +204,195 @@ def upload_to_s3(
     if not bucket_name:
         bucket_name = SYSTEM_CONFIG.s3_bucket_name
 
-    client.fput_object(bucket_name, object_name, str(file_path), progress=progress)
+    if part_size is None:
+        part_size = SYSTEM_CONFIG.s3_part_size_mb * 1024 * 1024
+    if workers is None:
+        workers = SYSTEM_CONFIG.s3_upload_workers
+
+    size = file_path.stat().st_size
+    part_size = _fit_part_size(size, part_size)
+    if size <= part_size or (workers <= 1 and checkpoint is None):
+        client.fput_object(
+            bucket_name, object_name, str(file_path), progress=progress, part_size=part_size, num_parallel_uploads=1
+        )
+        return
+
+    check_minio_multipart_api()
+    state = None
+    if resume_state is not None:
+        state = _resumable_state(client, resume_state, file_path, bucket_name, object_name, size, part_size)
+    if state is None:
+        upload_id = client._create_multipart_upload(bucket_name, object_name, {"Content-Type": "application/octet-stream"})
+        state = MultipartUploadState(
+            bucket_name=bucket_name, object_name=object_name, upload_id=upload_id, size=size, part_size=part_size
+        )
+
+    try:
+        _parallel_multipart_upload(client, state, file_path, max(1, workers), progress, checkpoint)
+    except BaseException:
+        if checkpoint is None:
+            # An unaborted upload keeps its parts stored (and billed) indefinitely.
+            abort_multipart_upload(state, client=client)
+        raise
+
+
+def abort_multipart_upload(state: MultipartUploadState, client: minio.Minio | None = None) -> None:
+    """Discard an unfinished multipart upload and the parts stored for it.
+
+    Failures are logged rather than raised: the caller is already cleaning up,
+    and an upload that no longer exists needs no aborting.
+    """
+    if client is None:
+        client = get_default_s3_client()
+    try:
+        check_minio_multipart_api()
+        client._abort_multipart_upload(state.bucket_name, state.object_name, state.upload_id)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Could not abort multipart upload %s of %s: %s", state.upload_id, state.object_name, exc)
+
+
+def _fit_part_size(size: int, part_size: int) -> int:
+    """Clamp a requested part size to what S3 accepts for a file of `size` bytes."""
+    return max(part_size, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+
+
+def _part_length(state: MultipartUploadState, part_number: int) -> int:
+    return min(state.part_size, state.size - (part_number - 1) * state.part_size)
+
+
+def _read_part(file_path: Path, state: MultipartUploadState, part_number: int) -> bytes:
+    with file_path.open("rb") as f:
+        f.seek((part_number - 1) * state.part_size)
+        return f.read(_part_length(state, part_number))
+
+
+def _resumable_state(
+    client: minio.Minio,
+    state: MultipartUploadState,
+    file_path: Path,
+    bucket_name: str,
+    object_name: str,
+    size: int,
+    part_size: int,
+) -> MultipartUploadState | None:
+    """The parts of `state` that can be kept, or None if the upload must restart.
+
+    A part is kept only if S3 still lists it with the recorded ETag and the local
+    bytes it came from still hash the same, so a file replaced between attempts
+    can never be stitched together from old and new parts.
+    """
+    target = (bucket_name, object_name, size, part_size)
+    if (state.bucket_name, state.object_name, state.size, state.part_size) != target:
+        abort_multipart_upload(state, client=client)
+        return None
+
+    try:
+        stored = _list_uploaded_parts(client, state)
+    except S3Error as exc:
+        # NoSuchUpload: it was aborted, completed, or expired by a lifecycle rule.
+        logger.info("Cannot resume multipart upload %s of %s: %s", state.upload_id, object_name, exc.code)
+        return None
+
+    kept = [
+        part
+        for part in state.parts
+        if stored.get(part.part_number) == part.etag
+        and hashlib.sha256(_read_part(file_path, state, part.part_number)).hexdigest() == part.sha256
+    ]
+    if len(kept) < len(state.parts):
+        logger.info("Resending %d invalidated part(s) of %s", len(state.parts) - len(kept), object_name)
+    return state.model_copy(update={"parts": kept})
+
+
+def _list_uploaded_parts(client: minio.Minio, state: MultipartUploadState) -> dict[int, str]:
+    """Part number to ETag for every part S3 holds for the upload."""
+    stored: dict[int, str] = {}
+    marker = None
+    while True:
+        result = client._list_parts(state.bucket_name, state.object_name, state.upload_id, part_number_marker=marker)
+        for part in result.parts:
+            stored[part.part_number] = part.etag.strip('"')
+        if not result.is_truncated or result.next_part_number_marker is None:
+            return stored
+        marker = str(result.next_part_number_marker)
+
+
+class _AggregateProgress:
+    """Serializes part completions from many workers into one progress sink.
+
+    Progress sinks count bytes with plain `+=`, which is not safe to call from
+    several threads at once. Checkpoints go through the same lock, so each one
+    sees a consistent list of parts.
+    """
+
+    def __init__(
+        self,
+        state: MultipartUploadState,
+        progress: ProgressType | None,
+        checkpoint: Callable[[MultipartUploadState], None] | None,
+    ):
+        self.state = state
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.progress is not None:
+            self.progress.set_meta(object_name=self.state.object_name, total_length=self.state.size)
+            resumed = sum(_part_length(self.state, part.part_number) for part in self.state.parts)
+            if resumed:
+                self.progress.update(resumed)
+        if self.checkpoint is not None:
+            self.checkpoint(self.state.model_copy(deep=True))
+
+    def part_done(self, part: UploadedPart, length: int) -> None:
+        with self.lock:
+            self.state.parts.append(part)
+            if self.progress is not None:
+                self.progress.update(length)
+            if self.checkpoint is not None:
+                try:
+                    self.checkpoint(self.state.model_copy(deep=True))
+                except Exception as exc:  # noqa: BLE001 - a lost checkpoint only costs a resend
+                    logger.warning("Could not checkpoint multipart upload of %s: %s", self.state.object_name, exc)
+
+
+def _parallel_multipart_upload(
+    client: minio.Minio,
+    state: MultipartUploadState,
+    file_path: Path,
+    workers: int,
+    progress: ProgressType | None,
+    checkpoint: Callable[[MultipartUploadState], None] | None,
+) -> None:
+    """Send the parts of one multipart upload that `state` does not have yet, concurrently.
+
+    Each worker reads its own part straight from the file, so only the parts in
+    flight are ever in memory. minio has no public multipart API, so this drives
+    its `_upload_part/_list_parts/_complete_multipart_upload` helpers directly.
+    """
+    aggregate = _AggregateProgress(state, progress, checkpoint)
+    aggregate.start()
+    done_numbers = {part.part_number for part in state.parts}
+    missing = [n for n in range(1, math.ceil(state.size / state.part_size) + 1) if n not in done_numbers]
+
+    def send(part_number: int) -> None:
+        data = _read_part(file_path, state, part_number)
+        etag = client._upload_part(state.bucket_name, state.object_name, data, None, state.upload_id, part_number)
+        part = UploadedPart(part_number=part_number, etag=etag, sha256=hashlib.sha256(data).hexdigest())
+        aggregate.part_done(part, len(data))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-part") as pool:
+        futures = [pool.submit(send, n) for n in missing]
+        _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        for future in futures:
+            if not future.cancelled():
+                future.result()
+
+    parts = [Part(p.part_number, p.etag) for p in sorted(state.parts, key=lambda p: p.part_number)]
+    client._complete_multipart_upload(state.bucket_name, state.object_name, state.upload_id, parts)
 
 
 def delete_from_s3(object_name: str, bucket_name: str | None = None, client: minio.Minio | None = None) -> None:
@@ -70,3 +424,333 @@ def s3_object_name_from_url(url: str) -> str | None:
         return None
 
     return url.removeprefix(prefix) or None
+
+
+# Reads bytes [start, end) of a file, in blocks.
+RangeReader = Callable[[int, int], Iterator[bytes]]
+
+
+class RangeDownloadState(BaseModel):
+    """Which chunks of a ranged download are on disk, saved beside it so it can resume.
+
+    `key` names the bytes being downloaded: the URL, or their sha256 when
+    several sources may supply them.
+    """
+
+    key: str
+    size: int
+    etag: str = ""
+    chunk_size: int
+    done: list[int] = Field(default_factory=list)
+
+
+def download_http(
+    url: str,
+    dest: str | Path,
+    sha256: str | None = None,
+    connections: int | None = None,
+    chunk_size: int | None = None,
+    client: httpx.Client | None = None,
+) -> Path:
+    """Download `url` to `dest` as byte ranges fetched concurrently.
+
+    One HTTP stream from a Pelican cache tops out well below what a cluster
+    node's link can take; `connections` ranges in flight at once fill it. Both
+    it and `chunk_size` default to `SYSTEM_CONFIG.http_download_connections`
+    and `SYSTEM_CONFIG.http_chunk_size_mb`.
+
+    Chunks are written into `<dest>.part` and recorded in `<dest>.part.json`
+    as they land, so after an interruption a second call fetches only the
+    missing ones, provided the server still reports the same size and ETag.
+    With `sha256`, the bytes are hashed as they arrive and the finished file
+    is verified before it is moved to `dest`; a mismatch discards it and raises
+    `ChecksumMismatch`. A server that ignores `Range` is read as a single
+    stream, which cannot resume.
+    """
+    dest = Path(dest)
+    connections = connections or SYSTEM_CONFIG.http_download_connections
+
+    own_client = client is None
+    if client is None:
+        client = new_http_client(connections)
+    try:
+        # A one-byte range both asks for the size and tests for range support.
+        with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as probe:
+            probe.raise_for_status()
+            # Director redirects are followed once; chunks go straight to the cache.
+            data_url = str(probe.url)
+            etag = probe.headers.get("ETag", "")
+            if probe.status_code == 206:
+                size = int(probe.headers["Content-Range"].rsplit("/", 1)[1])
+            else:
+                logger.info("%s ignores Range requests; downloading it as a single stream", url)
+                part_path = dest.with_name(f"{dest.name}.part")
+                digest = hashlib.sha256()
+                with part_path.open("wb") as out:
+                    for block in probe.iter_bytes(HTTP_BLOCK_SIZE):
+                        digest.update(block)
+                        out.write(block)
+                _finish_download(part_path, dest, digest.hexdigest(), sha256, url)
+                return dest
+        download_ranges(
+            {url: http_range_reader(client, data_url, etag)},
+            dest,
+            size,
+            key=url,
+            etag=etag,
+            sha256=sha256,
+            connections=connections,
+            chunk_size=chunk_size,
+        )
+    finally:
+        if own_client:
+            client.close()
+    return dest
+
+
+def new_http_client(connections: int | None = None) -> httpx.Client:
+    """An httpx client for ranged downloads, pooling one connection per concurrent chunk."""
+    connections = connections or SYSTEM_CONFIG.http_download_connections
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        timeout=SYSTEM_CONFIG.http_timeout_seconds,
+        follow_redirects=True,
+    )
+
+
+def http_range_reader(client: httpx.Client, url: str, etag: str = "") -> RangeReader:
+    """Read ranges of `url` with `client`, refusing anything but the range asked for."""
+    headers = {"If-Range": etag} if etag else {}
+
+    def read(start: int, end: int) -> Iterator[bytes]:
+        with client.stream("GET", url, headers={**headers, "Range": f"bytes={start}-{end - 1}"}) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # With If-Range, a full response means the file changed under us.
+                raise OSError(f"{url} answered a range request with HTTP {response.status_code}")
+            yield from response.iter_bytes(HTTP_BLOCK_SIZE)
+
+    return read
+
+
+def download_ranges(
+    readers: dict[str, RangeReader],
+    dest: str | Path,
+    size: int,
+    key: str,
+    etag: str = "",
+    sha256: str | None = None,
+    connections: int | None = None,
+    chunk_size: int | None = None,
+    on_failure: Callable[[str, Exception], None] | None = None,
+    chunk_hashes: ChunkHashes | None = None,
+) -> dict[str, int]:
+    """Download `size` bytes into `dest` as concurrent chunks, from whichever source works.
+
+    `readers` are alternative sources of the same bytes, best first. Each chunk
+    comes from the first one that has not failed; a source that fails is
+    dropped for the rest of the download and the chunk retried from the next,
+    so a source dying midway costs only the chunks it had in flight. Resuming
+    and verification work as in `download_http`, with `key` and `etag`
+    identifying the bytes. `on_failure` is told of each source dropped.
+    Returns how many bytes each source supplied.
+
+    The checksum is computed while the chunks arrive (see `_ChunkHasher`), so
+    verifying costs no pass over the file once it is complete. A mismatch
+    names the sources that supplied bytes in `ChecksumMismatch.sources`.
+
+    With the file's published `chunk_hashes`, chunks are cut to match them
+    and each is checked as it lands: one that does not match counts as a
+    failure of the source that sent it, so the chunk is fetched again from
+    the next source and the rest of the download carries on.
+    """
+    dest = Path(dest)
+    part_path = dest.with_name(f"{dest.name}.part")
+    state_path = dest.with_name(f"{dest.name}.part.json")
+    connections = connections or SYSTEM_CONFIG.http_download_connections
+    chunk_size = chunk_size or SYSTEM_CONFIG.http_chunk_size_mb * 1024 * 1024
+    if chunk_hashes is not None:
+        chunk_size = chunk_hashes.chunk_size
+
+    state = _resumable_download_state(state_path, part_path, key, size, etag, chunk_size)
+    chunk_sha256s = None
+    if chunk_hashes is not None and (chunk_hashes.size, chunk_hashes.chunk_size) == (size, state.chunk_size):
+        chunk_sha256s = chunk_hashes.sha256s
+    with _ChunkHasher(part_path, state) if sha256 else contextlib.nullcontext() as hasher:
+        supplied = _download_chunks(
+            readers, part_path, state_path, state, connections, on_failure, hasher, chunk_sha256s
+        )
+        digest = hasher.hexdigest() if hasher else None
+    try:
+        _finish_download(part_path, dest, digest, sha256, key)
+    except ChecksumMismatch as exc:
+        exc.sources = [name for name, supplied_bytes in supplied.items() if supplied_bytes]
+        raise
+    return supplied
+
+
+def _finish_download(part_path: Path, dest: Path, digest: str | None, sha256: str | None, name: str) -> None:
+    """Move a complete download into place, or discard it if `digest` is not the `sha256` expected."""
+    state_path = dest.with_name(f"{dest.name}.part.json")
+    if sha256 and digest != sha256.lower():
+        part_path.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise ChecksumMismatch(f"Expected sha256 {sha256} for {name}, got {digest}")
+    part_path.replace(dest)
+    state_path.unlink(missing_ok=True)
+
+
+class _ChunkHasher:
+    """The sha256 of a file whose chunks are written out of order, computed as they land.
+
+    Chunks are hashed in file order: each is read back as soon as every chunk
+    before it is on disk, while it is still in the page cache, by whichever
+    download thread completed the run. The digest is ready about when the last
+    chunk lands, and the finished file is never read again. Chunks a resumed
+    download already had are read back from disk the same way.
+    """
+
+    def __init__(self, path: Path, state: RangeDownloadState):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.size = state.size
+        self.chunk_size = state.chunk_size
+        self.chunks = math.ceil(state.size / state.chunk_size)
+        self.sha256 = hashlib.sha256()
+        self.ready = set(state.done)
+        self.next = 0
+        self.busy = False
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> "_ChunkHasher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        os.close(self.fd)
+
+    def chunk_done(self, index: int) -> None:
+        """Record chunk `index` as written, and hash every chunk now contiguous with the hashed prefix."""
+        with self.lock:
+            self.ready.add(index)
+        self._advance()
+
+    def hexdigest(self) -> str:
+        """The digest of the whole file; call once every chunk is written."""
+        self._advance()
+        if self.next != self.chunks:
+            raise OSError(f"Hashed {self.next} of {self.chunks} chunks")
+        return self.sha256.hexdigest()
+
+    def _advance(self) -> None:
+        with self.lock:
+            if self.busy:
+                # The thread already hashing will reach any chunk just added.
+                return
+            self.busy = True
+        while True:
+            with self.lock:
+                if self.next not in self.ready:
+                    self.busy = False
+                    return
+                index = self.next
+            start = index * self.chunk_size
+            self.sha256.update(os.pread(self.fd, min(self.chunk_size, self.size - start), start))
+            with self.lock:
+                self.next += 1
+
+
+def _resumable_download_state(
+    state_path: Path, part_path: Path, key: str, size: int, etag: str, chunk_size: int
+) -> RangeDownloadState:
+    """The saved state of an earlier attempt at the same bytes, or a fresh one."""
+    try:
+        saved = RangeDownloadState.model_validate_json(state_path.read_text())
+    except (OSError, ValueError):
+        saved = None
+    if saved is not None and part_path.exists() and part_path.stat().st_size == size:
+        if (saved.key, saved.size, saved.etag) == (key, size, etag):
+            if saved.done:
+                logger.info("Resuming %s with %d of its chunks already on disk", key, len(saved.done))
+            return saved
+    with part_path.open("wb") as out:
+        # Sparse on most filesystems; chunks fill it in at their own offsets.
+        out.truncate(size)
+    return RangeDownloadState(key=key, size=size, etag=etag, chunk_size=chunk_size)
+
+
+def _download_chunks(
+    readers: dict[str, RangeReader],
+    part_path: Path,
+    state_path: Path,
+    state: RangeDownloadState,
+    connections: int,
+    on_failure: Callable[[str, Exception], None] | None,
+    hasher: _ChunkHasher | None = None,
+    chunk_sha256s: list[str] | None = None,
+) -> dict[str, int]:
+    """Fetch the chunks `state` does not have yet, `connections` at a time, into `part_path`.
+
+    With `chunk_sha256s`, a chunk whose bytes do not hash to its entry fails
+    like a dropped connection would.
+    """
+    done = set(state.done)
+    missing = [i for i in range(math.ceil(state.size / state.chunk_size)) if i not in done]
+    lock = threading.Lock()
+    failed: set[str] = set()
+    supplied = dict.fromkeys(readers, 0)
+
+    def read_chunk(name: str, fd: int, start: int, end: int) -> None:
+        offset = start
+        digest = hashlib.sha256() if chunk_sha256s else None
+        for block in readers[name](start, end):
+            os.pwrite(fd, block, offset)
+            offset += len(block)
+            if digest is not None:
+                digest.update(block)
+        if offset != end:
+            raise OSError(f"Short read for bytes {start}-{end - 1} of {name}: got {offset - start}")
+        if digest is not None and digest.hexdigest() != chunk_sha256s[start // state.chunk_size]:
+            raise ChecksumMismatch(f"Bytes {start}-{end - 1} from {name} do not match their sha256", sources=[name])
+
+    def fetch(index: int, fd: int) -> None:
+        start = index * state.chunk_size
+        end = min(state.size, start + state.chunk_size)
+        while True:
+            with lock:
+                name = next((name for name in readers if name not in failed), None)
+            if name is None:
+                raise OSError(f"Every source failed for bytes {start}-{end - 1}: {', '.join(readers)}")
+            try:
+                read_chunk(name, fd, start, end)
+                break
+            except Exception as exc:  # noqa: BLE001 - each transport raises its own errors
+                if len(readers) == 1:
+                    raise
+                with lock:
+                    if name in failed:
+                        continue
+                    logger.warning("Source %s failed (%s); continuing from the next one", name, exc)
+                    failed.add(name)
+                if on_failure is not None:
+                    on_failure(name, exc)
+        with lock:
+            supplied[name] += end - start
+            state.done.append(index)
+            tmp_path = state_path.with_name(f"{state_path.name}.tmp")
+            tmp_path.write_text(state.model_dump_json())
+            tmp_path.replace(state_path)
+        if hasher is not None:
+            hasher.chunk_done(index)
+
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, connections), thread_name_prefix="http-range") as pool:
+            futures = [pool.submit(fetch, index, fd) for index in missing]
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    future.result()
+    finally:
+        os.close(fd)
+    return supplied
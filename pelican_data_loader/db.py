@@ -1,20 +1,44 @@
+import csv
+import json
 import logging
+import tempfile
+from collections.abc import Iterable
 from pathlib import Path
 
+import fsspec
 from datasets import Dataset as HFBaseDataset
-from datasets import DatasetDict, IterableDataset, IterableDatasetDict, load_dataset
-from sqlmodel import Field, Relationship, Session, SQLModel, create_engine, select
-
-from pelican_data_loader.config import SystemConfig
-
-CONFIG = SystemConfig()
+from datasets import DatasetDict, Features, IterableDataset, IterableDatasetDict, Split, load_dataset
+from datasets.exceptions import DatasetGenerationError
+from datasets.table import InMemoryTable
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Relationship, Session, SQLModel, col, create_engine, insert, select
+
+from pelican_data_loader.cache import get_download_cache
+from pelican_data_loader.config import SYSTEM_CONFIG
+from pelican_data_loader.croissant import data_files, declared_features, parquet_copy
+from pelican_data_loader.fetch import FetchReport, cached_path, copy_url, expand_urls, fetch_files
+from pelican_data_loader.materialize import (
+    materialize_table,
+    materialized_key,
+    materialized_suffix,
+    open_materialized,
+)
+from pelican_data_loader.parquet import ParquetFilter, filter_expression, iter_parquet, read_parquet
+from pelican_data_loader.prefetch import Prefetcher
+from pelican_data_loader.sources import fastest_source, storage_options_for
+from pelican_data_loader.utils import split_keywords
+
+CONFIG = SYSTEM_CONFIG
 HFDataset = IterableDataset | HFBaseDataset | DatasetDict | IterableDatasetDict
+logger = logging.getLogger(__name__)
 
 
-def initialize_database(path: str = CONFIG.metadata_db_engine_url, wipe: bool = False) -> None:
+def initialize_database(path: str | None = None, wipe: bool = False) -> None:
     """Initialize the SQLite database and create the Dataset table."""
 
-    engine = create_engine(path, echo=True)
+    engine = create_engine(path or CONFIG.metadata_db_engine_url, echo=True)
 
     if wipe:
         SQLModel.metadata.drop_all(engine)
@@ -22,12 +46,56 @@ def initialize_database(path: str = CONFIG.metadata_db_engine_url, wipe: bool =
     SQLModel.metadata.create_all(engine)
 
 
-def get_session(metadata_db_engine_url: str | Path = CONFIG.metadata_db_engine_url) -> Session:
+def get_session(metadata_db_engine_url: str | Path | None = None) -> Session:
     """Create a new SQLModel session."""
-    engine = create_engine(str(metadata_db_engine_url), echo=False)
+    engine = create_engine(str(metadata_db_engine_url or CONFIG.metadata_db_engine_url), echo=False)
     return Session(engine)
 
 
+# `datasets` builder for each file extension, and the builder option that makes
+# it parse only some columns. Anything unrecognised is read as CSV.
+BUILDERS = {".csv": "csv", ".parquet": "parquet", ".json": "json", ".jsonl": "json"}
+PROJECTING_BUILDERS = {"csv": "usecols", "parquet": "columns"}
+
+# Builders that infer column types from the text, and so gain from being told
+# them. Parquet carries its own schema.
+TYPED_BUILDERS = {"csv"}
+
+# Suffix of the cached copy of a file's Croissant document, stored under the
+# same key as the file it describes.
+CROISSANT_SUFFIX = ".croissant.json"
+
+
+def builder_for(url: str) -> str:
+    """The `datasets` builder that reads the file at `url`, by its extension; CSV if unknown."""
+    return BUILDERS.get(Path(url).suffix.lower(), "csv")
+
+
+def _projection_kwargs(builder: str, columns: list[str] | None) -> dict:
+    if not columns or builder not in PROJECTING_BUILDERS:
+        return {}
+    return {PROJECTING_BUILDERS[builder]: list(columns)}
+
+
+def _fsspec_url(url: str) -> str:
+    """Address files on the S3 endpoint as s3:// URLs, so they are read with credentials."""
+    if CONFIG.s3_endpoint_url and url.startswith(CONFIG.s3_endpoint_url):
+        return "s3://" + url.removeprefix(CONFIG.s3_endpoint_url).lstrip("/")
+    return url
+
+
+def _read_json(url: str) -> dict:
+    with fsspec.open(url, "rb", **storage_options_for(url)) as src:
+        return json.load(src)
+
+
+def _csv_header(url: str) -> list[str]:
+    """The column names in the first row of the CSV at `url`, read without fetching the rest."""
+    options = storage_options_for(url)
+    with fsspec.open(url, "rt", encoding="utf-8-sig", newline="", compression="infer", **options) as src:
+        return next(csv.reader(src), [])
+
+
 def guess_primary_url(jsonld: dict, extension_priority: list[str] | None = None) -> dict[str, str]:
     """Guess the primary source URL and checksum from a JSON-LD document."""
 
@@ -101,6 +169,50 @@ def parse_creators(jsonld: dict, session: Session | None = None) -> list["Person
     return persons
 
 
+def parse_keywords(jsonld: dict, session: Session | None = None) -> list["Keyword"]:
+    """Parse keywords from a JSON-LD document into Keyword objects, reusing existing ones."""
+    names = split_keywords(", ".join(jsonld.get("keywords", [])))
+    if not names:
+        return []
+    if not session:
+        logging.warning("No session provided, creating a new one with system defaults.")
+        engine = create_engine(CONFIG.metadata_db_engine_url, echo=True)
+        # Committed, or the rows `get_or_create` inserts would go with the session.
+        with Session(engine, expire_on_commit=False) as own_session:
+            keywords = Keyword.get_or_create(names, own_session)
+            own_session.commit()
+            return keywords
+    return Keyword.get_or_create(names, session)
+
+
+def backfill_keywords(session: Session, batch_size: int = 10_000) -> int:
+    """Link every dataset that has keywords but no Keyword rows to them; returns the datasets linked.
+
+    For rows written before the Keyword table existed, or by anything that
+    sets `Dataset.keywords` without going through `from_jsonld`. Idempotent,
+    and commits every `batch_size` datasets.
+    """
+    has_links = select(KeywordDatasetLink.dataset_id).where(KeywordDatasetLink.dataset_id == Dataset.id).exists()
+    rows = session.exec(select(Dataset.id, Dataset.keywords).where(Dataset.keywords != "").where(~has_links)).all()
+    if not rows:
+        return 0
+
+    names = dict.fromkeys(name for _, keywords in rows for name in split_keywords(keywords))
+    Keyword.get_or_create(list(names), session)
+    session.commit()
+    ids = dict(session.exec(select(Keyword.name, Keyword.id)).all())
+    for start in range(0, len(rows), batch_size):
+        links = [
+            {"dataset_id": dataset_id, "keyword_id": ids[name]}
+            for dataset_id, keywords in rows[start : start + batch_size]
+            for name in split_keywords(keywords)
+        ]
+        session.connection().execute(insert(KeywordDatasetLink), links)
+        session.commit()
+    logger.info("Linked %d datasets to their keywords", len(rows))
+    return len(rows)
+
+
 class PersonDatasetLink(SQLModel, table=True):
     """Link between Dataset and Person (creator)."""
 
@@ -108,7 +220,26 @@ class PersonDatasetLink(SQLModel, table=True):
     person_id: int = Field(foreign_key="person.id", primary_key=True)
 
 
+class KeywordDatasetLink(SQLModel, table=True):
+    """Link between Dataset and Keyword."""
+
+    # The primary key serves lookups by dataset; this index the other way, so
+    # the datasets with a keyword are an index range, and filtering on several
+    # keywords intersects those ranges.
+    __table_args__ = (Index("ix_keyworddatasetlink_keyword_id_dataset_id", "keyword_id", "dataset_id"),)
+
+    dataset_id: int = Field(foreign_key="dataset.id", primary_key=True)
+    keyword_id: int = Field(foreign_key="keyword.id", primary_key=True)
+
+
 class Dataset(SQLModel, table=True):
+    # The listing's sort orders, each made unique by the id. Keyset pagination
+    # seeks straight to a page through these rather than sorting the table.
+    __table_args__ = (
+        Index("ix_dataset_published_date_id", "published_date", "id"),
+        Index("ix_dataset_name_id", "name", "id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     name: str = Field(min_length=1)  # Ensure non-empty name
     description: str = ""
@@ -117,11 +248,12 @@ class Dataset(SQLModel, table=True):
     primary_source_url: str
     primary_source_sha256: str
     license: str = Field(min_length=1)  # Ensure non-empty license
-    keywords: str = ""  # comma-separated
+    keywords: str = ""  # comma-separated, as entered; `tags` holds the same keywords as rows
     croissant_jsonld_url: str | None = None
     pelican_uri: str = ""
     pelican_http_url: str = ""
     creators: list["Person"] = Relationship(back_populates="datasets", link_model=PersonDatasetLink)
+    tags: list["Keyword"] = Relationship(back_populates="datasets", link_model=KeywordDatasetLink)
 
     @classmethod
     def from_jsonld(cls, jsonld: dict, session: Session | None = None) -> "Dataset":
@@ -129,6 +261,7 @@ class Dataset(SQLModel, table=True):
 
         source_info = guess_primary_url(jsonld, extension_priority=[".csv", ".parquet"])
         creators = parse_creators(jsonld, session=session)
+        tags = parse_keywords(jsonld, session=session)
 
         return cls(
             name=jsonld.get("name", ""),
@@ -140,25 +273,287 @@ class Dataset(SQLModel, table=True):
             primary_source_url=source_info["content_url"],
             primary_source_sha256=source_info["sha256"],
             creators=creators,
+            tags=tags,
         )
 
     def __str__(self) -> str:
         """String representation of the Dataset."""
         return f"Dataset(id={self.id}, name={self.name}, version={self.version}, published_date={self.published_date})"
 
-    def pull(self) -> HFDataset:
-        """Pull the dataset from the primary source URL."""
+    def pull(
+        self,
+        use_cache: bool = True,
+        streaming: bool = False,
+        columns: list[str] | None = None,
+        split: str | None = None,
+        declared_types: bool = True,
+        filter: ParquetFilter | None = None,
+        materialize: bool | None = None,
+    ) -> HFDataset:
+        """Pull the dataset from the primary source URL.
+
+        With `use_cache`, the dataset's files are downloaded into the local
+        download cache by `fetch`, verified against their sha256s, and loaded
+        from disk; later pulls of the same bytes make no network requests at all.
+        A table split across many files (a Croissant FileSet) is fetched in
+        parallel, with each file retried on its own.
+
+        With `streaming`, an `IterableDataset` reads the files incrementally as
+        it is iterated, so the first batch arrives in the same time however large
+        the dataset is and memory stays bounded. It reads cached copies if every
+        file has one, and otherwise the remote files, without filling the cache.
+
+        `columns` keeps only those columns, dropped while parsing rather than
+        after. `split` returns that split alone instead of a dict of splits; the
+        whole dataset is the "train" split.
+
+        With `declared_types`, CSV columns get the types the Croissant document
+        declares rather than whatever inference makes of each block, so a pull
+        always yields the types the catalog shows (zero-padded codes stay text).
+        A dataset published with a Parquet copy is pulled from that instead,
+        which carries its types and skips parsing altogether.
+
+        `filter` keeps only the rows that pass it: an Arrow expression such as
+        `pc.field("year") >= 2020`, or `pyarrow.parquet`-style tuples such as
+        `[("year", ">=", 2020)]`. It needs a Parquet distribution. A Parquet
+        pull with `columns` or `filter` reads the files in place rather than
+        downloading them (cached copies are still used if every file has one):
+        only the column chunks it needs are fetched, with range requests, from
+        the row groups whose statistics the filter does not rule out. Three
+        columns of a wide table cost a few column chunks, not the whole file.
+
+        With `materialize` (by default `CONFIG.pull_materialize_arrow`), the
+        first pull of the whole table from the cache also keeps the loaded
+        table there as an Arrow file, keyed by the files' sha256s and the column
+        types. Later pulls of the table or of some of its columns, in this or any
+        process, memory-map that file instead of loading anything, and
+        DataLoader workers share its pages rather than each holding a copy (see
+        `pelican_data_loader.materialize`).
+        """
         if not self.primary_source_url:
             raise ValueError("Primary source URL is not set for this dataset.")
 
-        s3_url = self.primary_source_url.replace(CONFIG.s3_endpoint_url, "s3://")
+        sources = self.source_files(use_cache=use_cache)
+        urls = list(sources)
+        builder = builder_for(urls[0])
+        if filter is not None and builder != "parquet":
+            raise ValueError(f"{self.name} has no Parquet distribution to filter; pull it and filter the result")
+        if filter is not None and split not in (None, "train"):
+            raise ValueError("filter selects rows itself, so it cannot be combined with a split slice")
+        features = self.declared_features(use_cache=use_cache) if declared_types and builder in TYPED_BUILDERS else None
+        if materialize is None:
+            materialize = CONFIG.pull_materialize_arrow
+        key = None
+        if materialize and filter is None and use_cache and not streaming and split in (None, "train"):
+            key = materialized_key(sources.values())
+        if key:
+            suffix = materialized_suffix(features)
+            path = get_download_cache().get(key, suffix)
+            if path is not None:
+                logger.info("Loaded %s from its Arrow copy", self.name)
+                dataset = open_materialized(path, columns)
+                return dataset if split else DatasetDict({"train": dataset})
+            if columns:
+                # Only whole tables are kept; a later full pull writes the copy.
+                key = None
+
+        if builder == "parquet" and (columns or filter is not None) and split in (None, "train"):
+            return self._pull_pushdown(sources, columns, filter, use_cache, streaming, split)
+        load_kwargs = _projection_kwargs(builder, columns)
+
+        if use_cache and not streaming:
+            report = self.fetch(sources).raise_for_failures()
+            paths = {result.url: result.path for result in report.results}
+            data_files = [paths[url] for url in urls]
+            if len(report.results) == 1:
+                result = report.results[0]
+                logger.info("Pulled %s from %s (%.1f MB/s)", self.name, result.source, result.throughput_mb_s)
+        else:
+            data_files = self._readable_files(sources, use_cache)
+            load_kwargs["storage_options"] = storage_options_for(data_files[0])
+
+        if features is not None and columns:
+            features = Features({name: features[name] for name in columns if name in features})
+        # Typically a file published before its header was sanitized, whose column
+        # names differ from the document's. Checked before loading, because a
+        # streaming load only fails once it is iterated. The files of one
+        # distribution share a header, so the first stands for all of them.
+        if features is not None and set(features) != set(columns or _csv_header(data_files[0])):
+            logger.warning("%s does not match its declared features; inferring types instead", self.name)
+            features = None
+
+        def load(**kwargs) -> HFDataset:
+            return load_dataset(
+                builder,
+                data_files={"train": data_files},
+                split=split,
+                streaming=streaming,
+                **load_kwargs,
+                **kwargs,
+            )
 
-        # Use the datasets library to load the dataset
-        return load_dataset(
-            "csv",
-            data_files={"train": s3_url},
-            storage_options=CONFIG.storage_options,
-        )
+        def load_typed(**kwargs) -> HFDataset:
+            if features is None:
+                return load(**kwargs)
+            try:
+                return load(features=features, **kwargs)
+            except DatasetGenerationError:
+                # A value its declared type cannot hold.
+                logger.warning("%s does not match its declared features; inferring types instead", self.name)
+                return load(**kwargs)
+
+        if key:
+            cache = get_download_cache()
+            (cache.root / "tmp").mkdir(parents=True, exist_ok=True)
+            # `datasets` writes its own Arrow file while loading; keep it only
+            # until the cache's copy exists, so the table is on disk once.
+            with tempfile.TemporaryDirectory(dir=cache.root / "tmp") as hf_cache:
+                loaded = load_typed(cache_dir=hf_cache)
+                path = materialize_table(cache, key, suffix, loaded if split else loaded["train"])
+            dataset = open_materialized(path)
+            return dataset if split else DatasetDict({"train": dataset})
+
+        dataset = load_typed()
+        if columns and builder not in PROJECTING_BUILDERS:
+            dataset = dataset.select_columns(columns)
+        return dataset
+
+    def _pull_pushdown(
+        self,
+        sources: dict[str, str],
+        columns: list[str] | None,
+        filter: ParquetFilter | None,
+        use_cache: bool,
+        streaming: bool,
+        split: str | None,
+    ) -> HFDataset:
+        files = self._readable_files(sources, use_cache)
+        if streaming:
+            dataset = IterableDataset.from_generator(
+                iter_parquet,
+                # Tuples, so `datasets` shards the files between workers but not the columns.
+                gen_kwargs={"urls": files, "columns": tuple(columns or ()) or None, "filter": filter_expression(filter)},
+            )
+            return dataset if split else IterableDatasetDict({"train": dataset})
+        table = read_parquet(files, columns=columns, filter=filter)
+        dataset = HFBaseDataset(InMemoryTable(table), split=Split.TRAIN)
+        return dataset if split else DatasetDict({"train": dataset})
+
+    def _readable_files(self, sources: dict[str, str], use_cache: bool) -> list[str]:
+        """Cached copies of `sources` if every one has one, else their URLs at the fastest source.
+
+        The same source is used for every file, so they can all be opened through
+        one filesystem.
+        """
+        cached = [cached_path(url, sha256) for url, sha256 in sources.items()] if use_cache else [None]
+        if all(cached):
+            return [str(path) for path in cached]
+        urls = list(sources)
+        mirrors = self.mirrors(urls)
+        first = [urls[0], *mirrors.get(urls[0], [])]
+        choice = first.index(fastest_source(first[0], first[1:]))
+        # Files with no mirrors (outside the primary's directory) are read from where they are.
+        return [[url, *mirrors[url]][choice] if url in mirrors else url for url in urls]
+
+    def fetch(self, sources: dict[str, str] | None = None, concurrency: int | None = None) -> FetchReport:
+        """Download every file of this dataset into the download cache.
+
+        Returns the `FetchReport`: per-file sizes, checksums, attempts and the
+        source each came from, and the aggregate throughput. Files that still
+        fail after retries are listed there rather than raised; `pull` raises
+        for them.
+        """
+        sources = sources or self.source_files()
+        return fetch_files(sources, sha256s=sources, concurrency=concurrency, mirrors=self.mirrors(sources))
+
+    def prefetch(self, depth: int | None = None, max_bytes: int | None = None) -> Prefetcher:
+        """Iterate over this dataset's files in order, with the next ones downloading ahead.
+
+        For training loops that read one shard at a time: each `FetchResult`
+        yielded has the cached file at `path`, and while it is being read the
+        next `depth` files download, within `max_bytes` (see `Prefetcher`).
+        The prefetcher's `stats` give the time spent waiting on downloads.
+        """
+        sources = self.source_files()
+        mirrors = self.mirrors(sources)
+        return Prefetcher(sources, sha256s=sources, depth=depth, max_bytes=max_bytes, mirrors=mirrors)
+
+    def mirrors(self, urls: Iterable[str] | None = None) -> dict[str, list[str]]:
+        """Other locations of each of `urls` (by default the primary file), keyed by its s3:// URL.
+
+        The Pelican federation (`pelican_uri`) and Pelican over HTTPS
+        (`pelican_http_url`) serve the same bytes as S3; downloads go to
+        whichever of the three is fastest from where they run. Both export the
+        bucket as a whole, so a file stored beside the primary one, such as its
+        Parquet copy, is found under the same prefixes.
+        """
+        primary = _fsspec_url(self.primary_source_url)
+        base, name = primary.rsplit("/", 1)
+        others = [url for url in (self.pelican_uri, self.pelican_http_url) if url and name and url.endswith(name)]
+        prefixes = [url.removesuffix(name) for url in others]
+        mirrors = {}
+        for url in [primary] if urls is None else urls:
+            if prefixes and url.startswith(f"{base}/"):
+                mirrors[url] = [prefix + url.removeprefix(f"{base}/") for prefix in prefixes]
+        return mirrors
+
+    def source_files(self, use_cache: bool = True, prefer_parquet: bool = True) -> dict[str, str]:
+        """The URL of every file of this dataset, mapped to its sha256 ("" if unknown).
+
+        Usually just the primary source, or with `prefer_parquet` its Parquet
+        copy if the Croissant document lists one. When the document describes
+        the table as a FileSet, its glob patterns are expanded into the files
+        they match. URLs on the S3 endpoint come back as s3:// URLs.
+        """
+        jsonld = self.croissant(use_cache=use_cache)
+        files = {}
+        if jsonld and prefer_parquet:
+            files = parquet_copy(jsonld, self.primary_source_url)
+        if jsonld and not files:
+            files = data_files(jsonld, self.primary_source_url)
+        if not files:
+            files = {self.primary_source_url: self.primary_source_sha256}
+
+        sources = {}
+        for url, sha256 in files.items():
+            for expanded in expand_urls([_fsspec_url(url)]):
+                sources[expanded] = sha256
+        if not sources:
+            raise FileNotFoundError(f"No files match the file sets of {self.name}")
+        return sources
+
+    def croissant(self, use_cache: bool = True) -> dict | None:
+        """This dataset's Croissant document, or None if it has none or it cannot be read.
+
+        The document is cached next to the file it describes, and only trusted
+        if it lists that file's sha256. A failure to fetch or read it is logged
+        rather than raised, so callers fall back to what the row itself records.
+        """
+        if not self.croissant_jsonld_url:
+            return None
+        jsonld_url = _fsspec_url(self.croissant_jsonld_url)
+        sha256 = self.primary_source_sha256
+        cache = get_download_cache()
+        try:
+            if use_cache and sha256:
+                path = cache.fetch(sha256, lambda out: copy_url(jsonld_url, out), suffix=CROISSANT_SUFFIX)
+                jsonld = json.loads(path.read_text())
+            else:
+                jsonld = _read_json(jsonld_url)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read the Croissant document for %s: %s", self.name, exc)
+            return None
+
+        if sha256 and sha256 not in {dist.get("sha256") for dist in jsonld.get("distribution", [])}:
+            logger.warning("The Croissant document for %s describes other content; ignoring it", self.name)
+            cache.discard(sha256, suffix=CROISSANT_SUFFIX)
+            return None
+        return jsonld
+
+    def declared_features(self, use_cache: bool = True) -> Features | None:
+        """The column types declared in this dataset's Croissant document, if available."""
+        jsonld = self.croissant(use_cache=use_cache)
+        return declared_features(jsonld, content_url=self.primary_source_url) if jsonld else None
 
 
 class Person(SQLModel, table=True):
@@ -188,12 +583,57 @@ class Person(SQLModel, table=True):
         return f"Person(id={self.id}, name={self.first_name} {self.last_name}, email={self.email})"
 
 
+class Keyword(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(index=True, unique=True, min_length=1)
+    datasets: list["Dataset"] = Relationship(back_populates="tags", link_model=KeywordDatasetLink)
+
+    @staticmethod
+    def get_or_create(names: list[str], session: Session) -> list["Keyword"]:
+        """The Keyword rows for `names`, in order, inserting any that do not exist yet.
+
+        On Postgres and SQLite the missing names are inserted at once with
+        `ON CONFLICT DO NOTHING`, uncommitted, and read back: two publishes
+        adding the same new keyword at the same time then both get its row,
+        where a plain insert would fail the second on the unique name. On other
+        databases they are added to `session` as new rows.
+        """
+        existing = Keyword._by_name(names, session)
+        missing = [name for name in names if name not in existing]
+        dialect = session.get_bind().dialect.name
+        if missing and dialect in ("postgresql", "sqlite"):
+            upsert = postgres_insert if dialect == "postgresql" else sqlite_insert
+            for start in range(0, len(missing), 500):
+                rows = [{"name": name} for name in missing[start : start + 500]]
+                statement = upsert(Keyword).values(rows).on_conflict_do_nothing(index_elements=["name"])
+                session.exec(statement)  # type: ignore[call-overload]
+            existing.update(Keyword._by_name(missing, session))
+        elif missing:
+            created = [Keyword(name=name) for name in missing]
+            session.add_all(created)
+            existing.update((keyword.name, keyword) for keyword in created)
+        return [existing[name] for name in names]
+
+    @staticmethod
+    def _by_name(names: list[str], session: Session) -> dict[str, "Keyword"]:
+        found: dict[str, Keyword] = {}
+        # In slices, to stay under the bound-parameter limit of SQLite.
+        for start in range(0, len(names), 500):
+            statement = select(Keyword).where(col(Keyword.name).in_(names[start : start + 500]))
+            found.update((keyword.name, keyword) for keyword in session.exec(statement))
+        return found
+
+    def __str__(self) -> str:
+        """String representation of the Keyword."""
+        return f"Keyword(id={self.id}, name={self.name})"
+
+
 class DataRepoEngine:
     """A class to handle metadata operations using SQLModel."""
 
     def __init__(self, metadata_db_engine_url: str | None = None):
         if metadata_db_engine_url is None:
-            metadata_db_engine_url = SystemConfig().metadata_db_engine_url
+            metadata_db_engine_url = CONFIG.metadata_db_engine_url
         self.engine = create_engine(metadata_db_engine_url)
 
     def get_session(self) -> Session:
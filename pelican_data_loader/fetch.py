@@ -0,0 +1,298 @@
+"""Parallel, fault-tolerant downloads of many files into the download cache.
+
+Handing `load_dataset` hundreds of pelican:// URLs opens them all through one
+filesystem with no retries. A cache that drops a connection, or briefly answers
+404 for an object it has not pulled yet, fails the whole load, and which file
+fails varies from run to run. Here each file is fetched on its own, a bounded
+number at a time. Failed attempts are retried with jittered exponential backoff,
+and for Pelican the director is asked for a cache afresh before each retry
+rather than returning to the one that just failed. Every file ends up in a
+`FetchReport`, so a partial failure says exactly what is missing.
+"""
+
+import hashlib
+import logging
+import random
+import shutil
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import urlparse
+
+import fsspec
+from pelicanfs.core import PelicanFileSystem
+from pydantic import BaseModel, Field
+
+from pelican_data_loader.cache import ChecksumMismatch, DownloadCache, get_download_cache
+from pelican_data_loader.config import SYSTEM_CONFIG
+from pelican_data_loader.sources import download_from_sources, storage_options_for
+from pelican_data_loader.utils import get_sha256
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class FetchResult(BaseModel):
+    """The outcome of fetching one file."""
+
+    url: str
+    # Where the bytes came from: the URL downloaded from, which may be a mirror
+    # of `url`, or "cache" when they were already on disk.
+    source: str = ""
+    path: str = ""
+    size: int = 0
+    sha256: str = ""
+    # Whether `sha256` was checked against a checksum the catalog recorded, rather
+    # than just computed from whatever bytes arrived.
+    verified: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    @property
+    def throughput_mb_s(self) -> float:
+        return self.size / 1e6 / self.seconds if self.seconds and self.source != "cache" else 0.0
+
+
+class FetchReport(BaseModel):
+    """Every file of one fetch, and how the fetch went as a whole."""
+
+    results: list[FetchResult] = Field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    @property
+    def failed(self) -> list[FetchResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(result.size for result in self.results if result.ok)
+
+    @property
+    def throughput_mb_s(self) -> float:
+        """Aggregate MB/s over the wall-clock time of the fetch, cache hits included."""
+        return self.total_bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        done = len(self.results) - len(self.failed)
+        text = (
+            f"Fetched {done}/{len(self.results)} files "
+            f"({self.total_bytes / 1e6:.1f} MB in {self.seconds:.1f} s, {self.throughput_mb_s:.1f} MB/s)"
+        )
+        if self.failed:
+            text += "; failed: " + ", ".join(f"{result.url} ({result.error})" for result in self.failed[:5])
+            if len(self.failed) > 5:
+                text += f" and {len(self.failed) - 5} more"
+        return text
+
+    def raise_for_failures(self) -> "FetchReport":
+        if not self.ok:
+            raise FetchError(self)
+        return self
+
+
+class FetchError(Exception):
+    """Some files could not be fetched, even after retries. `report` has the details."""
+
+    def __init__(self, report: FetchReport):
+        super().__init__(report.summary())
+        self.report = report
+
+
+def expand_urls(patterns: Iterable[str]) -> list[str]:
+    """Expand glob patterns into the URLs they match, keeping plain URLs as they are."""
+    urls = []
+    for pattern in patterns:
+        if not any(char in pattern for char in "*?["):
+            urls.append(pattern)
+            continue
+        fs, _ = fsspec.core.url_to_fs(pattern, **storage_options_for(pattern))
+        scheme = urlparse(pattern).scheme
+        matches = sorted(fs.glob(pattern))
+        if isinstance(fs, PelicanFileSystem):
+            # pelicanfs returns bare namespace paths; keep the director in the URL.
+            prefix = f"{scheme}://{urlparse(pattern).netloc}"
+            urls.extend(f"{prefix}{path}" for path in matches)
+        else:
+            urls.extend(fs.unstrip_protocol(path) for path in matches)
+    return urls
+
+
+def cache_key(url: str, sha256: str = "") -> str:
+    """The download-cache key for `url`: its sha256 if known, else a hash of the URL."""
+    return sha256.lower() if sha256 else hashlib.sha256(url.encode()).hexdigest()
+
+
+def cached_path(url: str, sha256: str = "", cache: DownloadCache | None = None) -> Path | None:
+    """The cached copy of `url`, if it has been fetched already and, when checked, is intact."""
+    cache = cache or get_download_cache()
+    suffix = Path(urlparse(url).path).suffix
+    if sha256 and SYSTEM_CONFIG.verify_sha256:
+        return cache.verify(cache_key(url, sha256), sha256, suffix)
+    return cache.get(cache_key(url, sha256), suffix)
+
+
+def fetch_files(
+    urls: Iterable[str],
+    sha256s: dict[str, str] | None = None,
+    concurrency: int | None = None,
+    retries: int | None = None,
+    backoff_seconds: float | None = None,
+    cache: DownloadCache | None = None,
+    mirrors: dict[str, list[str]] | None = None,
+) -> FetchReport:
+    """Download every file into the download cache, and report on each.
+
+    A file with a checksum in `sha256s` is cached under it and, with
+    `SYSTEM_CONFIG.verify_sha256`, verified as it downloads, so a corrupt copy
+    counts as a failed attempt and the retry avoids the sources that sent it.
+    A cached copy is verified the first time each process uses it, and a
+    corrupt one discarded and downloaded again. A file without a checksum is
+    cached under the hash of its URL, and the report gives the sha256 of what
+    arrived. Files already cached are not downloaded again.
+
+    `mirrors` lists other URLs holding the same bytes as a URL. A file with
+    mirrors is downloaded from whichever of them is fastest, failing over
+    between them midway (see `sources.download_from_sources`).
+
+    Never raises for a file that fails; check `report.ok`, or call
+    `report.raise_for_failures()`.
+    """
+    start = time.perf_counter()
+    results = list(iter_fetch(urls, sha256s, concurrency, retries, backoff_seconds, cache, mirrors))
+    report = FetchReport(results=results, seconds=time.perf_counter() - start)
+    logger.info(report.summary())
+    return report
+
+
+def iter_fetch(
+    urls: Iterable[str],
+    sha256s: dict[str, str] | None = None,
+    concurrency: int | None = None,
+    retries: int | None = None,
+    backoff_seconds: float | None = None,
+    cache: DownloadCache | None = None,
+    mirrors: dict[str, list[str]] | None = None,
+) -> Iterator[FetchResult]:
+    """Like `fetch_files`, but yield each result as soon as that file is done.
+
+    Lets a consumer start on the first files while the rest are still arriving.
+    Results come in completion order, not the order of `urls`.
+    """
+    sha256s = sha256s or {}
+    mirrors = mirrors or {}
+    concurrency = concurrency or SYSTEM_CONFIG.fetch_concurrency
+    retries = SYSTEM_CONFIG.fetch_retries if retries is None else retries
+    backoff_seconds = SYSTEM_CONFIG.fetch_backoff_seconds if backoff_seconds is None else backoff_seconds
+    cache = cache or get_download_cache()
+
+    unique_urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch") as pool:
+        futures = [
+            pool.submit(fetch_one, url, sha256s.get(url, ""), mirrors.get(url, []), cache, retries, backoff_seconds)
+            for url in unique_urls
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early should not leave the queue downloading.
+            for future in futures:
+                future.cancel()
+
+
+def fetch_one(
+    url: str, sha256: str, mirrors: list[str], cache: DownloadCache, retries: int, backoff_seconds: float
+) -> FetchResult:
+    """Download one file into `cache`, as `iter_fetch` does for each of its files.
+
+    `sha256` may be empty, and `mirrors` lists other URLs with the same bytes.
+    Never raises for a failed download; the result's `error` says what went wrong.
+    """
+    key = cache_key(url, sha256)
+    suffix = Path(urlparse(url).path).suffix
+    # With verification off, a recorded checksum still names the cache entry.
+    expected = sha256 if sha256 and SYSTEM_CONFIG.verify_sha256 else None
+    result = FetchResult(url=url)
+    start = time.perf_counter()
+    hit = cache.verify(key, expected, suffix) if expected else cache.get(key, suffix)
+    if hit is not None:
+        result.source = "cache"
+    sources = [url, *mirrors]
+    for attempt in range(1, retries + 2):
+        result.attempts = attempt
+        try:
+            if mirrors:
+
+                def download(dest: Path) -> str | None:
+                    # After a failure, probe afresh rather than trust the marks it left.
+                    fetched = download_from_sources(sources, dest, sha256=expected, refresh=attempt > 1)
+                    result.source = fetched.source
+                    # Hashed as the chunks arrived; a mismatch has already raised.
+                    return expected
+
+                path = cache.fetch_file(key, download, suffix=suffix, sha256=expected)
+            else:
+                path = cache.fetch(key, lambda out: copy_url(url, out), suffix=suffix, sha256=expected)
+                result.source = result.source or url
+        except Exception as exc:  # noqa: BLE001 - fsspec backends raise whatever their HTTP client does
+            result.error = f"{type(exc).__name__}: {exc}"
+            if attempt > retries:
+                break
+            # A corrupt entry, if any, was never created, so a retry downloads afresh.
+            # Without a culprit (or with every source at fault) there is nothing to
+            # drop, so the plain retry below applies.
+            if isinstance(exc, ChecksumMismatch) and exc.sources and set(sources) - set(exc.sources):
+                sources = [source for source in sources if source not in exc.sources]
+                logger.warning("%s sent corrupt bytes for %s; trying %s next", ", ".join(exc.sources), url, sources[0])
+            delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, backoff_seconds * 2 ** (attempt - 1)))
+            logger.warning("Fetching %s failed (attempt %d): %s; retrying in %.1f s", url, attempt, result.error, delay)
+            for source in sources:
+                _reresolve(source)
+            time.sleep(delay)
+            continue
+        result.error = ""
+        result.path = str(path)
+        result.size = path.stat().st_size
+        result.sha256 = key if sha256 else get_sha256(path)
+        result.verified = bool(expected)
+        break
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def copy_url(url: str, out: BinaryIO) -> None:
+    """Stream a remote file into `out` in large blocks."""
+    with fsspec.open(url, "rb", **storage_options_for(url)) as src:
+        shutil.copyfileobj(src, out, length=COPY_BUFFER_SIZE)
+
+
+def _reresolve(url: str) -> None:
+    """Make the next Pelican request for `url` ask the director for a cache again.
+
+    pelicanfs remembers, per namespace, the caches the director offered, and only
+    stops using one after a connection error. A 404 from a cache that has not
+    caught up, or a checksum mismatch, leaves it in place, so a plain retry
+    would go straight back to it.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("pelican", "osdf"):
+        return
+    fs = fsspec.filesystem(parsed.scheme)
+    if not isinstance(fs, PelicanFileSystem):
+        return
+    with fs._namespace_lock:
+        for prefix in [prefix for prefix in fs._namespace_cache if parsed.path.startswith(prefix)]:
+            fs._namespace_cache.pop(prefix, None)
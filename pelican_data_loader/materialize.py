@@ -0,0 +1,82 @@
+"""Pulled tables kept as memory-mapped Arrow files in the download cache.
+
+Loading a CSV parses it, and even a warm `datasets` cache costs resolving and
+fingerprinting the data files before anything is read. The first whole-table
+`Dataset.pull` of some content therefore writes the table it produced to the
+download cache as an Arrow IPC file, and later pulls, in any process, memory-map
+that file instead: no parsing and no copy, so they take milliseconds whatever
+the size. The pages belong to the OS page cache rather than to a process, so
+the DataLoader workers of a node, which reopen a `datasets` table by path
+rather than unpickling a copy, share one physical copy of it.
+
+Entries are keyed by the sha256s of the source files plus the schema version:
+MATERIALIZED_VERSION and the column types asked for, so a pull with other
+declared types, or a change to the file layout, never reads a stale table.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+
+import pyarrow as pa
+from datasets import Dataset as HFBaseDataset
+from datasets import Features, Split
+from datasets.table import MemoryMappedTable
+
+from pelican_data_loader.cache import DownloadCache
+
+logger = logging.getLogger(__name__)
+
+ARROW_SUFFIX = ".arrow"
+
+# Bump when what is written changes, so entries written before are ignored.
+MATERIALIZED_VERSION = 1
+
+# Rows per record batch written. Readers slice across batches freely; this
+# only bounds how much of the source table is touched at a time.
+WRITE_BATCH_ROWS = 100_000
+
+
+def materialized_key(sha256s: Iterable[str]) -> str | None:
+    """The cache key for the table of files with these sha256s, or None if any is unknown.
+
+    A single file's table is stored under that file's own key; a table split
+    across several files under a hash of all of theirs, in order.
+    """
+    sha256s = [sha256.lower() for sha256 in sha256s]
+    if not sha256s or not all(sha256s):
+        return None
+    if len(sha256s) == 1:
+        return sha256s[0]
+    return hashlib.sha256("\n".join(sha256s).encode()).hexdigest()
+
+
+def materialized_suffix(features: Features | None) -> str:
+    """The cache suffix for a table parsed with `features`, or with inferred types if None."""
+    schema = json.dumps(features.to_dict(), sort_keys=True) if features is not None else "inferred"
+    digest = hashlib.sha256(schema.encode()).hexdigest()[:12]
+    return f".v{MATERIALIZED_VERSION}-{digest}{ARROW_SUFFIX}"
+
+
+def write_arrow(table: pa.Table, path: str | Path) -> None:
+    """Write `table` to `path` in the Arrow IPC stream format `datasets` memory-maps.
+
+    The schema metadata carries the `datasets` features, so the file reopens
+    with exactly the types it was written with.
+    """
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=WRITE_BATCH_ROWS):
+            writer.write_batch(batch)
+
+
+def materialize_table(cache: DownloadCache, key: str, suffix: str, dataset: HFBaseDataset) -> Path:
+    """The cache entry for `dataset`'s table under `key`, writing it if there is none."""
+    return cache.fetch_file(key, lambda path: write_arrow(dataset.data.table, path), suffix=suffix)
+
+
+def open_materialized(path: str | Path, columns: list[str] | None = None) -> HFBaseDataset:
+    """The table at `path`, memory-mapped, as the "train" split; `columns` selects without copying."""
+    dataset = HFBaseDataset(MemoryMappedTable.from_file(str(path)), split=Split.TRAIN)
+    return dataset.select_columns(columns) if columns else dataset
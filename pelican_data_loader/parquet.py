@@ -0,0 +1,185 @@
+"""Parquet copies of published CSVs.
+
+A CSV is parsed afresh by every consumer on every load, and its numbers travel
+as text. A Parquet copy written once at publish time carries the column types
+and is zstd-compressed column by column, so for the wide numeric tables the
+repository mostly holds it is several times smaller and loads without parsing.
+The CSV stays the primary, human-readable file; the copy is listed beside it in
+the Croissant distribution (see `croissant.parquet_copy`).
+
+Parquet also lets a reader fetch only part of a file: the footer says where
+each column chunk of each row group lies and the range of values in it, so
+`read_parquet` requests just the chunks of the wanted columns, in row groups a
+filter does not rule out.
+"""
+
+import logging
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import fsspec
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import PythonFile
+from pyarrow.fs import FSSpecHandler, PyFileSystem
+
+from pelican_data_loader.croissant import TabularSchema
+from pelican_data_loader.sources import storage_options_for
+
+logger = logging.getLogger(__name__)
+
+PARQUET_SUFFIX = ".parquet"
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL = 3
+
+# In-memory size each row group is cut to. Large enough that per-group overhead
+# and column-chunk seeks stay negligible, small enough that a reader after a
+# few rows or one shard per worker does not have to fetch much more than that.
+ROW_GROUP_BYTES = 64 * 1024 * 1024
+MIN_ROW_GROUP_ROWS = 1_000
+MAX_ROW_GROUP_ROWS = 1_000_000
+
+# Rows sampled to estimate how many make up ROW_GROUP_BYTES.
+SAMPLE_ROWS = 10_000
+
+
+def arrow_schema(schema: TabularSchema) -> pa.Schema:
+    """The Arrow schema matching `schema`'s pandas dtypes; anything not numeric or bool is text."""
+    fields = []
+    for column in schema.columns:
+        arrow_type = pa.from_numpy_dtype(column.dtype) if _is_typed(column.dtype) else pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def row_group_rows(csv_path: str | Path, schema: TabularSchema) -> int:
+    """Rows per row group for `csv_path`, sized to about ROW_GROUP_BYTES in memory."""
+    sample = pd.read_csv(csv_path, nrows=SAMPLE_ROWS, dtype=_read_dtypes(schema))
+    if sample.empty:
+        return MIN_ROW_GROUP_ROWS
+    bytes_per_row = max(1, int(sample.memory_usage(deep=True, index=False).sum()) // len(sample))
+    return max(MIN_ROW_GROUP_ROWS, min(MAX_ROW_GROUP_ROWS, ROW_GROUP_BYTES // bytes_per_row))
+
+
+def write_parquet(csv_path: str | Path, schema: TabularSchema, parquet_path: str | Path) -> Path:
+    """Convert `csv_path`, whose dtypes `schema` records, to Parquet at `parquet_path`.
+
+    Streams one row group at a time, so memory stays at about ROW_GROUP_BYTES
+    whatever the file size. Parsing with the recorded dtypes rather than
+    re-inferring them per row group keeps every group's types the same, and
+    the same as the Croissant fields built from that schema. Column statistics
+    are written, so readers can skip row groups a filter rules out.
+    """
+    parquet_path = Path(parquet_path)
+    target = arrow_schema(schema)
+    rows = row_group_rows(csv_path, schema)
+    tmp_path = parquet_path.with_name(f"{parquet_path.name}.tmp")
+    try:
+        with (
+            pq.ParquetWriter(
+                tmp_path,
+                target,
+                compression=PARQUET_COMPRESSION,
+                compression_level=PARQUET_COMPRESSION_LEVEL,
+                write_statistics=True,
+            ) as writer,
+            pd.read_csv(csv_path, chunksize=rows, dtype=_read_dtypes(schema)) as chunks,
+        ):
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, schema=target, preserve_index=False)
+                writer.write_table(table, row_group_size=rows)
+        tmp_path.replace(parquet_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info(
+        "Wrote %s (%.1f MB, %d rows per row group)", parquet_path.name, parquet_path.stat().st_size / 1e6, rows
+    )
+    return parquet_path
+
+
+# A filter on rows: an Arrow expression, such as `pc.field("year") >= 2020`, or
+# the (column, op, value) tuples `pyarrow.parquet` and pandas take, as a list
+# of conditions that must all hold or a list of such lists any one of which may.
+ParquetFilter = pc.Expression | list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+
+
+def filter_expression(filter: ParquetFilter | None) -> pc.Expression | None:
+    """`filter` as an Arrow expression."""
+    if filter is None or isinstance(filter, pc.Expression):
+        return filter
+    return pq.filters_to_expression(filter)
+
+
+def parquet_dataset(urls: list[str], filesystem: fsspec.AbstractFileSystem | None = None) -> ds.Dataset:
+    """An Arrow dataset over the Parquet files at `urls`, read with range requests.
+
+    Nothing is downloaded up front; scanning it fetches each file's footer and
+    then only the column chunks the scan needs. All of `urls` must be on the
+    same filesystem, which by default is the one fsspec picks for the first.
+    """
+    if filesystem is None:
+        filesystem, _ = fsspec.core.url_to_fs(urls[0], **storage_options_for(urls[0]))
+    paths = [_fsspec_path(filesystem, url) for url in urls]
+    return ds.dataset(paths, format="parquet", filesystem=PyFileSystem(_RangeReadHandler(filesystem)))
+
+
+def read_parquet(
+    urls: list[str],
+    columns: list[str] | None = None,
+    filter: ParquetFilter | None = None,
+    filesystem: fsspec.AbstractFileSystem | None = None,
+) -> pa.Table:
+    """The rows of the Parquet files at `urls` that pass `filter`, with only `columns`.
+
+    Row groups whose statistics show no row can pass are skipped unread, and
+    of the rest only the column chunks of `columns` and of the columns the
+    filter tests are fetched, so a narrow query on a wide remote table moves
+    little more than the bytes it returns.
+    """
+    return parquet_dataset(urls, filesystem).to_table(columns=columns, filter=filter_expression(filter))
+
+
+def iter_parquet(
+    urls: list[str],
+    columns: Sequence[str] | None = None,
+    filter: ParquetFilter | None = None,
+    filesystem: fsspec.AbstractFileSystem | None = None,
+) -> Iterator[dict]:
+    """Like `read_parquet`, but one row at a time, fetching row groups as they are reached."""
+    columns = list(columns) if columns else None
+    scanner = parquet_dataset(urls, filesystem).scanner(columns=columns, filter=filter_expression(filter))
+    for batch in scanner.to_batches():
+        yield from batch.to_pylist()
+
+
+class _RangeReadHandler(FSSpecHandler):
+    """Opens files with fsspec's read-ahead off.
+
+    fsspec otherwise rounds every read up to a multi-megabyte block, which for
+    a few column chunks of a wide file is most of what would be transferred.
+    Arrow already coalesces nearby chunk reads into larger requests itself.
+    """
+
+    def open_input_file(self, path: str) -> PythonFile:
+        return PythonFile(self.fs.open(path, mode="rb", cache_type="none"), mode="r")
+
+
+def _fsspec_path(filesystem: fsspec.AbstractFileSystem, url: str) -> str:
+    # HTTP and Pelican filesystems want whole URLs; object stores want bucket/key.
+    if urlparse(url).scheme in ("http", "https", "pelican", "osdf"):
+        return url
+    return filesystem._strip_protocol(url)
+
+
+def _read_dtypes(schema: TabularSchema) -> dict[str, str]:
+    """`read_csv` dtypes that reproduce `schema`; text columns are read as str so "007" stays "007"."""
+    return {name: dtype if _is_typed(dtype) else "str" for name, dtype in schema.dtypes.items()}
+
+
+def _is_typed(dtype: str) -> bool:
+    return dtype == "bool" or dtype.startswith(("int", "uint", "float"))
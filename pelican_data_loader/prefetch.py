@@ -0,0 +1,161 @@
+"""Fetching the next shards of a dataset while the current one is consumed.
+
+A training loop over a multi-file dataset otherwise alternates between reading
+a shard and waiting for the next to download. `Prefetcher` yields the files in
+order, each already in the download cache, while up to `depth` of the ones
+after it download in the background, within a byte budget so a long lookahead
+over large shards cannot fill the disk.
+
+The time the consumer spends waiting for a shard that has not arrived yet is
+recorded as stall time. Near zero, the lookahead is deep enough; if it stays
+high at any depth, the link, not the lookahead, is the bottleneck.
+"""
+
+import logging
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+from pelican_data_loader.cache import DownloadCache, get_download_cache
+from pelican_data_loader.config import SYSTEM_CONFIG
+from pelican_data_loader.fetch import FetchError, FetchReport, FetchResult, fetch_one
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchStats(BaseModel):
+    """How one pass of a `Prefetcher` went."""
+
+    shards: int = 0
+    bytes: int = 0
+    # Time the consumer spent blocked waiting for a shard to finish downloading.
+    stall_seconds: float = 0.0
+    # Wall-clock time from the first shard requested to the last one handed over.
+    seconds: float = 0.0
+    # Most shards that were downloading or downloaded ahead of the consumer at once.
+    max_ahead: int = 0
+
+    @property
+    def stall_fraction(self) -> float:
+        return self.stall_seconds / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Prefetched {self.shards} shards ({self.bytes / 1e6:.1f} MB in {self.seconds:.1f} s); "
+            f"stalled {self.stall_seconds:.1f} s ({self.stall_fraction:.0%}), at most {self.max_ahead} ahead"
+        )
+
+
+class Prefetcher:
+    """Iterate over files in order, each one downloaded before it is handed over.
+
+    While the consumer works on shard N, shards N+1..N+`depth` download into the
+    download cache in a thread pool. No new shard is started while the shards
+    already ahead of the consumer come to `max_bytes` or more; sizes of shards
+    still downloading are estimated from those already done, and until one is
+    done only the next shard is fetched ahead. At least one shard is always
+    fetched, whatever its size.
+
+    Yields a `FetchResult` per file, whose `path` is the cached copy. A file that
+    fails after retries raises `FetchError` when its turn comes. Stopping early,
+    by breaking out of the loop or calling `close`, cancels the shards not yet
+    started; those already downloading finish into the cache in the background.
+    `stats` has the stall time and totals so far.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        sha256s: dict[str, str] | None = None,
+        depth: int | None = None,
+        max_bytes: int | None = None,
+        mirrors: dict[str, list[str]] | None = None,
+        cache: DownloadCache | None = None,
+        retries: int | None = None,
+        backoff_seconds: float | None = None,
+    ):
+        self.urls = list(urls)
+        self.sha256s = sha256s or {}
+        self.depth = depth or SYSTEM_CONFIG.prefetch_depth
+        self.max_bytes = int(SYSTEM_CONFIG.prefetch_max_gb * 1e9) if max_bytes is None else max_bytes
+        self.mirrors = mirrors or {}
+        self.cache = cache or get_download_cache()
+        self.retries = SYSTEM_CONFIG.fetch_retries if retries is None else retries
+        self.backoff_seconds = SYSTEM_CONFIG.fetch_backoff_seconds if backoff_seconds is None else backoff_seconds
+        self.stats = PrefetchStats()
+        self._iterator: Iterator[FetchResult] | None = None
+
+    def __iter__(self) -> Iterator[FetchResult]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop prefetching. Shards not yet started are cancelled."""
+        if self._iterator is not None:
+            self._iterator.close()
+
+    def _iterate(self) -> Iterator[FetchResult]:
+        pending: deque[Future[FetchResult]] = deque()
+        next_index = 0
+        # Shards handed over so far, to estimate the size of those still downloading.
+        fetched_bytes = fetched_count = 0
+        # `depth` shards ahead, plus the one the consumer is waiting for.
+        pool = ThreadPoolExecutor(max_workers=self.depth + 1, thread_name_prefix="prefetch")
+
+        def fill() -> None:
+            nonlocal next_index
+            while next_index < len(self.urls) and len(pending) < self.depth:
+                done = [future.result().size for future in pending if future.done()]
+                known_bytes, known_count = fetched_bytes + sum(done), fetched_count + len(done)
+                if not known_count and len(pending) > 1:
+                    # Until a shard's size is known, the budget cannot be judged; look one ahead.
+                    break
+                estimate = known_bytes // known_count if known_count else 0
+                ahead = sum(done) + (len(pending) - len(done)) * estimate
+                if pending and ahead >= self.max_bytes:
+                    break
+                url = self.urls[next_index]
+                sha256 = self.sha256s.get(url, "")
+                mirrors = self.mirrors.get(url, [])
+                pending.append(
+                    pool.submit(fetch_one, url, sha256, mirrors, self.cache, self.retries, self.backoff_seconds)
+                )
+                next_index += 1
+            self.stats.max_ahead = max(self.stats.max_ahead, len(pending))
+
+        start = time.perf_counter()
+        try:
+            fill()
+            while pending:
+                future = pending.popleft()
+                # The consumer is done with the previous shard, which frees a slot.
+                fill()
+                if not future.done():
+                    waited = time.perf_counter()
+                    future.result()
+                    self.stats.stall_seconds += time.perf_counter() - waited
+                result = future.result()
+                if not result.ok:
+                    raise FetchError(FetchReport(results=[result], seconds=result.seconds))
+                fetched_bytes += result.size
+                fetched_count += 1
+                self.stats.shards += 1
+                self.stats.bytes += result.size
+                self.stats.seconds = time.perf_counter() - start
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.stats.seconds = time.perf_counter() - start
+            logger.info(self.stats.summary())
@@ -0,0 +1,350 @@
+"""Choosing where to download a dataset's bytes from.
+
+A dataset row records the same file at up to three places: S3
+(`primary_source_url`), the Pelican federation (`pelican_uri`, served by the
+nearest cache the director picks) and Pelican over plain HTTPS
+(`pelican_http_url`). Which is fastest depends on where the job runs: on campus
+S3 is a hop away, off campus a nearby Pelican cache wins. So each source is
+probed, by timing a small read, and the download goes to the fastest one that
+answers, with the others as fallbacks should it fail midway.
+
+Probe results are kept in `{download_cache_dir}/source_probes.json` for
+`SYSTEM_CONFIG.source_probe_ttl_seconds`, per endpoint rather than per file, so
+one job's probes serve every pull on the node until they go stale. For the same
+reason a failure is only saved when it was reaching the endpoint that failed (see
+`is_connection_error`): a file missing from one mirror, or bad bytes from it,
+says nothing about the other files there, so it only counts against the source
+for the download it happened in.
+"""
+
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from urllib.parse import urlparse
+
+import aiohttp
+import botocore.exceptions
+import fsspec
+import httpx
+from pydantic import BaseModel, Field
+
+from pelican_data_loader.config import SYSTEM_CONFIG
+from pelican_data_loader.data import RangeReader, download_ranges, http_range_reader, new_http_client
+from pelican_data_loader.utils import CHUNK_HASHES_SUFFIX, ChunkHashes
+
+logger = logging.getLogger(__name__)
+
+# Bytes read to estimate a source's throughput: enough to get past TCP slow
+# start on a fast link, little enough that probing three sources is cheap.
+PROBE_BYTES = 1024 * 1024
+
+# File size sources are ranked for when the real one is not known yet: large
+# enough that throughput counts, not only latency.
+RANK_BYTES = 100 * 1024 * 1024
+
+# Failures to reach an endpoint at all, as raised by each client the sources are
+# read through: httpx for http(s), aiohttp under pelicanfs, botocore under s3fs.
+_CONNECTION_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    socket.gaierror,
+    httpx.TransportError,
+    aiohttp.ClientConnectionError,
+    botocore.exceptions.ConnectionError,
+)
+
+
+class SourceProbe(BaseModel):
+    """How one source performed when last probed."""
+
+    url: str
+    ok: bool
+    latency_seconds: float = 0.0
+    throughput_mb_s: float = 0.0
+    error: str = ""
+    # Whether the failure was reaching the endpoint rather than reading this
+    # file; only such failures are saved for other files to skip the endpoint.
+    connection_error: bool = False
+    probed_at: float = Field(default_factory=time.time)
+
+    def expected_seconds(self, size: int) -> float:
+        """Estimated time to download `size` bytes from this source."""
+        if not self.ok:
+            return float("inf")
+        return self.latency_seconds + size / 1e6 / max(self.throughput_mb_s, 1e-3)
+
+
+class SourceDownload(BaseModel):
+    """Where a download's bytes came from, for logging."""
+
+    sources: dict[str, int] = Field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def source(self) -> str:
+        """The source that supplied the most bytes."""
+        return max(self.sources, key=lambda url: self.sources[url]) if self.sources else ""
+
+    @property
+    def throughput_mb_s(self) -> float:
+        total = sum(self.sources.values())
+        return total / 1e6 / self.seconds if self.seconds else 0.0
+
+
+_http_client: httpx.Client | None = None
+_http_client_lock = threading.Lock()
+_probe_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = new_http_client()
+        return _http_client
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """Whether `exc`, or an exception it was raised from, is a failure to reach the endpoint at all.
+
+    fsspec backends wrap their clients' errors, often in a plain `OSError`, so
+    the whole chain is looked at.
+    """
+    seen: BaseException | None = exc
+    while seen is not None:
+        if isinstance(seen, _CONNECTION_ERRORS):
+            return True
+        seen = seen.__cause__ or seen.__context__
+    return False
+
+
+def _endpoint(url: str) -> str:
+    parsed = urlparse(url)
+    if parsed.scheme == "s3":
+        return f"s3://{urlparse(SYSTEM_CONFIG.s3_endpoint_url).netloc}"
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def storage_options_for(url: str) -> dict:
+    """fsspec options for `url`: the S3 credentials for s3:// URLs, nothing for others."""
+    return SYSTEM_CONFIG.storage_options if url.startswith("s3://") else {}
+
+
+def open_source(url: str) -> tuple[int, RangeReader]:
+    """The size of the file at `url`, and a reader for byte ranges of it.
+
+    http(s) goes through a pooled httpx client, with any redirect (the Pelican
+    director's) resolved once here rather than on every range. A server that
+    ignores `Range` cannot take part in a ranged download and raises `OSError`.
+    Everything else goes through fsspec.
+    """
+    scheme = urlparse(url).scheme
+    if scheme in ("http", "https"):
+        client = _get_http_client()
+        # As in `download_http`, a one-byte range both sizes the file and tests for range support.
+        with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise OSError(f"{url} ignores Range requests")
+            size = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+            return size, http_range_reader(client, str(response.url), response.headers.get("ETag", ""))
+
+    fs, path = fsspec.core.url_to_fs(url, **storage_options_for(url))
+    if scheme in ("pelican", "osdf"):
+        # pelicanfs wants the full URL so it can find the director.
+        path = url
+
+    def read(start: int, end: int) -> Iterator[bytes]:
+        yield fs.cat_file(path, start=start, end=end)
+
+    return int(fs.size(path)), read
+
+
+def probe_source(url: str) -> SourceProbe:
+    """Time a one-byte read (latency) and a `PROBE_BYTES` read (throughput) of `url`."""
+    try:
+        size, read = open_source(url)
+        start = time.perf_counter()
+        b"".join(read(0, 1))
+        latency = time.perf_counter() - start
+        start = time.perf_counter()
+        received = len(b"".join(read(0, min(PROBE_BYTES, size))))
+        elapsed = time.perf_counter() - start
+    except Exception as exc:  # noqa: BLE001 - an unreachable source is a result, not an error
+        return SourceProbe(
+            url=url, ok=False, error=f"{type(exc).__name__}: {exc}", connection_error=is_connection_error(exc)
+        )
+    return SourceProbe(url=url, ok=True, latency_seconds=latency, throughput_mb_s=received / 1e6 / elapsed)
+
+
+def probe_sources(urls: Iterable[str], refresh: bool = False) -> list[SourceProbe]:
+    """Probe each source, or reuse a probe of its endpoint younger than the TTL.
+
+    Probes run concurrently, and one that has not answered within
+    `SYSTEM_CONFIG.source_probe_timeout_seconds` counts as unreachable.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    saved = {} if refresh else _load_probes()
+    now = time.time()
+    results: dict[str, SourceProbe] = {}
+    stale = []
+    for url in urls:
+        probe = saved.get(_endpoint(url))
+        if probe is not None and now - probe.probed_at < SYSTEM_CONFIG.source_probe_ttl_seconds:
+            results[url] = probe.model_copy(update={"url": url})
+        else:
+            stale.append(url)
+
+    if stale:
+        pool = ThreadPoolExecutor(max_workers=len(stale), thread_name_prefix="probe")
+        futures = {pool.submit(probe_source, url): url for url in stale}
+        done, _ = wait(futures, timeout=SYSTEM_CONFIG.source_probe_timeout_seconds)
+        # Do not wait on a source that hangs; its probe thread finishes on its own.
+        pool.shutdown(wait=False, cancel_futures=True)
+        for future, url in futures.items():
+            if future in done:
+                results[url] = future.result()
+            else:
+                results[url] = SourceProbe(url=url, ok=False, error="probe timed out", connection_error=True)
+        _save_probes([results[url] for url in stale if results[url].ok or results[url].connection_error])
+
+    for url in urls:
+        probe = results[url]
+        if probe.ok:
+            logger.info("Source %s: %.0f ms, %.1f MB/s", url, probe.latency_seconds * 1000, probe.throughput_mb_s)
+        else:
+            logger.info("Source %s unreachable: %s", url, probe.error)
+    return [results[url] for url in urls]
+
+
+def rank_sources(probes: list[SourceProbe], size: int = RANK_BYTES) -> list[SourceProbe]:
+    """Reachable sources, fastest first for a download of `size` bytes."""
+    return sorted((probe for probe in probes if probe.ok), key=lambda probe: probe.expected_seconds(size))
+
+
+def fastest_source(url: str, mirrors: list[str]) -> str:
+    """Whichever of `url` and its mirrors probes fastest, or `url` if none answers."""
+    if not mirrors:
+        return url
+    ranked = rank_sources(probe_sources([url, *mirrors]))
+    return ranked[0].url if ranked else url
+
+
+def mark_failed(url: str, exc: Exception) -> None:
+    """Record that `url` failed, so the next selection skips its endpoint until the TTL expires.
+
+    Only for a connection error; any other failure concerns this file alone,
+    and the download that hit it has already stopped using the source.
+    """
+    if not is_connection_error(exc):
+        logger.debug("Not marking the endpoint of %s down for %s: %s", url, type(exc).__name__, exc)
+        return
+    _save_probes([SourceProbe(url=url, ok=False, error=f"{type(exc).__name__}: {exc}", connection_error=True)])
+
+
+def download_from_sources(
+    urls: Iterable[str],
+    dest: str | Path,
+    sha256: str | None = None,
+    connections: int | None = None,
+    refresh: bool = False,
+) -> SourceDownload:
+    """Download the file that every one of `urls` holds from the fastest of them.
+
+    Sources are probed (see `probe_sources`) and ranked; chunks are then read
+    from the best, failing over to the next whenever one dies, without
+    refetching chunks already on disk. A source that cannot be reached is
+    remembered as down until the probe TTL expires (see `mark_failed`); one
+    that fails otherwise, or sends bytes not matching `sha256`, is only dropped
+    from this download. `refresh` probes every source afresh. Returns how many
+    bytes each source supplied and the overall throughput.
+
+    A file larger than one chunk that was published with chunk hashes (see
+    `utils.ChunkHashes`) is checked chunk by chunk as well, so a source
+    sending bad bytes is dropped as soon as one of its chunks fails.
+    """
+    urls = list(urls)
+    ranked = rank_sources(probe_sources(urls, refresh=refresh))
+    if not ranked:
+        raise OSError(f"No source is reachable: {', '.join(urls)}")
+    readers = {}
+    for probe in ranked:
+        try:
+            size, readers[probe.url] = open_source(probe.url)
+        except Exception as exc:  # noqa: BLE001 - it answered the probe, but not now
+            mark_failed(probe.url, exc)
+    if not readers:
+        raise OSError(f"No source is reachable: {', '.join(urls)}")
+
+    chunk_hashes = None
+    if sha256 and size > SYSTEM_CONFIG.http_chunk_size_mb * 1024 * 1024:
+        chunk_hashes = load_chunk_hashes(next(iter(readers)), sha256)
+
+    start = time.perf_counter()
+    # A checksum mismatch propagates with its sources named, for the caller to retry elsewhere.
+    supplied = download_ranges(
+        readers,
+        dest,
+        size,
+        key=sha256 or ranked[0].url,
+        sha256=sha256,
+        connections=connections,
+        on_failure=mark_failed,
+        chunk_hashes=chunk_hashes,
+    )
+    return SourceDownload(sources={url: n for url, n in supplied.items() if n}, seconds=time.perf_counter() - start)
+
+
+def load_chunk_hashes(url: str, sha256: str) -> ChunkHashes | None:
+    """The chunk hashes published beside `url`, if any, and if they describe the bytes with `sha256`."""
+    hashes_url = url + CHUNK_HASHES_SUFFIX
+    try:
+        with fsspec.open(hashes_url, "rb", **storage_options_for(hashes_url)) as src:
+            hashes = ChunkHashes.model_validate_json(src.read())
+    except (OSError, ValueError) as exc:
+        # Most files are published without them.
+        logger.debug("No chunk hashes for %s: %s", url, exc)
+        return None
+    if hashes.sha256 != sha256.lower():
+        logger.warning("The chunk hashes beside %s describe other content; ignoring them", url)
+        return None
+    return hashes
+
+
+def _probes_path() -> Path:
+    return Path(SYSTEM_CONFIG.download_cache_dir).expanduser() / "source_probes.json"
+
+
+def _load_probes() -> dict[str, SourceProbe]:
+    try:
+        raw = json.loads(_probes_path().read_text())
+        return {endpoint: SourceProbe.model_validate(probe) for endpoint, probe in raw.items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_probes(probes: list[SourceProbe]) -> None:
+    """Merge `probes` into the saved ones. Concurrent writers may drop each other's, which only costs a re-probe."""
+    path = _probes_path()
+    with _probe_lock:
+        saved = _load_probes()
+        saved.update({_endpoint(probe.url): probe for probe in probes})
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A name of its own, so writers in other processes cannot collide on it.
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as out:
+                    json.dump({endpoint: probe.model_dump() for endpoint, probe in saved.items()}, out)
+                os.replace(tmp_name, path)
+            finally:
+                Path(tmp_name).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("Could not save source probes: %s", exc)
@@ -1,20 +1,156 @@
 import hashlib
 import logging
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
 
-import mlcroissant as mlc
-import pandas as pd
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import mlcroissant as mlc
+    import pandas as pd
+
+# Bytes read at a time when hashing a file. hashlib releases the GIL while it
+# hashes a buffer this large, so the next one is read in the meantime.
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Chunk hashes are published beside a file under its name plus this suffix.
+CHUNK_HASHES_SUFFIX = ".chunks.json"
+
+
+class ChunkHashes(BaseModel):
+    """The sha256 of a file and of each of its `chunk_size`-byte chunks in turn.
+
+    Published beside the file (see CHUNK_HASHES_SUFFIX) so a ranged download
+    in chunks of the same size can check each one as it lands, and drop a
+    source that sends bad bytes after one chunk rather than the whole file.
+    `sha256` is the plain digest Croissant records, which ties the list to
+    the exact bytes it describes; `root` identifies the list itself.
+    """
+
+    sha256: str
+    size: int
+    chunk_size: int
+    sha256s: list[str]
+
+    @property
+    def root(self) -> str:
+        """The sha256 of the chunk digests, in order: a tree hash of the file."""
+        return hashlib.sha256(b"".join(bytes.fromhex(digest) for digest in self.sha256s)).hexdigest()
 
 
 def get_sha256(path: Path) -> str:
-    """Calculate the SHA256 hash of a file."""
+    """Calculate the SHA256 hash of a file.
+
+    Reads HASH_BUFFER_SIZE at a time on a background thread, so the disk is
+    read while the previous buffer is hashed rather than in turn with it.
+    """
     sha256 = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
+    for block in _read_blocks(Path(path), HASH_BUFFER_SIZE):
+        sha256.update(block)
     return sha256.hexdigest()
 
 
+def hash_file(path: Path, chunk_size: int, workers: int | None = None) -> ChunkHashes:
+    """The sha256 of a file and of each `chunk_size` bytes of it, in a single read.
+
+    The whole-file digest is sequential by nature and is computed as
+    `get_sha256` does; the chunk digests are computed from the same buffers
+    on `workers` threads (by default one per CPU) alongside it, so with a few
+    cores to spare they add little to its time.
+    """
+    path = Path(path)
+    workers = workers or os.cpu_count() or 1
+    sha256 = hashlib.sha256()
+    size = 0
+    pending: deque = deque()
+    digests = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as pool:
+        for block in _read_blocks(path, chunk_size):
+            if size % chunk_size:
+                # A chunk before this one came up short, which would shift every boundary after it.
+                raise OSError(f"Read a short chunk of {path} before its end; its chunk hashes would be misaligned")
+            pending.append(pool.submit(lambda data: hashlib.sha256(data).hexdigest(), block))
+            sha256.update(block)
+            size += len(block)
+            # Bound the chunks held in memory to those being hashed.
+            while len(pending) > workers:
+                digests.append(pending.popleft().result())
+        digests.extend(future.result() for future in pending)
+    return ChunkHashes(sha256=sha256.hexdigest(), size=size, chunk_size=chunk_size, sha256s=digests)
+
+
+def _read_blocks(path: Path, block_size: int, read_ahead: int = 2) -> Iterator[bytes | bytearray]:
+    """Consecutive `block_size` blocks of `path`, up to `read_ahead` of them read ahead on a thread.
+
+    Every block but the last is exactly `block_size` bytes (see `_read_block`).
+    """
+    if path.stat().st_size <= block_size:
+        # Not worth a thread.
+        data = path.read_bytes()
+        if data:
+            yield data
+        return
+
+    blocks: queue.Queue = queue.Queue(maxsize=read_ahead)
+    stop = threading.Event()
+
+    def read() -> None:
+        try:
+            with path.open("rb", buffering=0) as f:
+                while not stop.is_set():
+                    block = _read_block(f, block_size)
+                    blocks.put(block)
+                    if not block:
+                        return
+        except OSError as exc:
+            blocks.put(exc)
+
+    thread = threading.Thread(target=read, name="hash-read", daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if isinstance(block, OSError):
+                raise block
+            if not block:
+                return
+            yield block
+    finally:
+        # A consumer that stops early: unblock the reader so it sees `stop`.
+        stop.set()
+        while thread.is_alive():
+            try:
+                blocks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _read_block(f: BinaryIO, block_size: int) -> bytearray:
+    """The next `block_size` bytes of unbuffered `f`, or fewer only at the end of the file.
+
+    One raw read may return less than asked: on FUSE, Lustre and NFS mounts, and
+    always past the 0x7ffff000 bytes Linux reads at once. So it is repeated
+    until the block is full.
+    """
+    block = bytearray(block_size)
+    filled = 0
+    with memoryview(block) as view:
+        while filled < block_size:
+            count = f.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+    del block[filled:]
+    return block
+
+
 def get_sha256_from_bytes(content: bytes) -> str:
     """Calculate the SHA256 hash of bytes."""
     return hashlib.sha256(content).hexdigest()
@@ -46,10 +182,19 @@ def sanitize_name(name: str) -> str:
     return sanitized_name
 
 
-def parse_col(col: pd.Series, parent_id: str) -> mlc.Field:
-    """Parse a column of the DataFrame into a Field object."""
+def split_keywords(raw: str | None) -> list[str]:
+    """The distinct keywords of a comma-separated `Dataset.keywords` string, in order."""
+    if not raw:
+        return []
+    return list(dict.fromkeys(part.strip() for part in raw.split(",") if part.strip()))
+
+
+@cache
+def _pd_dtype_to_mlc_dtype() -> dict[str, "mlc.DataType"]:
+    # mlcroissant takes about a second to import; only Croissant generation needs it.
+    import mlcroissant as mlc
 
-    PD_DTYPE_TO_MLC_DTYPE = {
+    return {
         "bool": mlc.DataType.BOOL,
         "int": mlc.DataType.INTEGER,
         "int8": mlc.DataType.INT8,
@@ -69,14 +214,30 @@ def parse_col(col: pd.Series, parent_id: str) -> mlc.Field:
         "category": mlc.DataType.TEXT,
         "object": mlc.DataType.TEXT,  # TODO: May need better type for missing values
     }
-    col_name = sanitize_name(str(col.name))
+
+
+def __getattr__(name: str) -> Any:
+    if name == "PD_DTYPE_TO_MLC_DTYPE":
+        return _pd_dtype_to_mlc_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_col(col: "pd.Series", parent_id: str) -> "mlc.Field":
+    """Parse a column of the DataFrame into a Field object."""
+    return parse_dtype(str(col.name), str(col.dtype), parent_id)
+
+
+def parse_dtype(name: str, dtype: str, parent_id: str) -> "mlc.Field":
+    """Build the Field for a column from its name and pandas dtype string."""
+    import mlcroissant as mlc
+
+    col_name = sanitize_name(name)
     # Normalize pandas dtype string and map with safe fallback
-    dtype_str = str(col.dtype).lower()
-    mlc_dtype = PD_DTYPE_TO_MLC_DTYPE.get(dtype_str)
+    mlc_dtype = _pd_dtype_to_mlc_dtype().get(dtype.lower())
     if mlc_dtype is None:
         logging.warning(
             "Unrecognized pandas dtype '%s' for column '%s'; defaulting to TEXT",
-            col.dtype,
+            dtype,
             col_name,
         )
         mlc_dtype = mlc.DataType.TEXT
@@ -0,0 +1,98 @@
+"""Ranged HTTP download throughput against a local server, by connection count.
+
+Serves one file from an in-process HTTP server that honours `Range` and caps
+every response at `--stream-mb-s`, standing in for a Pelican cache whose
+single-stream rate is well below the link speed. `download_http` then fetches
+the file at each connection count. `--no-range` makes the server ignore
+`Range`, to time the single-stream fallback.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from pelican_data_loader.data import download_http
+
+BLOCK = 64 * 1024
+
+
+def make_handler(path: Path, stream_bytes_s: float, honour_range: bool):
+    size = path.stat().st_size
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if honour_range and match:
+                start = int(match[1])
+                end = min(int(match[2]) if match[2] else size - 1, size - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("ETag", '"bench"')
+            self.end_headers()
+
+            sent, began = 0, time.perf_counter()
+            with path.open("rb") as f:
+                f.seek(start)
+                while sent < end - start + 1:
+                    block = f.read(min(BLOCK, end - start + 1 - sent))
+                    self.wfile.write(block)
+                    sent += len(block)
+                    # Sleep off any lead over the per-stream rate.
+                    lead = sent / stream_bytes_s - (time.perf_counter() - began)
+                    if lead > 0:
+                        time.sleep(lead)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-connection ranged HTTP downloads")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-size-mb", type=int, default=8)
+    parser.add_argument("--stream-mb-s", type=float, default=50.0, help="Rate cap on each HTTP response")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--no-range", action="store_true", help="Serve whole files only, ignoring Range")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.bin"
+        source.write_bytes(os.urandom(args.size_mb * 1024 * 1024))
+        sha256 = hashlib.sha256(source.read_bytes()).hexdigest()
+
+        handler = make_handler(source, args.stream_mb_s * 1e6, honour_range=not args.no_range)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/source.bin"
+
+        print(f"{'connections':>11} {'seconds':>8} {'MB/s':>8}")
+        try:
+            for connections in args.connections:
+                dest = Path(tmp) / f"download_{connections}.bin"
+                start = time.perf_counter()
+                download_http(
+                    url, dest, sha256=sha256, connections=connections, chunk_size=args.chunk_size_mb * 1024 * 1024
+                )
+                seconds = time.perf_counter() - start
+                print(f"{connections:>11} {seconds:>8.2f} {args.size_mb * 1.048576 / seconds:>8.1f}")
+                dest.unlink()
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Time to import the package, and parts of its API, in a fresh interpreter.
+
+Each statement runs `--repeat` times in a new process and the best time is
+reported, less the interpreter's own startup. With `--budget-ms` the script
+exits non-zero if the bare `import pelican_data_loader` takes longer, so it can
+run as a CI step that fails when something heavy is imported eagerly again.
+Rerun a slow statement under `python -X importtime -c ...` to see what it pulls in.
+"""
+
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import pelican_data_loader": "import pelican_data_loader",
+    "upload_to_s3": "from pelican_data_loader import upload_to_s3",
+    "fetch_files": "from pelican_data_loader import fetch_files",
+    "Dataset": "from pelican_data_loader import Dataset",
+}
+
+HEAVY_MODULES = ("pandas", "datasets", "mlcroissant", "sqlmodel")
+
+
+def timed_import(statement: str) -> tuple[float, list[str]]:
+    """Milliseconds `statement` takes in a fresh interpreter, and the heavy modules it loaded."""
+    code = (
+        "import sys, time; start = time.perf_counter(); "
+        f"{statement}; "
+        "print((time.perf_counter() - start) * 1000); "
+        f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    out.check_returncode()
+    lines = out.stdout.splitlines()
+    return float(lines[-2]), lines[-1].split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark package import time")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per statement; the best is reported")
+    parser.add_argument(
+        "--budget-ms", type=float, default=None, help="Fail if `import pelican_data_loader` takes longer than this"
+    )
+    args = parser.parse_args()
+
+    print(f"{'import':<28} {'ms':>8}  heavy modules loaded")
+    results = {}
+    for name, statement in STATEMENTS.items():
+        runs = [timed_import(statement) for _ in range(args.repeat)]
+        ms, heavy = min(runs)
+        results[name] = ms
+        print(f"{name:<28} {ms:>8.1f}  {', '.join(heavy) or '-'}")
+
+    if args.budget_ms is not None:
+        ms = results["import pelican_data_loader"]
+        if ms > args.budget_ms:
+            sys.exit(f"\nimport pelican_data_loader took {ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        print(f"\nimport pelican_data_loader within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
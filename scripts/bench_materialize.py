@@ -0,0 +1,122 @@
+"""Load time in a fresh process, and memory across workers, of a materialized table.
+
+Writes a wide CSV, loads it once with `datasets` as `Dataset.pull` does and
+keeps the table with `materialize_table`, then times each way of getting it
+back in a new process: parsing the CSV again, `load_dataset` with its own cache
+warm, and memory-mapping the materialized file. `--workers` processes then each
+load the table and read every value, the way DataLoader workers would, and
+report their private (anonymous) and file-backed resident memory, beside a
+worker that only imports the libraries. Memory figures come from /proc, so
+Linux only.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import datasets
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from pelican_data_loader.cache import DownloadCache
+from pelican_data_loader.materialize import materialize_table, materialized_suffix, open_materialized
+
+LOADERS = {
+    "parse CSV (pandas)": "import pandas as pd; pd.read_csv({csv!r})",
+    "load_dataset, warm cache": (
+        "import datasets; datasets.disable_progress_bars(); "
+        "datasets.load_dataset('csv', data_files={csv!r}, split='train', cache_dir={hf_cache!r})"
+    ),
+    "memory-map Arrow copy": (
+        "from pelican_data_loader.materialize import open_materialized; open_materialized({arrow!r})"
+    ),
+}
+
+
+def write_csv(path: Path, rows: int, cols: int) -> None:
+    rng = np.random.default_rng(0)
+    pd.DataFrame({f"reading_{i}": np.round(rng.normal(100, 15, rows), 2) for i in range(cols)}).to_csv(
+        path, index=False
+    )
+
+
+def timed_subprocess(code: str) -> float:
+    """Seconds a fresh interpreter takes to run `code`, less its startup and imports."""
+    timer = "import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)"
+    imports = "import datasets, pandas, pyarrow, pelican_data_loader.materialize; "
+    out = subprocess.run([sys.executable, "-c", imports + timer.format(code=code)], capture_output=True, text=True)
+    out.check_returncode()
+    return float(out.stdout.split()[-1])
+
+
+def _resident_mb() -> tuple[float, float]:
+    fields = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines())
+    return int(fields["RssAnon"].split()[0]) / 1024, int(fields["RssFile"].split()[0]) / 1024
+
+
+def _worker(args: tuple[str, str]) -> tuple[float, float]:
+    how, path = args
+    if how == "imports":
+        pass
+    elif how == "pandas":
+        frame = pd.read_csv(path)
+        float(frame.to_numpy().sum())
+    else:
+        table = open_materialized(path).data.table
+        sum(pc.sum(column).as_py() for column in table.columns)
+    return _resident_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading a materialized Arrow table")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--cols", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="Loads per method; the best is reported")
+    args = parser.parse_args()
+
+    logging.getLogger("pelican_data_loader").setLevel(logging.WARNING)
+    datasets.disable_progress_bars()
+    datasets.logging.set_verbosity_error()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "wide.csv"
+        write_csv(csv_path, args.rows, args.cols)
+        hf_cache = str(Path(tmp) / "hf")
+        loaded = datasets.load_dataset("csv", data_files=str(csv_path), split="train", cache_dir=hf_cache)
+        arrow_path = materialize_table(DownloadCache(Path(tmp) / "cache"), "0" * 64, materialized_suffix(None), loaded)
+        print(
+            f"{csv_path.name}: {csv_path.stat().st_size / 1e6:.1f} MB CSV, "
+            f"{arrow_path.stat().st_size / 1e6:.1f} MB Arrow, {args.rows} rows x {args.cols} columns\n"
+        )
+
+        print(f"{'load in a fresh process':<26} {'seconds':>8}")
+        paths = {"csv": str(csv_path), "hf_cache": hf_cache, "arrow": str(arrow_path)}
+        for name, code in LOADERS.items():
+            seconds = min(timed_subprocess(code.format(**paths)) for _ in range(args.repeat))
+            print(f"{name:<26} {seconds:>8.3f}")
+
+        print(f"\n{args.workers} workers, each reading every value, per worker:")
+        print(f"{'load':<26} {'private MB':>11} {'file MB':>8}")
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            ("imports only", "imports", ""),
+            ("pandas DataFrame", "pandas", csv_path),
+            ("memory-mapped Arrow", "arrow", arrow_path),
+        ]
+        for name, how, path in workers:
+            with context.Pool(args.workers) as pool:
+                resident = pool.map(_worker, [(how, str(path))] * args.workers)
+            private = sum(anon for anon, _ in resident) / len(resident)
+            mapped = sum(file for _, file in resident) / len(resident)
+            print(f"{name:<26} {private:>11.0f} {mapped:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Discover listing latency by page depth: keyset cursors against OFFSET.
+
+Fills a SQLite database with `--rows` datasets and times `list_datasets` for
+pages at increasing depths in each keyset sort, once reached by offset (a
+`page` number alone) and once by cursor (the `after` of the page before), with
+the total left out and the result cache off, so only paging is measured. Then
+times the total itself, counted and then cached. Run from the repository root,
+so `app` is importable.
+"""
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.services import datasets as dataset_service
+from app.services.datasets import ensure_listing_indexes, list_datasets
+
+DEPTHS = [1, 10, 100, 1_000, 10_000]
+
+
+def fill(path: Path, rows: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO dataset (name, description, version, published_date, primary_source_url, "
+        "primary_source_sha256, license, keywords, pelican_uri, pelican_http_url) "
+        "VALUES (?, '', '1.0', ?, '', '', ?, '', '', '')",
+        (
+            (f"Dataset {rng.randrange(rows):08}", f"{rng.randint(2010, 2025)}-{rng.randint(1, 12):02}-01", "MIT")
+            for _ in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def best_ms(repeat: int, call) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Discover pagination by depth")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pages.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        fill(path, args.rows)
+        ensure_listing_indexes(engine)
+        page_size = dataset_service.settings.page_size
+        print(f"{args.rows} datasets, {page_size} per page\n")
+
+        print(f"{'sort':<8} {'page':>7} {'offset ms':>10} {'cursor ms':>10}")
+        cache = dataset_service._cache
+        cache_entries, cache.max_entries = cache.max_entries, 0
+        with Session(engine) as session:
+            for sort in dataset_service.KEYSET_SORTS:
+                for depth in DEPTHS:
+                    if (depth - 1) * page_size >= args.rows:
+                        break
+                    # The cursor of the page before: the last row of a page that ends there.
+                    before = list_datasets(session, sort=sort, page_size=(depth - 1) * page_size or 1, with_total=False)
+                    cursor = before.next_cursor if depth > 1 else ""
+                    fetch = partial(list_datasets, session, sort=sort, page=depth, with_total=False)
+                    offset = best_ms(args.repeat, fetch)
+                    keyset = best_ms(args.repeat, partial(fetch, after=cursor))
+                    print(f"{sort:<8} {depth:>7} {offset:>10.2f} {keyset:>10.2f}")
+
+            cache.max_entries = cache_entries
+            dataset_service.catalog_changed()
+            counted = best_ms(1, partial(list_datasets, session, licenses=["MIT"]))
+            cached = best_ms(args.repeat, partial(list_datasets, session, licenses=["MIT"]))
+            print(f"\npage 1 with its total: {counted:.2f} ms counted, {cached:.2f} ms cached")
+
+
+if __name__ == "__main__":
+    main()
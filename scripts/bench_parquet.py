@@ -0,0 +1,73 @@
+"""Size and load time of a published CSV against its Parquet copy.
+
+Writes a wide table of the kind the repository mostly holds (measurements at a
+few decimal places, integer counts and codes), converts it with `write_parquet`
+as publishing does, and loads each with `datasets` into an empty cache, which is
+what `Dataset.pull` does once the file is downloaded.
+"""
+
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import datasets
+import numpy as np
+import pandas as pd
+
+from pelican_data_loader.croissant import infer_schema
+from pelican_data_loader.parquet import write_parquet
+
+
+def write_csv(path: Path, rows: int, cols: int) -> None:
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(cols):
+        if i % 4 == 0:
+            columns[f"count_{i}"] = rng.poisson(20, rows)
+        else:
+            columns[f"reading_{i}"] = np.round(rng.normal(100, 15, rows), 2)
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def timed_load(builder: str, path: Path) -> float:
+    hf_cache = tempfile.mkdtemp()
+    datasets.config.HF_DATASETS_CACHE = Path(hf_cache)
+    try:
+        start = time.perf_counter()
+        datasets.load_dataset(builder, data_files=str(path), split="train")
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(hf_cache, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV against Parquet copies")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, nargs="+", default=[20, 100, 300])
+    parser.add_argument("--repeat", type=int, default=3, help="Loads per format; the best is reported")
+    args = parser.parse_args()
+
+    logging.getLogger("pelican_data_loader").setLevel(logging.WARNING)
+    datasets.disable_progress_bars()
+    datasets.logging.set_verbosity_error()
+
+    print(f"{'columns':>8} {'csv MB':>8} {'pq MB':>8} {'ratio':>6} {'csv s':>7} {'pq s':>7} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for cols in args.cols:
+            csv_path = Path(tmp) / f"wide_{cols}.csv"
+            write_csv(csv_path, args.rows, cols)
+            parquet_path = write_parquet(csv_path, infer_schema(csv_path), csv_path.with_suffix(".parquet"))
+            csv_mb, parquet_mb = csv_path.stat().st_size / 1e6, parquet_path.stat().st_size / 1e6
+            csv_s = min(timed_load("csv", csv_path) for _ in range(args.repeat))
+            parquet_s = min(timed_load("parquet", parquet_path) for _ in range(args.repeat))
+            print(
+                f"{cols:>8} {csv_mb:>8.1f} {parquet_mb:>8.1f} {csv_mb / parquet_mb:>5.1f}x "
+                f"{csv_s:>7.2f} {parquet_s:>7.2f} {csv_s / parquet_s:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Bytes read per query shape when pulling a Parquet copy with pushdown.
+
+Writes a wide table sorted by `year`, converts it with `write_parquet` as
+publishing does, and runs `read_parquet` over a filesystem that counts every
+byte and read request, standing in for range requests to S3 or Pelican. A full
+download moves the whole file whatever the query; these are the bytes a
+`pull(columns=..., filter=...)` moves instead.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+from fsspec.implementations.local import LocalFileSystem
+
+from pelican_data_loader.croissant import infer_schema
+from pelican_data_loader.parquet import read_parquet, write_parquet
+
+
+class CountingFileSystem(LocalFileSystem):
+    """A local filesystem that tallies the bytes and read calls of every file it opens."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bytes_read = 0
+        self.reads = 0
+
+    def _open(self, path, mode="rb", **kwargs):
+        f = super()._open(path, mode, **kwargs)
+        read = f.read
+
+        def counting_read(*args):
+            data = read(*args)
+            self.bytes_read += len(data)
+            self.reads += 1
+            return data
+
+        f.read = counting_read
+        return f
+
+
+def write_csv(path: Path, rows: int, cols: int) -> None:
+    rng = np.random.default_rng(0)
+    columns = {"year": np.sort(rng.integers(1990, 2025, rows)), "site": rng.integers(0, 500, rows)}
+    for i in range(cols - 2):
+        columns[f"reading_{i}"] = np.round(rng.normal(100, 15, rows), 2)
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+QUERIES = {
+    "whole table": {},
+    "3 columns": {"columns": ["year", "reading_0", "reading_1"]},
+    "3 columns, year >= 2020": {"columns": ["year", "reading_0", "reading_1"], "filter": pc.field("year") >= 2020},
+    "3 columns, site == 7": {"columns": ["site", "reading_0", "reading_1"], "filter": [("site", "==", 7)]},
+    "all columns, year == 2000": {"filter": [("year", "==", 2000)]},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bytes read by Parquet column and predicate pushdown")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--cols", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("pelican_data_loader").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "wide.csv"
+        write_csv(csv_path, args.rows, args.cols)
+        parquet_path = write_parquet(csv_path, infer_schema(csv_path), Path(tmp) / "wide.parquet")
+        size = parquet_path.stat().st_size
+        print(f"{parquet_path.name}: {size / 1e6:.1f} MB, {args.rows} rows x {args.cols} columns\n")
+
+        print(f"{'query':<26} {'rows':>8} {'MB read':>8} {'of file':>8} {'reads':>6} {'seconds':>8}")
+        for name, query in QUERIES.items():
+            fs = CountingFileSystem(skip_instance_cache=True)
+            start = time.perf_counter()
+            table = read_parquet([str(parquet_path)], filesystem=fs, **query)
+            seconds = time.perf_counter() - start
+            print(
+                f"{name:<26} {table.num_rows:>8} {fs.bytes_read / 1e6:>8.2f} "
+                f"{fs.bytes_read / size:>8.1%} {fs.reads:>6} {seconds:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Consumer stall time over a sharded dataset, by prefetch depth.
+
+Serves `--shards` shards from the rate-capped HTTP server in
+`bench_http_download` (every path returns the same bytes, each cached under
+its own URL), then reads them through a `Prefetcher` into an empty
+cache at each depth, spending `--consume-s` on every shard to stand in for a
+training step. Depth 0 fetches each shard only when the consumer asks for it.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from bench_http_download import make_handler
+
+from pelican_data_loader.cache import DownloadCache
+from pelican_data_loader.fetch import fetch_one
+from pelican_data_loader.prefetch import Prefetcher
+
+
+def run(urls: list[str], depth: int, consume_s: float, cache: DownloadCache) -> tuple[float, float]:
+    start = time.perf_counter()
+    if depth == 0:
+        stall = 0.0
+        for url in urls:
+            waited = time.perf_counter()
+            fetch_one(url, "", [], cache, retries=0, backoff_seconds=0)
+            stall += time.perf_counter() - waited
+            time.sleep(consume_s)
+        return time.perf_counter() - start, stall
+    with Prefetcher(urls, depth=depth, cache=cache, retries=0) as prefetcher:
+        for _ in prefetcher:
+            time.sleep(consume_s)
+    return time.perf_counter() - start, prefetcher.stats.stall_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark consumer stall time by prefetch depth")
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--shard-mb", type=int, default=16)
+    parser.add_argument("--stream-mb-s", type=float, default=32.0, help="Rate cap on each HTTP response")
+    parser.add_argument("--consume-s", type=float, default=0.5, help="Time spent on each shard")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    logging.getLogger("pelican_data_loader").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shard = Path(tmp) / "shard.bin"
+        shard.write_bytes(os.urandom(args.shard_mb * 1024 * 1024))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(shard, args.stream_mb_s * 1e6, honour_range=True))
+        # fsspec drops connections once it has the bytes it wants; do not print each one.
+        server.handle_error = lambda request, client_address: None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls = [f"http://127.0.0.1:{server.server_port}/shard_{i:04d}.bin" for i in range(args.shards)]
+
+        print(f"{'depth':>6} {'seconds':>8} {'stall s':>8} {'stall %':>8}")
+        try:
+            for depth in args.depths:
+                cache = DownloadCache(Path(tmp) / f"cache_{depth}")
+                seconds, stall = run(urls, depth, args.consume_s, cache)
+                print(f"{depth:>6} {seconds:>8.2f} {stall:>8.2f} {stall / seconds:>8.0%}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
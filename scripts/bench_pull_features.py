@@ -0,0 +1,108 @@
+"""Pull time for wide CSVs, with and without the types Croissant declares.
+
+Writes a CSV of mixed int, float, bool and text columns, builds its Croissant
+document, and seeds both into a scratch download cache, so every pull is a cache
+hit and the timings are parsing alone. Each pull also gets an empty `datasets`
+cache; otherwise the second pull of a file would just reopen the first's Arrow
+output.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import datasets
+import numpy as np
+import pandas as pd
+
+from pelican_data_loader.cache import DownloadCache, get_download_cache
+from pelican_data_loader.croissant import CroissantSpec, build_croissant_metadata, infer_schema
+from pelican_data_loader.db import CONFIG, CROISSANT_SUFFIX, Dataset
+
+ENDPOINT = "https://bench.invalid"
+URL = f"{ENDPOINT}/bench/wide.csv"
+
+
+def write_csv(path: Path, rows: int, cols: int) -> None:
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(cols):
+        kind = i % 4
+        if kind == 0:
+            columns[f"int_{i}"] = rng.integers(0, 1_000_000, rows)
+        elif kind == 1:
+            columns[f"float_{i}"] = rng.random(rows)
+        elif kind == 2:
+            columns[f"bool_{i}"] = rng.random(rows) < 0.5
+        else:
+            columns[f"text_{i}"] = np.char.add("id", rng.integers(0, 1000, rows).astype(str))
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def seed_cache(cache: DownloadCache, csv_path: Path) -> str:
+    sha256 = hashlib.sha256(csv_path.read_bytes()).hexdigest()
+    spec = CroissantSpec(
+        name="wide", version="1", license="mit", file_id="wide", file_name="wide.csv", file_url=URL, file_sha256=sha256
+    )
+    jsonld = build_croissant_metadata(infer_schema(csv_path), spec)
+    cache.fetch(sha256, lambda out: out.write(csv_path.read_bytes()), suffix=".csv")
+    cache.fetch(sha256, lambda out: out.write(json.dumps(jsonld).encode()), suffix=CROISSANT_SUFFIX)
+    return sha256
+
+
+def timed_pull(dataset: Dataset, declared_types: bool) -> float:
+    hf_cache = tempfile.mkdtemp()
+    datasets.config.HF_DATASETS_CACHE = Path(hf_cache)
+    try:
+        start = time.perf_counter()
+        dataset.pull(split="train", declared_types=declared_types)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(hf_cache, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pulls with declared vs inferred column types")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--repeat", type=int, default=3, help="Pulls per setting; the best is reported")
+    args = parser.parse_args()
+
+    logging.getLogger("pelican_data_loader").setLevel(logging.WARNING)
+    datasets.disable_progress_bars()
+    datasets.logging.set_verbosity_error()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the cache `pull` uses at scratch space rather than the user's own.
+        cache = get_download_cache()
+        cache.root = Path(tmp) / "cache"
+        # `pull` maps URLs on the S3 endpoint to s3:// ones, which are what the cache
+        # entries are named after.
+        CONFIG.s3_endpoint_url = ENDPOINT
+        print(f"{'columns':>8} {'MB':>8} {'inferred s':>11} {'declared s':>11} {'speedup':>8}")
+        for cols in args.cols:
+            csv_path = Path(tmp) / f"wide_{cols}.csv"
+            write_csv(csv_path, args.rows, cols)
+            sha256 = seed_cache(cache, csv_path)
+            dataset = Dataset(
+                name="wide",
+                version="1",
+                published_date="2025-01-01",
+                license="mit",
+                primary_source_url=URL,
+                primary_source_sha256=sha256,
+                croissant_jsonld_url=f"{ENDPOINT}/bench/metadata/wide.json",
+            )
+            inferred = min(timed_pull(dataset, declared_types=False) for _ in range(args.repeat))
+            declared = min(timed_pull(dataset, declared_types=True) for _ in range(args.repeat))
+            size_mb = csv_path.stat().st_size / 1e6
+            print(f"{cols:>8} {size_mb:>8.1f} {inferred:>11.2f} {declared:>11.2f} {inferred / declared:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Upload throughput against a local S3 stand-in, by worker count.
+
+Starts an in-process moto server and uploads one file with `upload_to_s3` at each
+worker count. A local server answers in microseconds, which hides exactly the
+per-request latency parallel parts exist to overlap, so `--latency-ms` adds a
+fixed delay to every request to stand in for the round trip to WISC-S3.
+
+moto is only needed here, so it is not a project dependency; add it for the run:
+
+    uv run --with "moto[server]" python scripts/bench_s3_upload.py
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import minio
+import urllib3
+from moto.server import ThreadedMotoServer
+
+from pelican_data_loader.data import upload_to_s3
+
+BUCKET = "bench"
+
+
+class DelayedPoolManager(urllib3.PoolManager):
+    """A PoolManager that waits before every request, simulating network latency."""
+
+    def __init__(self, latency: float, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        time.sleep(self.latency)
+        return super().urlopen(method, url, redirect=redirect, **kw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel multipart uploads")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the uploaded file")
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay added to every S3 request")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+
+    http = DelayedPoolManager(args.latency_ms / 1000, maxsize=max(args.workers))
+    client = minio.Minio(f"{host}:{port}", access_key="bench", secret_key="bench", secure=False, http_client=http)
+    client.make_bucket(BUCKET)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "payload.bin"
+        path.write_bytes(os.urandom(args.size_mb * 1024 * 1024))
+
+        print(f"{args.size_mb} MB file, {args.part_size_mb} MB parts, {args.latency_ms:g} ms per request")
+        for workers in args.workers:
+            start = time.perf_counter()
+            upload_to_s3(
+                path,
+                bucket_name=BUCKET,
+                object_name=f"payload-{workers}.bin",
+                client=client,
+                part_size=args.part_size_mb * 1024 * 1024,
+                workers=workers,
+            )
+            elapsed = time.perf_counter() - start
+            stored = client.stat_object(BUCKET, f"payload-{workers}.bin").size
+            assert stored == path.stat().st_size, f"uploaded {stored} bytes, expected {path.stat().st_size}"
+            print(f"workers={workers:>3}  {elapsed:6.2f} s  {args.size_mb / elapsed:8.1f} MB/s")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Discover search latency: the full-text index against the `ILIKE` scan it replaced.
+
+Fills a SQLite database with `--rows` datasets whose names, keywords and
+descriptions draw words from a Zipf-distributed vocabulary, as real text does,
+then times `list_datasets` for a few live-search queries, including the prefixes
+typed on the way to a word, with and without the index. Run from the repository
+root, so `app` is importable. Postgres is not measured here.
+"""
+
+import argparse
+import itertools
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.services import search
+from app.services.datasets import list_datasets
+
+QUERIES = ["c", "cli", "climate", "climate lake", "lake sediment core", "genome", "no such word"]
+# Real words for the queries to find, placed from fairly common (in about one
+# dataset in twenty) to rare (about one in a thousand).
+SEED_WORDS = ["climate", "lake", "sediment", "core", "genome", "soil", "water", "survey", "crop", "yield"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list[str]:
+    """`size` made-up words, most common first, with SEED_WORDS spread among them."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = sorted({"".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)})
+    for i, word in enumerate(SEED_WORDS):
+        words.insert(50 * (i + 1) ** 2, word)
+    return words
+
+
+def fill(path: Path, rows: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    words = vocabulary(20_000, rng)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    def text(k: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=k))
+
+    def published() -> str:
+        return f"{rng.randint(2010, 2025)}-{rng.randint(1, 12):02}-01"
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO dataset (name, description, version, published_date, primary_source_url, "
+        "primary_source_sha256, license, keywords, pelican_uri, pelican_http_url) "
+        "VALUES (?, ?, '1.0', ?, '', '', 'MIT', ?, '', '')",
+        ((text(4).title(), text(60), published(), text(3).replace(" ", ", ")) for _ in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Discover full-text search")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "search.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        fill(path, args.rows)
+        start = time.perf_counter()
+        search.ensure_search_index(engine)
+        print(f"{args.rows} datasets; index built in {time.perf_counter() - start:.2f} s\n")
+
+        key = engine.url.render_as_string(hide_password=True)
+        print(f"{'query':<22} {'sort':<10} {'matches':>8} {'ILIKE ms':>9} {'index ms':>9}")
+        with Session(engine) as session:
+            for query in QUERIES:
+                for sort in ("newest", "relevance"):
+                    timings = {}
+                    for indexed in (False, True):
+                        search._index_ready[key] = indexed
+                        best = float("inf")
+                        for _ in range(args.repeat):
+                            start = time.perf_counter()
+                            page = list_datasets(session, query=query, sort=sort)
+                            best = min(best, time.perf_counter() - start)
+                        timings[indexed] = (best * 1000, page.total)
+                    print(
+                        f"{query:<22} {sort:<10} {timings[True][1]:>8} "
+                        f"{timings[False][0]:>9.1f} {timings[True][0]:>9.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""File hashing throughput: the old 8 KB loop against `get_sha256` and `hash_file`.
+
+Hashes one `--size-mb` file of random bytes with each, both from the page
+cache (warm) and after asking the kernel to drop the file's pages (cold, via
+posix_fadvise, so Linux only, and only as cold as the disk under it allows).
+`hash_file` also computes the chunk hashes published with
+APP_PUBLISH_CHUNK_HASHES, on `--workers` threads.
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from pelican_data_loader.utils import get_sha256, hash_file
+
+
+def legacy_sha256(path: Path) -> str:
+    """`get_sha256` as it was: 8 KB reads, in turn with hashing, on one thread."""
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_into_page_cache(path: Path) -> None:
+    with path.open("rb") as f:
+        while f.read(64 * 1024 * 1024):
+            pass
+
+
+def drop_from_page_cache(path: Path) -> None:
+    with path.open("rb") as f:
+        os.fsync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark file hashing throughput")
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--chunk-mb", type=int, default=16, help="Chunk size for hash_file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Threads for hash_file's chunk hashes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method and cache state; the best is reported")
+    parser.add_argument("--dir", default=None, help="Where to write the file; a tmpfs has no cold reads")
+    args = parser.parse_args()
+
+    methods = {
+        "8 KB loop (before)": legacy_sha256,
+        "get_sha256": get_sha256,
+        f"hash_file, {args.workers} workers": lambda path: hash_file(path, args.chunk_mb * 1024 * 1024, args.workers),
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = Path(tmp) / "blob.bin"
+        with path.open("wb") as out:
+            for _ in range(args.size_mb):
+                out.write(os.urandom(1024 * 1024))
+        size_mb = path.stat().st_size / 1e6
+        print(f"{path.name}: {size_mb:.0f} MB, {os.cpu_count()} CPUs\n")
+
+        print(f"{'method':<26} {'warm MB/s':>10} {'cold MB/s':>10}")
+        for name, method in methods.items():
+            rates = []
+            for cold in (False, True):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    if cold:
+                        drop_from_page_cache(path)
+                    else:
+                        load_into_page_cache(path)
+                    start = time.perf_counter()
+                    method(path)
+                    best = min(best, time.perf_counter() - start)
+                rates.append(size_mb / best)
+            print(f"{name:<26} {rates[0]:>10.0f} {rates[1]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
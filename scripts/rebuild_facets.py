@@ -0,0 +1,31 @@
+"""Link unlinked datasets to their keywords, and recount the Discover facet counts.
+
+The app keeps the counts current for the datasets it publishes and deletes.
+Run this after changing the dataset table any other way, through the library,
+a notebook or SQL, or whenever the facet numbers look wrong:
+
+    uv run python scripts/rebuild_facets.py
+
+from the repository root, with the same `.env` as the app, so it reaches the
+same database (APP_DATABASE_URL, or the POSTGRES_* settings).
+"""
+
+import logging
+
+from app.db import SessionFactory, engine
+from app.services.datasets import ensure_keyword_links
+from app.services.facets import KEYWORD, LICENSE, FacetCount, facet_size, rebuild_facet_counts
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    FacetCount.__table__.create(engine, checkfirst=True)
+    ensure_keyword_links(engine)
+    with SessionFactory() as session:
+        datasets = rebuild_facet_counts(session)
+        licenses, keywords = facet_size(session, LICENSE), facet_size(session, KEYWORD)
+    print(f"Counted {datasets} datasets: {licenses} licenses, {keywords} keywords")
+
+
+if __name__ == "__main__":
+    main()